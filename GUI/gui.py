@@ -18,7 +18,11 @@ from modules.pso_module import tune_pid_pso
 from modules.ga_module import tune_pid_ga
 from modules.de_module import tune_pid_de
 from modules.cma_module import tune_pid_cma
-from modules.statistics_module import teste_friedman, gerar_resumo_estatistico, obter_dados_para_grafico
+from modules.surrogate_module import tune_pid_surrogate
+from modules.nsga_module import tune_pid_nsga2
+from modules.statistics_module import (teste_friedman, gerar_resumo_estatistico, obter_dados_para_grafico,
+                                       analise_frente_pareto, resumo_frente_pareto)
+from modules.landscape_module import paisagem, trajetorias
 from main import print_PID_params
 
 
@@ -67,6 +71,11 @@ class PIDResultsGUI:
         self.notebook.add(self.aba_estatistica, text="📊 Análise Estatística")
         self.setup_aba_estatistica()
 
+        # ABA 5: Paisagem de Custo
+        self.aba_paisagem = ttk.Frame(self.notebook)
+        self.notebook.add(self.aba_paisagem, text="🗺️ Paisagem de Custo")
+        self.setup_aba_paisagem()
+
     def setup_aba_config(self):
         """Configura aba de configuração e execução."""
         
@@ -153,6 +162,8 @@ class PIDResultsGUI:
         self.var_pso = tk.BooleanVar(value=True)
         self.var_de = tk.BooleanVar(value=True)
         self.var_cma = tk.BooleanVar(value=True)
+        self.var_gp = tk.BooleanVar(value=False)
+        self.var_nsga = tk.BooleanVar(value=False)
         
         ttk.Checkbutton(frame_metodos, text="Ziegler-Nichols (Curva de Reação)", 
                         variable=self.var_zn1).grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
@@ -166,10 +177,14 @@ class PIDResultsGUI:
                         variable=self.var_de).grid(row=1, column=2, sticky=tk.W, padx=5, pady=2)
         ttk.Checkbutton(frame_metodos, text="CMA-ES", 
                         variable=self.var_cma).grid(row=2, column=2, sticky=tk.W, padx=5, pady=2)
+        ttk.Checkbutton(frame_metodos, text="Otimização Bayesiana (GP-EI)", 
+                        variable=self.var_gp).grid(row=1, column=3, sticky=tk.W, padx=5, pady=2)
+        ttk.Checkbutton(frame_metodos, text="NSGA-II (Multiobjetivo)", 
+                        variable=self.var_nsga).grid(row=2, column=3, sticky=tk.W, padx=5, pady=2)
         
         # Botões de seleção rápida
         frame_botoes_sel = ttk.Frame(frame_metodos)
-        frame_botoes_sel.grid(row=3, column=0, columnspan=3, pady=10)
+        frame_botoes_sel.grid(row=3, column=0, columnspan=4, pady=10)
         ttk.Button(frame_botoes_sel, text="Selecionar Todos", 
                 command=self.selecionar_todos).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes_sel, text="Desselecionar Todos", 
@@ -197,6 +212,83 @@ class PIDResultsGUI:
                         variable=self.var_robustez).grid(row=1, column=0, columnspan=3, 
                                                 sticky=tk.W, padx=5, pady=5)
         
+        # Checkbox para avaliação multi-fidelidade
+        self.var_multi_fidelidade = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Avaliação multi-fidelidade (grade grossa nas primeiras gerações)", 
+                        variable=self.var_multi_fidelidade).grid(row=2, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para motores vetorizados
+        self.var_vetorizado = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Motores vetorizados (população avaliada em lote)", 
+                        variable=self.var_vetorizado).grid(row=3, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para retomar campanha interrompida
+        self.var_retomar = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Retomar execução interrompida com os mesmos parâmetros", 
+                        variable=self.var_retomar).grid(row=4, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para warm start a partir de resultados anteriores
+        self.var_aquecimento = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Warm start (partir dos melhores ganhos já obtidos para esta planta)", 
+                        variable=self.var_aquecimento).grid(row=5, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para semeadura com os ganhos de ZN1/CC
+        self.var_semeadura_heuristica = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Semear população inicial com os ganhos de ZN1 e Cohen-Coon", 
+                        variable=self.var_semeadura_heuristica).grid(row=6, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para limites de busca derivados da planta
+        self.var_limites_automaticos = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Limites de busca derivados da planta (K, L, T identificados)", 
+                        variable=self.var_limites_automaticos).grid(row=7, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para busca em escala logarítmica
+        self.var_escala_log = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Buscar ganhos em escala logarítmica (motores em arrays)", 
+                        variable=self.var_escala_log).grid(row=8, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para polimento local por gradiente
+        self.var_polimento = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Polir resultado dos métodos evolutivos (L-BFGS-B com gradiente exato)", 
+                        variable=self.var_polimento).grid(row=9, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para referência do ótimo global (busca em grade)
+        self.var_referencia_global = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Comparar com o ótimo global (busca exaustiva em grade)", 
+                        variable=self.var_referencia_global).grid(row=10, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox para sintonia robusta (pior caso nos cenários de robustez)
+        self.var_objetivo_robusto = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Sintonia robusta (pior caso nos cenários C1–C8)", 
+                        variable=self.var_objetivo_robusto).grid(row=11, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
+        # Checkbox e prazo do portfólio de métodos (orçamento compartilhado)
+        self.var_portfolio = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="Portfólio de métodos com prazo (s):", 
+                        variable=self.var_portfolio).grid(row=12, column=0, 
+                                                sticky=tk.W, padx=5, pady=5)
+        self.entry_prazo = ttk.Entry(frame_exec, width=10, font=("Arial", 10))
+        self.entry_prazo.insert(0, "60")
+        self.entry_prazo.grid(row=12, column=1, padx=5, pady=5, sticky=tk.W)
+        ttk.Label(frame_exec, text="Evolutivos dividem o prazo, realocado aos que melhoram mais rápido", 
+                foreground="gray").grid(row=12, column=2, sticky=tk.W, padx=5)
+        
+        # Checkbox para corrida F-Race (eliminação de métodos piores)
+        self.var_corrida = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_exec, text="F-Race (eliminar métodos significativamente piores a cada iteração)", 
+                        variable=self.var_corrida).grid(row=13, column=0, columnspan=3, 
+                                                sticky=tk.W, padx=5, pady=5)
+        
         # ===== SEÇÃO 5: BOTÕES DE AÇÃO =====
         frame_acoes = ttk.Frame(self.aba_config)
         frame_acoes.pack(fill=tk.X, padx=10, pady=20)
@@ -295,12 +387,14 @@ class PIDResultsGUI:
 
     def selecionar_todos(self):
         """Seleciona todos os métodos."""
-        for var in [self.var_zn1, self.var_cc, self.var_ga, self.var_pso, self.var_de, self.var_cma]:
+        for var in [self.var_zn1, self.var_cc, self.var_ga, self.var_pso, self.var_de, self.var_cma, self.var_gp,
+                    self.var_nsga]:
             var.set(True)
 
     def desselecionar_todos(self):
         """Desseleciona todos os métodos."""
-        for var in [self.var_zn1, self.var_cc, self.var_ga, self.var_pso, self.var_de, self.var_cma]:
+        for var in [self.var_zn1, self.var_cc, self.var_ga, self.var_pso, self.var_de, self.var_cma, self.var_gp,
+                    self.var_nsga]:
             var.set(False)
 
     def apenas_heuristicos(self):
@@ -311,6 +405,8 @@ class PIDResultsGUI:
         self.var_pso.set(False)
         self.var_de.set(False)
         self.var_cma.set(False)
+        self.var_gp.set(False)
+        self.var_nsga.set(False)
 
     def apenas_evolutivos(self):
         """Seleciona apenas métodos evolutivos."""
@@ -320,6 +416,8 @@ class PIDResultsGUI:
         self.var_pso.set(True)
         self.var_de.set(True)
         self.var_cma.set(True)
+        self.var_gp.set(False)
+        self.var_nsga.set(False)
 
     def executar_simulacoes(self):
         """Executa simulações com os parâmetros configurados."""
@@ -331,6 +429,7 @@ class PIDResultsGUI:
             t_final = float(self.entry_tempo_final.get())
             n_pontos = int(self.entry_pontos.get())
             iteracoes = int(self.entry_iteracoes.get())
+            prazo = float(self.entry_prazo.get()) if self.var_portfolio.get() else None
 
             self.k_term_atual = k_term
             self.tau_atual = tau
@@ -345,7 +444,11 @@ class PIDResultsGUI:
             if n_pontos < 100:
                 messagebox.showerror("Erro", "Número de pontos deve ser >= 100!")
                 return
-            
+
+            if prazo is not None and prazo <= 0:
+                messagebox.showerror("Erro", "O prazo do portfólio deve ser positivo!")
+                return
+
             metodos_selecionados = {}
             if self.var_zn1.get():
                 metodos_selecionados['ZN1'] = ziegler_nichols_1
@@ -359,6 +462,10 @@ class PIDResultsGUI:
                 metodos_selecionados['DE'] = tune_pid_de
             if self.var_cma.get():
                 metodos_selecionados['CMA-ES'] = tune_pid_cma
+            if self.var_gp.get():
+                metodos_selecionados['GP-EI'] = tune_pid_surrogate
+            if self.var_nsga.get():
+                metodos_selecionados['NSGA-II'] = tune_pid_nsga2
             
             if not metodos_selecionados:
                 messagebox.showwarning("Aviso", "Selecione pelo menos um método!")
@@ -397,7 +504,20 @@ class PIDResultsGUI:
                     metodos_selecionados=metodos_selecionados,
                     iteracoes=iteracoes,
                     executar_robustez=self.var_robustez.get(),
-                    db_path=self.db_name
+                    db_path=self.db_name,
+                    multi_fidelidade=self.var_multi_fidelidade.get(),
+                    vetorizado=self.var_vetorizado.get(),
+                    retomar=self.var_retomar.get(),
+                    aquecimento=self.var_aquecimento.get(),
+                    semeadura_heuristica=self.var_semeadura_heuristica.get(),
+                    limites_automaticos=self.var_limites_automaticos.get(),
+                    escala_log=self.var_escala_log.get(),
+                    polimento=self.var_polimento.get(),
+                    referencia_global=self.var_referencia_global.get(),
+                    objetivo_robusto="max" if self.var_objetivo_robusto.get() else None,
+                    portfolio=self.var_portfolio.get(),
+                    prazo=prazo,
+                    corrida=self.var_corrida.get()
                 )
                 
                 # Finalizar
@@ -565,6 +685,8 @@ class PIDResultsGUI:
                 command=self.plot_ranking_estatistico).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_controles, text="🔬 Pós-teste Nemenyi", 
                 command=self.executar_posthoc_nemenyi).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_controles, text="🎯 Frente de Pareto", 
+                command=self.plot_frente_pareto).pack(side=tk.LEFT, padx=5)
         
         # Frame do meio - Resultados textuais
         frame_resultados = ttk.LabelFrame(self.aba_estatistica, text="Resultados do Teste", padding=10)
@@ -830,6 +952,48 @@ class PIDResultsGUI:
         plt.tight_layout()
         plt.show()
 
+    def plot_frente_pareto(self):
+        """Mostra o resumo e as projeções da última frente de Pareto (NSGA-II)."""
+        analise = analise_frente_pareto(self.db_name)
+        
+        self.texto_estatistica.delete(1.0, tk.END)
+        self.texto_estatistica.insert(tk.END, resumo_frente_pareto(self.db_name))
+        
+        if analise is None:
+            messagebox.showinfo("Info", "Nenhuma frente de Pareto encontrada!")
+            return
+        
+        plt.close('all')
+        
+        objetivos = analise['objetivos']
+        nomes = ['MSE', 'Overshoot (%)', 'Margem de Fase (°)']
+        pares = [(0, 1), (0, 2), (1, 2)]
+        destaques = [('Menor MSE', analise['extremos']['mse'], '#e74c3c', 'o'),
+                     ('Menor overshoot', analise['extremos']['overshoot'], '#3498db', 's'),
+                     ('Maior MF', analise['extremos']['margem_fase'], '#9b59b6', '^'),
+                     ('Compromisso', analise['compromisso'], '#f39c12', '*')]
+        
+        fig, eixos = plt.subplots(1, 3, figsize=(16, 5))
+        
+        for ax, (i, j) in zip(eixos, pares):
+            ordem = np.argsort(objetivos[:, i])
+            ax.plot(objetivos[ordem, i], objetivos[ordem, j], color='gray', alpha=0.4, linewidth=1)
+            ax.scatter(objetivos[:, i], objetivos[:, j], c='#16a085', s=30, alpha=0.8, edgecolors='white')
+            for rotulo, idx, cor, marcador in destaques:
+                ax.scatter(objetivos[idx, i], objetivos[idx, j], c=cor, marker=marcador, s=160,
+                           edgecolors='black', label=rotulo, zorder=3)
+            ax.set_xlabel(nomes[i], fontweight='bold')
+            ax.set_ylabel(nomes[j], fontweight='bold')
+            if i == 0:
+                ax.set_xscale('log')
+            ax.grid(True, alpha=0.3, linestyle='--')
+        
+        eixos[0].legend(loc='best', fontsize=9)
+        fig.suptitle(f'Frente de Pareto — {analise["metodo"]} (execução {analise["execucao"]}, '
+                     f'{analise["n_pontos"]} soluções)', fontweight='bold', fontsize=14)
+        plt.tight_layout()
+        plt.show()
+
     def setup_aba_graficos(self):
         """Configura aba de gráficos avançados."""
         
@@ -874,6 +1038,100 @@ class PIDResultsGUI:
         texto_widget.config(state=tk.DISABLED)
         texto_widget.pack(fill=tk.BOTH, expand=True)
     
+    def setup_aba_paisagem(self):
+        """Configura aba da paisagem de custo (fatias Kp × Ki com Kd fixo)."""
+        
+        frame_controles = ttk.LabelFrame(self.aba_paisagem, text="Fatia Kp × Ki", padding=10)
+        frame_controles.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(frame_controles, text="Kd:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+        self.entry_paisagem_kd = ttk.Entry(frame_controles, width=8)
+        self.entry_paisagem_kd.insert(0, "5.0")
+        self.entry_paisagem_kd.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(frame_controles, text="Resolução:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+        self.entry_paisagem_resolucao = ttk.Entry(frame_controles, width=6)
+        self.entry_paisagem_resolucao.insert(0, "200")
+        self.entry_paisagem_resolucao.pack(side=tk.LEFT, padx=5)
+        
+        self.var_paisagem_trajetorias = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame_controles, text="Sobrepor trajetórias (última execução)", 
+                        variable=self.var_paisagem_trajetorias).pack(side=tk.LEFT, padx=10)
+        
+        ttk.Button(frame_controles, text="🗺️ Mostrar Paisagem", 
+                   command=self.plot_paisagem).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_controles, text="🔄 Recalcular", 
+                   command=lambda: self.plot_paisagem(recalcular=True)).pack(side=tk.LEFT, padx=5)
+        
+        self.label_paisagem = ttk.Label(self.aba_paisagem, text="Planta e grade da aba de configuração; "
+                                        "fatias já calculadas vêm do cache em disco", foreground="gray")
+        self.label_paisagem.pack(anchor=tk.W, padx=15)
+        
+        self.frame_grafico_paisagem = ttk.LabelFrame(self.aba_paisagem, text="log10(MSE)", padding=5)
+        self.frame_grafico_paisagem.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    
+    def plot_paisagem(self, recalcular=False):
+        """Mapa de calor do MSE no plano Kp × Ki, com as trajetórias dos métodos."""
+        try:
+            k_term = float(self.entry_k_term.get())
+            tau = float(self.entry_tau.get())
+            setpoint = float(self.entry_setpoint.get())
+            t_final = float(self.entry_tempo_final.get())
+            n_pontos = int(self.entry_pontos.get())
+            kd = float(self.entry_paisagem_kd.get())
+            resolucao = int(self.entry_paisagem_resolucao.get())
+            
+            self.label_paisagem.config(text="Calculando fatia..." if recalcular else "Carregando fatia...")
+            self.root.update_idletasks()
+            fatia = paisagem(k_term, tau, setpoint, t_final, n_pontos, kd, resolucao=resolucao,
+                             recalcular=recalcular)
+            
+            for widget in self.frame_grafico_paisagem.winfo_children():
+                widget.destroy()
+            
+            fig, ax = plt.subplots(figsize=(9, 6), dpi=80)
+            mse = fatia['mse']
+            imagem = ax.pcolormesh(fatia['kp'], fatia['ki'], np.log10(np.maximum(mse, 1e-12)),
+                                   cmap='viridis', shading='auto')
+            fig.colorbar(imagem, ax=ax, label='log10(MSE)')
+            
+            i, j = np.unravel_index(np.argmin(mse), mse.shape)
+            ax.plot(fatia['kp'][j], fatia['ki'][i], marker='*', color='white', markersize=16,
+                    markeredgecolor='black', linestyle='none', label=f'Mínimo da fatia ({mse[i, j]:.4f})')
+            
+            if self.var_paisagem_trajetorias.get():
+                cores = {
+                    'PSO': '#e74c3c', 'GA': '#2ecc71',
+                    'DE': '#9b59b6', 'CMA-ES': '#f39c12', 'GP-EI': '#34495e',
+                    'NSGA-II': '#16a085', 'PORTFOLIO': '#7f8c8d'
+                }
+                markers = {'PSO': 'o', 'GA': 's', 'DE': '^', 'CMA-ES': 'D', 'GP-EI': 'v', 'NSGA-II': 'P', 'PORTFOLIO': '*'}
+                for metodo, execucoes in trajetorias(db_path=self.db_name).items():
+                    caminho = execucoes[-1]
+                    ax.plot(caminho[:, 0], caminho[:, 1], color=cores.get(metodo, 'gray'),
+                            marker=markers.get(metodo, 'o'), markersize=4, linewidth=1.5,
+                            alpha=0.9, label=f'{metodo} (Kd final {caminho[-1, 2]:.3f})')
+                    ax.plot(caminho[-1, 0], caminho[-1, 1], color=cores.get(metodo, 'gray'),
+                            marker=markers.get(metodo, 'o'), markersize=10, markeredgecolor='white')
+            
+            ax.set_xlim(fatia['kp'][0], fatia['kp'][-1])
+            ax.set_ylim(fatia['ki'][0], fatia['ki'][-1])
+            ax.set_xlabel('Kp', fontweight='bold')
+            ax.set_ylabel('Ki', fontweight='bold')
+            ax.set_title(f'Paisagem de custo — Kd = {kd:g}', fontweight='bold')
+            ax.legend(loc='upper right', fontsize=8, framealpha=0.9)
+            plt.tight_layout()
+            
+            canvas = FigureCanvasTkAgg(fig, master=self.frame_grafico_paisagem)
+            canvas.draw()
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            
+            self.label_paisagem.config(text=f"Fatia {resolucao}×{resolucao} ({fatia['origem']}) | "
+                                            f"Trajetórias projetadas no plano Kp × Ki")
+            
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao gerar paisagem de custo: {e}")
+    
     def carregar_dados(self, plotar_grafico=None):
         """Carrega dados do banco e atualiza interface."""
         try:
@@ -1292,7 +1550,8 @@ class PIDResultsGUI:
             
             cores = {
                 'ZN1': '#1f77b4', 'CC': '#ff7f0e', 'GA': '#2ca02c',
-                'PSO': '#d62728', 'DE': '#9467bd', 'CMA-ES': '#8c564b'
+                'PSO': '#d62728', 'DE': '#9467bd', 'CMA-ES': '#8c564b',
+                'GP-EI': '#7f7f7f', 'NSGA-II': '#17becf', 'PORTFOLIO': '#000000'
             }
             
             t = np.linspace(0, t_max, 1000)
@@ -1545,7 +1804,8 @@ class PIDResultsGUI:
             
             CORES = {
                 'ZN1': '#1f77b4', 'CC': '#ff7f0e', 'GA': '#2ca02c',
-                'PSO': '#d62728', 'DE': '#9467bd', 'CMA-ES': '#8c564b'
+                'PSO': '#d62728', 'DE': '#9467bd', 'CMA-ES': '#8c564b',
+                'GP-EI': '#7f7f7f', 'NSGA-II': '#17becf', 'PORTFOLIO': '#000000'
             }
             
             Kterm = getattr(self, 'k_term_atual', 59.81)
@@ -1656,7 +1916,8 @@ class PIDResultsGUI:
             
             cores = {
                 'CC': 'blue', 'CMA-ES': 'orange', 'DE': 'green',
-                'GA': 'cyan', 'PSO': 'red', 'ZN1': 'purple'
+                'GA': 'cyan', 'PSO': 'red', 'ZN1': 'purple', 'GP-EI': 'black',
+                'NSGA-II': 'teal', 'PORTFOLIO': 'brown'
             }
             
             plant = ctl.tf([Kterm], [tau, 1])
@@ -1762,17 +2023,18 @@ class PIDResultsGUI:
             
             cores = {
                 'PSO': '#e74c3c', 'GA': '#2ecc71',
-                'DE': '#9b59b6', 'CMA-ES': '#f39c12'
+                'DE': '#9b59b6', 'CMA-ES': '#f39c12', 'GP-EI': '#34495e',
+                'NSGA-II': '#16a085', 'PORTFOLIO': '#7f8c8d'
             }
             
-            markers = {'PSO': 'o', 'GA': 's', 'DE': '^', 'CMA-ES': 'D'}
+            markers = {'PSO': 'o', 'GA': 's', 'DE': '^', 'CMA-ES': 'D', 'GP-EI': 'v', 'NSGA-II': 'P', 'PORTFOLIO': '*'}
             
             # SUBPLOT 1: Convergência (Melhor Fitness)
             for metodo in metodos:
                 cursor.execute("""
                     SELECT geracao, melhor_fitness
                     FROM historico_evolutivo
-                    WHERE metodo = ?
+                    WHERE metodo = ? AND ilha IS NULL
                     ORDER BY geracao
                 """, (metodo,))
                 
@@ -1801,7 +2063,7 @@ class PIDResultsGUI:
                 cursor.execute("""
                     SELECT geracao, fitness_medio
                     FROM historico_evolutivo
-                    WHERE metodo = ?
+                    WHERE metodo = ? AND ilha IS NULL
                     ORDER BY geracao
                 """, (metodo,))
                 
@@ -1846,7 +2108,9 @@ class PIDResultsGUI:
             msg += "Tabelas afetadas:\n"
             msg += "  • resultados\n"
             msg += "  • robustez\n"
-            msg += "  • historico_evolutivo\n\n"
+            msg += "  • historico_evolutivo\n"
+            msg += "  • frente_pareto\n"
+            msg += "  • campanhas e checkpoints\n\n"
             msg += "Esta ação NÃO pode ser desfeita!\n\n"
             msg += "Deseja continuar?"
             
@@ -1866,6 +2130,10 @@ class PIDResultsGUI:
             cursor.execute("DELETE FROM resultados")
             cursor.execute("DELETE FROM robustez")
             cursor.execute("DELETE FROM historico_evolutivo")
+            cursor.execute("DELETE FROM frente_pareto")
+            cursor.execute("DELETE FROM campanhas")
+            cursor.execute("DELETE FROM campanha_etapas")
+            cursor.execute("DELETE FROM checkpoints_geracao")
             
             conn.commit()
             
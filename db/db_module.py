@@ -1,6 +1,9 @@
 # pylint: disable="C0114, C0103, C0301"
 
 import os
+import copy
+import json
+import pickle
 import sqlite3
 import numpy as np
 from datetime import datetime
@@ -12,6 +15,7 @@ def init_database(db_path="db/pid_results.db"):
     
     if os.path.exists(db_path):
         print(f"Banco '{db_path}' já existe")
+        atualizar_esquema(db_path)
         return False
     
     conn = sqlite3.connect(db_path)
@@ -30,7 +34,13 @@ def init_database(db_path="db/pid_results.db"):
             overshoot REAL,
             tempo_acomodacao REAL,
             margem_ganho REAL,
-            margem_fase REAL
+            margem_fase REAL,
+            semente_entropia TEXT,
+            semente_chave TEXT,
+            k_term REAL,
+            tau REAL,
+            setpoint REAL,
+            campanha_id INTEGER
         )
     """)
     
@@ -43,7 +53,11 @@ def init_database(db_path="db/pid_results.db"):
             geracao INTEGER,
             melhor_fitness REAL,
             fitness_medio REAL,
-            pior_fitness REAL
+            pior_fitness REAL,
+            ilha INTEGER,
+            melhor_kp REAL,
+            melhor_ki REAL,
+            melhor_kd REAL
         )
     """)
     
@@ -64,6 +78,12 @@ def init_database(db_path="db/pid_results.db"):
         )
     """)
     
+    _criar_tabelas_campanha(cursor)
+    _criar_tabela_cache_adimensional(cursor)
+    _criar_tabela_otimo_global(cursor)
+    _criar_tabela_frente_pareto(cursor)
+    _criar_versao_dados(cursor)
+    
     conn.commit()
     conn.close()
     print(f"✓ Banco '{db_path}' criado com sucesso")
@@ -71,6 +91,226 @@ def init_database(db_path="db/pid_results.db"):
     return True
 
 
+def _criar_tabelas_campanha(cursor):
+    """Tabelas de checkpoint para retomar execuções interrompidas."""
+    
+    # Uma linha por chamada de executar_sintonia
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS campanhas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_hora TEXT,
+            parametros TEXT,
+            semente_entropia TEXT,
+            status TEXT
+        )
+    """)
+    
+    # Etapas concluídas: ('sintonia', método, iteração) e ('robustez', método, 0)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS campanha_etapas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            campanha_id INTEGER,
+            etapa TEXT,
+            metodo TEXT,
+            iteracao INTEGER,
+            Kp REAL,
+            Ki REAL,
+            Kd REAL,
+            data_hora TEXT
+        )
+    """)
+    
+    # Estado serializado do otimizador (inclui o gerador aleatório)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS checkpoints_geracao (
+            campanha_id INTEGER,
+            metodo TEXT,
+            iteracao INTEGER,
+            geracao INTEGER,
+            estado BLOB,
+            data_hora TEXT,
+            PRIMARY KEY (campanha_id, metodo, iteracao)
+        )
+    """)
+
+
+def _criar_tabela_cache_adimensional(cursor):
+    """Ganhos adimensionais sintonizados por configuração (ver adimensional_module)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_adimensional (
+            metodo TEXT,
+            razao_tempo REAL,
+            n_pontos INTEGER,
+            fator_limites REAL,
+            kp REAL,
+            ki REAL,
+            kd REAL,
+            mse REAL,
+            avaliacoes INTEGER,
+            data_hora TEXT,
+            PRIMARY KEY (metodo, razao_tempo, n_pontos, fator_limites)
+        )
+    """)
+
+
+def _criar_tabela_otimo_global(cursor):
+    """Ótimo de referência por planta e configuração (ver grid_module)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS otimo_global (
+            k_term REAL,
+            tau REAL,
+            setpoint REAL,
+            t_final REAL,
+            n_pontos INTEGER,
+            limites TEXT,
+            Kp REAL,
+            Ki REAL,
+            Kd REAL,
+            mse REAL,
+            avaliacoes INTEGER,
+            tempo REAL,
+            data_hora TEXT,
+            PRIMARY KEY (k_term, tau, setpoint, t_final, n_pontos, limites)
+        )
+    """)
+
+
+def _criar_tabela_frente_pareto(cursor):
+    """Frentes de Pareto dos tuners multiobjetivo, uma `execucao` por sintonia."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS frente_pareto (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execucao INTEGER,
+            data_hora TEXT,
+            metodo TEXT,
+            Kp REAL,
+            Ki REAL,
+            Kd REAL,
+            mse REAL,
+            overshoot REAL,
+            margem_fase REAL
+        )
+    """)
+
+
+# Tabelas cujas alterações invalidam as análises em cache
+TABELAS_VERSIONADAS = ("resultados", "robustez")
+
+
+def _criar_versao_dados(cursor):
+    """
+    Contador de alterações por tabela, mantido por triggers.
+    
+    Cada INSERT, UPDATE ou DELETE em uma tabela versionada incrementa sua
+    versão. A linha 'banco' recebe um valor aleatório na criação, para que
+    um banco recriado no mesmo caminho não reaproveite o cache do anterior.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versao_dados (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO versao_dados (tabela, versao) VALUES ('banco', abs(random()))")
+    for tabela in TABELAS_VERSIONADAS:
+        cursor.execute("INSERT OR IGNORE INTO versao_dados (tabela, versao) VALUES (?, 0)", (tabela,))
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS versao_{tabela}_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versao_dados SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            """)
+
+
+def buscar_versao_dados(tabelas=TABELAS_VERSIONADAS, db_path="db/pid_results.db"):
+    """
+    Versão atual dos dados (identificador do banco + contador de cada
+    tabela), ou None em bancos sem a tabela versao_dados.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT tabela, versao FROM versao_dados")
+        versoes = dict(cursor.fetchall())
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    if 'banco' not in versoes or any(t not in versoes for t in tabelas):
+        return None
+    return (versoes['banco'],) + tuple(versoes[t] for t in tabelas)
+
+
+_CACHE_ANALISES = {}
+
+
+def em_cache_versionado(chave, calcular, tabelas=TABELAS_VERSIONADAS, db_path="db/pid_results.db"):
+    """
+    Resultado de `calcular()` em cache até que os dados de `tabelas` mudem.
+    
+    O cache é por processo, indexado pelo caminho do banco e por `chave`, e
+    guarda a versão dos dados do momento do cálculo; chamadas seguintes
+    com a mesma versão devolvem uma cópia do valor guardado sem consultar
+    mais nada além do contador. Bancos sem versao_dados não usam cache.
+    """
+    versao = buscar_versao_dados(tabelas, db_path)
+    if versao is None:
+        return calcular()
+    
+    indice = (os.path.abspath(db_path), chave)
+    guardado = _CACHE_ANALISES.get(indice)
+    if guardado is not None and guardado[0] == versao:
+        return copy.deepcopy(guardado[1])
+    
+    valor = calcular()
+    _CACHE_ANALISES[indice] = (versao, copy.deepcopy(valor))
+    return valor
+
+
+def _adicionar_coluna(cursor, tabela, coluna, tipo):
+    """Adiciona uma coluna à tabela se ela ainda não existir."""
+    cursor.execute(f"PRAGMA table_info({tabela})")
+    if coluna not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+        print(f"✓ Coluna '{coluna}' adicionada à tabela '{tabela}'")
+
+
+def atualizar_esquema(db_path="db/pid_results.db"):
+    """Atualiza bancos criados por versões anteriores para o esquema atual."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # Histórico por ilha do GA em modelo de ilhas (NULL = população única)
+    _adicionar_coluna(cursor, "historico_evolutivo", "ilha", "INTEGER")
+    
+    # Ganhos do melhor indivíduo de cada geração (trajetórias na paisagem de custo)
+    for coluna in ("melhor_kp", "melhor_ki", "melhor_kd"):
+        _adicionar_coluna(cursor, "historico_evolutivo", coluna, "REAL")
+    
+    # Semente de cada execução (SeedSequence: entropia raiz + chave do fluxo filho)
+    _adicionar_coluna(cursor, "resultados", "semente_entropia", "TEXT")
+    _adicionar_coluna(cursor, "resultados", "semente_chave", "TEXT")
+    
+    # Planta e referência de cada resultado (consulta de warm start)
+    _adicionar_coluna(cursor, "resultados", "k_term", "REAL")
+    _adicionar_coluna(cursor, "resultados", "tau", "REAL")
+    _adicionar_coluna(cursor, "resultados", "setpoint", "REAL")
+    
+    # Campanha de origem (grade de tempo e limites do resultado)
+    _adicionar_coluna(cursor, "resultados", "campanha_id", "INTEGER")
+    
+    _criar_tabelas_campanha(cursor)
+    _criar_tabela_cache_adimensional(cursor)
+    _criar_tabela_otimo_global(cursor)
+    _criar_tabela_frente_pareto(cursor)
+    _criar_versao_dados(cursor)
+    
+    conn.commit()
+    conn.close()
+
+
 def calcular_metricas(t, y, setpoint=1.0):
     """Calcula apenas as métricas essenciais."""
     
@@ -93,6 +333,33 @@ def calcular_metricas(t, y, setpoint=1.0):
     }
 
 
+def calcular_metricas_lote(t, Y, setpoint=1.0):
+    """
+    Versão vetorizada de calcular_metricas para respostas (B, N).
+
+    Aceita Y em float32; as médias são acumuladas em float64.
+    """
+    
+    erro = Y - Y.dtype.type(setpoint)
+    
+    # MSE
+    mse = np.einsum('bn,bn->b', erro, erro, dtype=np.float64) / Y.shape[1]
+    
+    # Overshoot (%)
+    pico = np.max(Y, axis=1).astype(np.float64)
+    overshoot = np.maximum(0, ((pico - setpoint) / setpoint) * 100)
+    
+    # Tempo de acomodação (2%)
+    dentro = np.abs(erro) <= 0.02 * setpoint
+    tempo_acomodacao = np.where(dentro.any(axis=1), t[np.argmax(dentro, axis=1)], t[-1])
+    
+    return {
+        'mse': mse,
+        'overshoot': overshoot,
+        'tempo_acomodacao': tempo_acomodacao
+    }
+
+
 def calcular_robustez(Kp, Ki, Kd, plant):
     """
     Calcula métricas de robustez (margens de ganho e fase).
@@ -133,8 +400,19 @@ def calcular_robustez(Kp, Ki, Kd, plant):
         }
 
 
-def salvar_resultado(metodo, Kp, Ki, Kd, t, y, setpoint, plant, db_name="pid_results.db"):
-    """Salva resultado no banco com métricas de desempenho e robustez."""
+def salvar_resultado(metodo, Kp, Ki, Kd, t, y, setpoint, plant, db_name="pid_results.db",
+                     semente=None, k_term=None, tau=None, conn=None, campanha_id=None):
+    """
+    Salva resultado no banco com métricas de desempenho e robustez.
+    
+    `semente` é o par (entropia, chave) da SeedSequence usada pelo método,
+    que permite repetir exatamente a execução. `k_term` e `tau` identificam
+    a planta para consultas de warm start e `campanha_id` a campanha que o
+    gerou (grade de tempo e limites). Com `conn`, a inserção usa essa
+    conexão e o commit fica a cargo de quem chama (mesma transação de
+    registrar_etapa).
+    """
+    entropia, chave = semente if semente is not None else (None, None)
     
     # Calcula métricas de desempenho
     metricas = calcular_metricas(t, y, setpoint)
@@ -143,14 +421,17 @@ def salvar_resultado(metodo, Kp, Ki, Kd, t, y, setpoint, plant, db_name="pid_res
     robustez = calcular_robustez(Kp, Ki, Kd, plant)
     
     # Salva no banco
-    conn = sqlite3.connect(db_name)
+    propria = conn is None
+    if propria:
+        conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
     
     cursor.execute("""
         INSERT INTO resultados 
         (data_hora, metodo, Kp, Ki, Kd, mse, overshoot, tempo_acomodacao, 
-         margem_ganho, margem_fase)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+         margem_ganho, margem_fase, semente_entropia, semente_chave,
+         k_term, tau, setpoint, campanha_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         metodo,
@@ -159,11 +440,18 @@ def salvar_resultado(metodo, Kp, Ki, Kd, t, y, setpoint, plant, db_name="pid_res
         metricas['overshoot'],
         metricas['tempo_acomodacao'],
         robustez['margem_ganho'],
-        robustez['margem_fase']
+        robustez['margem_fase'],
+        entropia,
+        chave,
+        k_term,
+        tau,
+        setpoint,
+        campanha_id
     ))
     
-    conn.commit()
-    conn.close()
+    if propria:
+        conn.commit()
+        conn.close()
     
     # Imprime resumo
     print(f"\n✓ Resultado salvo:")
@@ -253,24 +541,39 @@ def comparar_metodos(db_name="pid_results.db"):
         print("  Dados de robustez não disponíveis")
 
 
-def salvar_historico_evolutivo(metodo, geracao, melhor_fitness, fitness_medio, pior_fitness, db_path="db/pid_results.db"):
-    """Salva histórico de uma geração no banco de dados."""
+def salvar_historico_evolutivo(metodo, geracao, melhor_fitness, fitness_medio, pior_fitness, db_path="db/pid_results.db",
+                               ilha=None, ganhos=None):
+    """
+    Salva histórico de uma geração no banco de dados.
+    
+    `ilha` identifica a subpopulação no GA em modelo de ilhas; as linhas
+    sem ilha (NULL) são o histórico consolidado do método. `ganhos` são os
+    (Kp, Ki, Kd) do melhor indivíduo até a geração, quando disponíveis.
+    """
     try:
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO historico_evolutivo 
-            (data_hora, metodo, geracao, melhor_fitness, fitness_medio, pior_fitness)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
+        colunas = "data_hora, metodo, geracao, melhor_fitness, fitness_medio, pior_fitness"
+        valores = [
             datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             metodo,
             geracao,
-            melhor_fitness,
-            fitness_medio,
-            pior_fitness
-        ))
+            float(melhor_fitness),
+            float(fitness_medio),
+            float(pior_fitness)
+        ]
+        if ilha is not None:
+            colunas += ", ilha"
+            valores.append(int(ilha))
+        if ganhos is not None:
+            colunas += ", melhor_kp, melhor_ki, melhor_kd"
+            valores += [float(g) for g in ganhos]
+        
+        cursor.execute(f"""
+            INSERT INTO historico_evolutivo ({colunas})
+            VALUES ({", ".join("?" * len(valores))})
+        """, valores)
         
         conn.commit()
         conn.close()
@@ -278,20 +581,14 @@ def salvar_historico_evolutivo(metodo, geracao, melhor_fitness, fitness_medio, p
         print(f"Erro ao salvar histórico: {e}")
 
 
-def testar_robustez(metodo, Kp, Ki, Kd, t_sim, k_term, tau, setpoint=80.0, db_path="db/pid_results.db"):
+def cenarios_robustez(k_term, tau):
     """
-    Testa robustez de um controlador PID em múltiplos cenários.
+    Cenários de variação paramétrica (±10% em K_term e τ) da planta nominal.
     
-    Parâmetros:
-        metodo: Nome do método
-        Kp, Ki, Kd: Parâmetros PID sintonizados
-        t_sim: Vetor de tempo
-        setpoint: Valor de referência
-        db_path: Caminho do banco de dados
+    Returns:
+        dict {cenário: {"K_term", "tau", "desc"}}, com "Nominal" primeiro
     """
-    from model.model import model, simulate
-    
-    CENARIOS_ROBUSTEZ = {
+    return {
         "Nominal": {"K_term": k_term, "tau": tau, "desc": "Condições nominais"},
         "C1": {"K_term": k_term - (0.1 * k_term), "tau": tau, "desc": "Degradação aquecedor (-10%)"},
         "C2": {"K_term": k_term + (0.1 * k_term), "tau": tau, "desc": "Aquecedor eficiente (+10%)"},
@@ -303,13 +600,33 @@ def testar_robustez(metodo, Kp, Ki, Kd, t_sim, k_term, tau, setpoint=80.0, db_pa
         "C8": {"K_term": k_term + (0.1 * k_term), "tau": tau - (0.1 * tau), "desc": "Aquecedor eficiente e menor capacidade térmica"},
     }
 
+
+def testar_robustez(metodo, Kp, Ki, Kd, t_sim, k_term, tau, setpoint=80.0, db_path="db/pid_results.db",
+                    conn=None):
+    """
+    Testa robustez de um controlador PID em múltiplos cenários.
+    
+    Parâmetros:
+        metodo: Nome do método
+        Kp, Ki, Kd: Parâmetros PID sintonizados
+        t_sim: Vetor de tempo
+        setpoint: Valor de referência
+        db_path: Caminho do banco de dados
+        conn: Conexão opcional; se informada, o commit fica a cargo de quem chama
+    """
+    from model.model import model, simulate
+    
+    CENARIOS_ROBUSTEZ = cenarios_robustez(k_term, tau)
+
     print(f"\n{'='*70}")
     print(f"TESTE DE ROBUSTEZ: {metodo}")
     print(f"{'='*70}")
     print(f"{'Cenário':<10} {'MSE':<12} {'Variação':<12} {'Overshoot':<12}")
     print(f"{'-'*70}")
     
-    conn = sqlite3.connect(db_path)
+    propria = conn is None
+    if propria:
+        conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     mse_nominal = None
@@ -355,8 +672,9 @@ def testar_robustez(metodo, Kp, Ki, Kd, t_sim, k_term, tau, setpoint=80.0, db_pa
         var_str = f"{variacao:+.2f}%" if cenario != "Nominal" else "---"
         print(f"{cenario:<10} {mse:<12.6f} {var_str:<12} {metricas['overshoot']:<12.2f}")
     
-    conn.commit()
-    conn.close()
+    if propria:
+        conn.commit()
+        conn.close()
     
     # Análise
     variacoes = [r[2] for r in resultados if r[0] != "Nominal"]
@@ -377,23 +695,38 @@ def testar_robustez(metodo, Kp, Ki, Kd, t_sim, k_term, tau, setpoint=80.0, db_pa
         print("✗ Robustez BAIXA (> 30%)")
 
 
-def comparar_robustez(db_path="db/pid_results.db"):
-    """Compara robustez entre métodos testados."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+def resumo_robustez(db_path="db/pid_results.db"):
+    """
+    Variação média e máxima do MSE de cada método nos cenários de
+    robustez, em cache até que novos testes sejam gravados.
     
-    cursor.execute("""
-        SELECT metodo, 
-               AVG(ABS(variacao_mse)) as var_media,
-               MAX(ABS(variacao_mse)) as var_max
-        FROM robustez
-        WHERE cenario != 'Nominal'
-        GROUP BY metodo
-        ORDER BY var_media ASC
-    """)
+    Returns:
+        lista de (metodo, var_media, var_max), do mais ao menos robusto
+    """
+    def calcular():
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT metodo, 
+                   AVG(ABS(variacao_mse)) as var_media,
+                   MAX(ABS(variacao_mse)) as var_max
+            FROM robustez
+            WHERE cenario != 'Nominal'
+            GROUP BY metodo
+            ORDER BY var_media ASC
+        """)
+        
+        resultados = cursor.fetchall()
+        conn.close()
+        return resultados
     
-    resultados = cursor.fetchall()
-    conn.close()
+    return em_cache_versionado("resumo_robustez", calcular, ("robustez",), db_path)
+
+
+def comparar_robustez(db_path="db/pid_results.db"):
+    """Compara robustez entre métodos testados."""
+    resultados = resumo_robustez(db_path)
     
     if not resultados:
         print("\n⚠ Nenhum teste de robustez encontrado!")
@@ -411,4 +744,371 @@ def comparar_robustez(db_path="db/pid_results.db"):
     
     print(f"{'='*70}")
     print(f"\n✓ Método MAIS ROBUSTO: {resultados[0][0]}")
-    print(f"  Variação média: {resultados[0][1]:.2f}%")
\ No newline at end of file
+    print(f"  Variação média: {resultados[0][1]:.2f}%")
+
+
+def criar_campanha(parametros, semente_entropia, db_path="db/pid_results.db"):
+    """Registra uma nova campanha de sintonia e retorna seu id."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO campanhas (data_hora, parametros, semente_entropia, status)
+        VALUES (?, ?, ?, 'em_andamento')
+    """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+          json.dumps(parametros, sort_keys=True), str(semente_entropia)))
+    campanha_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    return campanha_id
+
+
+def buscar_campanha(parametros=None, campanha_id=None, db_path="db/pid_results.db"):
+    """
+    Busca uma campanha em andamento: pelo id ou, se omitido, a mais recente
+    com exatamente os mesmos parâmetros.
+    
+    Returns:
+        (campanha_id, semente_entropia) ou None
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if campanha_id is not None:
+        cursor.execute("""
+            SELECT id, semente_entropia FROM campanhas
+            WHERE id = ? AND status = 'em_andamento'
+        """, (campanha_id,))
+    else:
+        cursor.execute("""
+            SELECT id, semente_entropia FROM campanhas
+            WHERE parametros = ? AND status = 'em_andamento'
+            ORDER BY id DESC LIMIT 1
+        """, (json.dumps(parametros, sort_keys=True),))
+    linha = cursor.fetchone()
+    conn.close()
+    return linha
+
+
+def finalizar_campanha(campanha_id, db_path="db/pid_results.db"):
+    """Marca a campanha como concluída e descarta checkpoints restantes."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("UPDATE campanhas SET status = 'concluida' WHERE id = ?", (campanha_id,))
+    cursor.execute("DELETE FROM checkpoints_geracao WHERE campanha_id = ?", (campanha_id,))
+    conn.commit()
+    conn.close()
+
+
+def registrar_etapa(campanha_id, etapa, metodo, iteracao, ganhos=(None, None, None),
+                    db_path="db/pid_results.db", conn=None):
+    """
+    Registra uma etapa concluída da campanha e remove o checkpoint de
+    geração correspondente na mesma transação.
+    
+    Com `conn`, usa a transação de quem chama (que faz o commit), para que
+    o resultado da etapa e seu registro sejam gravados juntos.
+    """
+    propria = conn is None
+    if propria:
+        conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    Kp, Ki, Kd = (None if g is None else float(g) for g in ganhos)
+    cursor.execute("""
+        INSERT INTO campanha_etapas (campanha_id, etapa, metodo, iteracao, Kp, Ki, Kd, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (campanha_id, etapa, metodo, iteracao, Kp, Ki, Kd,
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    cursor.execute("""
+        DELETE FROM checkpoints_geracao WHERE campanha_id = ? AND metodo = ? AND iteracao = ?
+    """, (campanha_id, metodo, iteracao))
+    if propria:
+        conn.commit()
+        conn.close()
+
+
+def carregar_etapas(campanha_id, db_path="db/pid_results.db"):
+    """
+    Etapas já concluídas de uma campanha.
+    
+    Returns:
+        dict {(etapa, metodo, iteracao): (Kp, Ki, Kd)} em ordem de conclusão
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT etapa, metodo, iteracao, Kp, Ki, Kd FROM campanha_etapas
+        WHERE campanha_id = ? ORDER BY id
+    """, (campanha_id,))
+    etapas = {(e, m, i): (kp, ki, kd) for e, m, i, kp, ki, kd in cursor.fetchall()}
+    conn.close()
+    return etapas
+
+
+def salvar_checkpoint_geracao(campanha_id, metodo, iteracao, geracao, estado,
+                              db_path="db/pid_results.db"):
+    """Grava (substituindo) o estado serializado de uma otimização em curso."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT OR REPLACE INTO checkpoints_geracao
+        (campanha_id, metodo, iteracao, geracao, estado, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (campanha_id, metodo, iteracao, geracao,
+          sqlite3.Binary(pickle.dumps(estado, protocol=pickle.HIGHEST_PROTOCOL)),
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+
+def carregar_checkpoint_geracao(campanha_id, metodo, iteracao, db_path="db/pid_results.db"):
+    """
+    Estado salvo de uma otimização interrompida.
+    
+    Returns:
+        (geracao, estado) ou None
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT geracao, estado FROM checkpoints_geracao
+        WHERE campanha_id = ? AND metodo = ? AND iteracao = ?
+    """, (campanha_id, metodo, iteracao))
+    linha = cursor.fetchone()
+    conn.close()
+    if linha is None:
+        return None
+    return linha[0], pickle.loads(linha[1])
+
+
+def buscar_ganhos_anteriores(k_term, tau, db_path="db/pid_results.db", n=5,
+                             distancia_maxima=0.5):
+    """
+    Melhores ganhos já sintonizados para a planta mais próxima de (k_term, tau).
+    
+    A distância entre plantas é euclidiana em (ln K, ln τ). Os resultados da
+    planta mais próxima (dentro de `distancia_maxima`) são ordenados pelo
+    MSE normalizado pelo setpoint², que não depende da referência usada.
+    
+    Returns:
+        dict com 'ganhos' (array (m, 3)), 'k_term', 'tau' e 'distancia',
+        ou None se não houver resultado utilizável
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT Kp, Ki, Kd, mse / (setpoint * setpoint), k_term, tau
+        FROM resultados
+        WHERE k_term > 0 AND tau > 0 AND setpoint != 0 AND mse IS NOT NULL
+    """)
+    linhas = cursor.fetchall()
+    conn.close()
+    
+    if not linhas:
+        return None
+    
+    dados = np.array(linhas, dtype=float)
+    distancias = np.hypot(np.log(dados[:, 4] / k_term), np.log(dados[:, 5] / tau))
+    d_min = np.min(distancias)
+    if d_min > distancia_maxima:
+        return None
+    
+    # Todos os resultados da planta mais próxima, do menor para o maior MSE
+    planta = dados[np.isclose(distancias, d_min)]
+    planta = planta[np.argsort(planta[:, 3])][:n]
+    return {
+        'ganhos': planta[:, :3].copy(),
+        'k_term': float(planta[0, 4]),
+        'tau': float(planta[0, 5]),
+        'distancia': float(d_min)
+    }
+
+
+def salvar_cache_adimensional(metodo, razao_tempo, n_pontos, fator_limites, ganhos, mse, avaliacoes,
+                              db_path="db/pid_results.db"):
+    """Grava (substituindo) os ganhos adimensionais de uma configuração."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    kp, ki, kd = (float(g) for g in ganhos)
+    cursor.execute("""
+        INSERT OR REPLACE INTO cache_adimensional
+        (metodo, razao_tempo, n_pontos, fator_limites, kp, ki, kd, mse, avaliacoes, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (metodo, float(razao_tempo), int(n_pontos), float(fator_limites), kp, ki, kd,
+          float(mse), int(avaliacoes), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+
+def buscar_cache_adimensional(metodo, razao_tempo, n_pontos, fator_limites, tolerancia=0.0,
+                              db_path="db/pid_results.db"):
+    """
+    Entrada do cache adimensional com a razão t_final/τ mais próxima.
+    
+    Só são aceitas entradas com o mesmo método, número de pontos e fator de
+    limites e com |ln(razão / razao_tempo)| <= tolerancia.
+    
+    Returns:
+        dict com 'ganhos' (kp', ki', kd'), 'mse', 'razao_tempo' e
+        'avaliacoes', ou None
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT razao_tempo, kp, ki, kd, mse, avaliacoes FROM cache_adimensional
+        WHERE metodo = ? AND n_pontos = ? AND fator_limites = ?
+    """, (metodo, int(n_pontos), float(fator_limites)))
+    linhas = cursor.fetchall()
+    conn.close()
+    
+    if not linhas:
+        return None
+    
+    razao, kp, ki, kd, mse, avaliacoes = min(linhas, key=lambda l: abs(np.log(l[0] / razao_tempo)))
+    if abs(np.log(razao / razao_tempo)) > tolerancia + 1e-12:
+        return None
+    return {'ganhos': (kp, ki, kd), 'mse': mse, 'razao_tempo': razao, 'avaliacoes': avaliacoes}
+
+
+def _chave_limites(limites):
+    return json.dumps([[float(v) for v in limites[0]], [float(v) for v in limites[1]]])
+
+
+def salvar_otimo_global(k_term, tau, setpoint, t_final, n_pontos, limites, ganhos, mse,
+                        avaliacoes, tempo, db_path="db/pid_results.db"):
+    """Grava (substituindo) o ótimo de referência de uma planta."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    Kp, Ki, Kd = (float(g) for g in ganhos)
+    cursor.execute("""
+        INSERT OR REPLACE INTO otimo_global
+        (k_term, tau, setpoint, t_final, n_pontos, limites, Kp, Ki, Kd, mse, avaliacoes, tempo, data_hora)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (float(k_term), float(tau), float(setpoint), float(t_final), int(n_pontos),
+          _chave_limites(limites), Kp, Ki, Kd, float(mse), int(avaliacoes), float(tempo),
+          datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+
+def buscar_otimo_global(k_term, tau, setpoint, t_final, n_pontos, limites, db_path="db/pid_results.db"):
+    """
+    Ótimo de referência gravado para a planta e configuração.
+    
+    Returns:
+        dict com 'ganhos', 'mse', 'avaliacoes' e 'tempo', ou None
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT Kp, Ki, Kd, mse, avaliacoes, tempo FROM otimo_global
+        WHERE k_term = ? AND tau = ? AND setpoint = ? AND t_final = ? AND n_pontos = ? AND limites = ?
+    """, (float(k_term), float(tau), float(setpoint), float(t_final), int(n_pontos), _chave_limites(limites)))
+    linha = cursor.fetchone()
+    conn.close()
+    if linha is None:
+        return None
+    Kp, Ki, Kd, mse, avaliacoes, tempo = linha
+    return {'ganhos': (Kp, Ki, Kd), 'mse': mse, 'avaliacoes': avaliacoes, 'tempo': tempo}
+
+
+def resumo_mse_por_metodo(k_term, tau, setpoint, db_path="db/pid_results.db", campanha_id=None):
+    """
+    MSE por método nos resultados de uma planta.
+    
+    Com `campanha_id`, só entram os resultados gravados por essa campanha
+    (mesma grade de tempo e mesmos limites); senão, todos os da planta.
+    
+    Returns:
+        Lista de (metodo, melhor_mse, mse_medio, n), do menor melhor MSE
+    """
+    consulta = """
+        SELECT metodo, MIN(mse), AVG(mse), COUNT(*)
+        FROM resultados
+        WHERE k_term = ? AND tau = ? AND setpoint = ?
+    """
+    parametros = (float(k_term), float(tau), float(setpoint))
+    if campanha_id is not None:
+        consulta += " AND campanha_id = ?"
+        parametros += (campanha_id,)
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(consulta + " GROUP BY metodo ORDER BY MIN(mse)", parametros)
+    linhas = cursor.fetchall()
+    conn.close()
+    return linhas
+
+
+def buscar_trajetorias(metodo=None, db_path="db/pid_results.db"):
+    """
+    Ganhos do melhor indivíduo por geração, na ordem de gravação.
+    
+    Returns:
+        Lista de (metodo, geracao, Kp, Ki, Kd, melhor_fitness)
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    consulta = """
+        SELECT metodo, geracao, melhor_kp, melhor_ki, melhor_kd, melhor_fitness
+        FROM historico_evolutivo
+        WHERE ilha IS NULL AND melhor_kp IS NOT NULL
+    """
+    parametros = ()
+    if metodo is not None:
+        consulta += " AND metodo = ?"
+        parametros = (metodo,)
+    cursor.execute(consulta + " ORDER BY id", parametros)
+    linhas = cursor.fetchall()
+    conn.close()
+    return linhas
+
+
+def salvar_frente_pareto(metodo, ganhos, objetivos, db_path="db/pid_results.db"):
+    """
+    Grava uma frente de Pareto como uma nova execução.
+    
+    Args:
+        ganhos: Matriz (n, 3) de (Kp, Ki, Kd)
+        objetivos: Matriz (n, 3) de (mse, overshoot, margem_fase)
+    
+    Returns:
+        Número da execução
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(execucao), 0) + 1 FROM frente_pareto")
+    execucao = cursor.fetchone()[0]
+    data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.executemany("""
+        INSERT INTO frente_pareto (execucao, data_hora, metodo, Kp, Ki, Kd, mse, overshoot, margem_fase)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(execucao, data_hora, metodo, *(float(v) for v in g), *(float(v) for v in o))
+          for g, o in zip(ganhos, objetivos)])
+    conn.commit()
+    conn.close()
+    return execucao
+
+
+def buscar_frente_pareto(execucao=None, db_path="db/pid_results.db"):
+    """
+    Pontos de uma frente de Pareto (a mais recente, se execucao=None).
+    
+    Returns:
+        (execucao, metodo, [(Kp, Ki, Kd, mse, overshoot, margem_fase), ...]),
+        ou None se não houver frente gravada
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if execucao is None:
+        cursor.execute("SELECT MAX(execucao) FROM frente_pareto")
+        execucao = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT metodo, Kp, Ki, Kd, mse, overshoot, margem_fase
+        FROM frente_pareto
+        WHERE execucao = ?
+        ORDER BY mse
+    """, (execucao,))
+    linhas = cursor.fetchall()
+    conn.close()
+    if not linhas:
+        return None
+    return execucao, linhas[0][0], [l[1:] for l in linhas]
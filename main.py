@@ -2,8 +2,9 @@
 
 import sys
 import sqlite3
+from functools import partial
 import numpy as np
-from model.model import model, simulate
+from model.model import model, simulate, mse_batch
 
 # Importar métodos de sintonia
 from modules.zn_module import ziegler_nichols_1
@@ -12,7 +13,19 @@ from modules.pso_module import tune_pid_pso
 from modules.ga_module import tune_pid_ga
 from modules.de_module import tune_pid_de
 from modules.cma_module import tune_pid_cma
-from modules.statistics_module import teste_friedman, imprimir_resultado_friedman, gerar_resumo_estatistico
+from modules.surrogate_module import tune_pid_surrogate
+from modules.nsga_module import tune_pid_nsga2
+from modules.seed_module import semente_raiz, derivar_semente, descrever_semente
+from modules.optimizer_module import CheckpointGeracao
+from modules.warmstart_module import buscar_aquecimento, ganhos_heuristicos
+from modules.limites_module import LIMITES_PADRAO, limites_planta
+from modules.polish_module import polir_ganhos
+from modules.grid_module import otimo_global, imprimir_gaps
+from modules.benchmark_module import tempo_ate_otimo
+from modules.robust_module import planta_robusta, imprimir_custos_cenarios, AGREGACOES
+from modules.portfolio_module import tune_pid_portfolio, METODOS_PORTFOLIO
+from modules.statistics_module import (teste_friedman, friedman_metricas, imprimir_resultado_friedman, gerar_resumo_estatistico,
+                                       etapa_f_race, imprimir_etapa_f_race)
 
 # Importar funções do DB
 from db.db_module import (
@@ -20,13 +33,24 @@ from db.db_module import (
     salvar_resultado, 
     comparar_metodos,
     testar_robustez,
-    comparar_robustez
+    comparar_robustez,
+    criar_campanha,
+    buscar_campanha,
+    finalizar_campanha,
+    registrar_etapa,
+    carregar_etapas
 )
 
 
 def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos, 
                      metodos_selecionados, iteracoes=15, 
-                     executar_robustez=True, db_path="db/pid_results.db"):
+                     executar_robustez=True, db_path="db/pid_results.db",
+                     multi_fidelidade=False, vetorizado=False, seed=None,
+                     retomar=False, aquecimento=False, semeadura_heuristica=False,
+                     limites_automaticos=False, escala_log=False, polimento=False,
+                     referencia_global=False, objetivo_robusto=None,
+                     portfolio=False, prazo=None, orcamento_avaliacoes=None,
+                     corrida=False, iteracoes_minimas=5, alpha_corrida=0.05):
     """
     Executa sintonia PID com os parâmetros fornecidos.
     
@@ -43,6 +67,51 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
         iteracoes: Número de iterações por método
         executar_robustez: Se True, executa análise de robustez
         db_path: Caminho do banco de dados
+        multi_fidelidade: Se True, os métodos evolutivos avaliam as primeiras
+            gerações em grades de tempo dizimadas
+        vetorizado: Se True, os métodos evolutivos usam os motores em arrays
+            com avaliação da população em lote
+        seed: Semente raiz (inteiro ou SeedSequence). Cada (método, iteração)
+            recebe um fluxo filho independente, gravado junto do resultado;
+            None usa entropia nova, que também fica registrada
+        retomar: False inicia uma nova campanha; True retoma a campanha
+            interrompida mais recente com os mesmos parâmetros; um inteiro
+            retoma a campanha com esse id. Etapas concluídas são puladas
+            e os motores em arrays continuam da última geração salva
+        aquecimento: Se True, os métodos evolutivos partem (warm start) dos
+            melhores ganhos já gravados para a mesma planta ou a mais próxima
+        semeadura_heuristica: Se True, os ganhos de ZN1 e CC (e perturbações
+            deles) entram na população inicial / média dos métodos evolutivos
+        limites_automaticos: Se True, os limites de busca dos métodos
+            evolutivos são derivados da planta identificada (múltiplos dos
+            ganhos de ZN1) em vez da caixa fixa (20, 2, 5)
+        escala_log: Se True, os motores em arrays buscam em escala
+            logarítmica normalizada dos ganhos
+        polimento: Se True, o resultado de cada método evolutivo é refinado
+            por L-BFGS-B com gradiente exato (polish_module)
+        referencia_global: Se True, o ótimo global da planta (busca em grade
+            com zoom, gravado no banco) é calculado ou recuperado; são
+            reportados a distância dos resultados desta campanha a ele e o
+            tempo até o ótimo (avaliações e segundos) de GA/PSO/DE/CMA-ES
+        objetivo_robusto: None (planta nominal), "max" ou "media": os métodos
+            evolutivos (e o polimento) minimizam o pior caso ou a média do
+            MSE nos cenários de robustez C1–C8 mais o nominal, avaliados em
+            um único lote. Força os motores em arrays
+        portfolio: Se True, os métodos evolutivos selecionados não rodam
+            separadamente: a cada iteração dividem um único orçamento
+            (`prazo` em segundos e/ou `orcamento_avaliacoes`), realocado
+            online para os que melhoram mais rápido, e o melhor controlador
+            encontrado é gravado como "PORTFOLIO" (portfolio_module)
+        prazo: Prazo de relógio do portfólio, em segundos
+        orcamento_avaliacoes: Orçamento de simulações do portfólio (padrão:
+            1000 por método, se não houver prazo)
+        corrida: Se True (F-Race), a partir de `iteracoes_minimas` o teste
+            de Friedman é refeito ao fim de cada iteração sobre o MSE dos
+            métodos ainda na corrida; os significativamente piores que o
+            melhor (pós-teste de Conover, nível `alpha_corrida`) deixam de
+            ser executados, e a campanha termina quando resta um só
+        iteracoes_minimas: Iterações antes do primeiro teste do F-Race
+        alpha_corrida: Nível de significância do F-Race
     
     Returns:
         pid_params: Dict com parâmetros PID de cada método
@@ -52,42 +121,170 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
     plant = model(k_term, tau)
     t = np.linspace(0, t_final, n_pontos)
     
+    # Campanha: checkpoints por (método, iteração) e por geração
+    parametros = {
+        'k_term': k_term, 'tau': tau, 'setpoint': setpoint, 't_final': t_final,
+        'n_pontos': n_pontos, 'metodos': list(metodos_selecionados.keys()),
+        'iteracoes': iteracoes, 'executar_robustez': executar_robustez,
+        'multi_fidelidade': bool(multi_fidelidade), 'vetorizado': vetorizado,
+        'aquecimento': aquecimento, 'semeadura_heuristica': semeadura_heuristica,
+        'limites_automaticos': limites_automaticos, 'escala_log': escala_log,
+        'polimento': polimento, 'referencia_global': referencia_global,
+        'objetivo_robusto': objetivo_robusto, 'portfolio': portfolio,
+        'prazo': prazo, 'orcamento_avaliacoes': orcamento_avaliacoes,
+        'corrida': corrida, 'iteracoes_minimas': iteracoes_minimas, 'alpha_corrida': alpha_corrida
+    }
+    campanha = None
+    if retomar is not False:
+        campanha = buscar_campanha(parametros, None if retomar is True else retomar, db_path)
+        if campanha is None:
+            print("⚠ Nenhuma campanha interrompida compatível; iniciando nova execução")
+    
+    if campanha is not None:
+        campanha_id, entropia = campanha
+        raiz = semente_raiz(int(entropia))
+        concluidas = carregar_etapas(campanha_id, db_path)
+    else:
+        raiz = semente_raiz(seed)
+        campanha_id = criar_campanha(parametros, raiz.entropy, db_path)
+        concluidas = {}
+        
+        # Ganhos do warm start ficam na campanha, para que a retomada use os mesmos
+        if aquecimento:
+            ganhos = buscar_aquecimento(k_term, tau, db_path)
+            for i, g in enumerate(ganhos if ganhos is not None else []):
+                registrar_etapa(campanha_id, 'aquecimento', '', i, g, db_path)
+                concluidas[('aquecimento', '', i)] = tuple(g)
+    
+    # Planta vista pelos métodos evolutivos: nominal ou o conjunto de cenários
+    planta_evolutiva = plant
+    if objetivo_robusto is not None:
+        planta_evolutiva = planta_robusta(k_term, tau, objetivo_robusto)
+        if not vetorizado:
+            print("⚠ Sintonia robusta requer os motores em arrays; usando vetorizado=True")
+            vetorizado = True
+    
+    # Portfólio: os métodos ask/tell selecionados viram um único método
+    metodos_execucao = dict(metodos_selecionados)
+    if portfolio:
+        membros = [m for m in metodos_selecionados if m in METODOS_PORTFOLIO]
+        if membros:
+            for m in membros:
+                del metodos_execucao[m]
+            metodos_execucao['PORTFOLIO'] = partial(tune_pid_portfolio, metodos=membros, prazo=prazo,
+                                                    orcamento_avaliacoes=orcamento_avaliacoes)
+        else:
+            print("⚠ Nenhum método do portfólio selecionado; execução normal")
+    
+    # Limites de busca dos métodos evolutivos
+    bounds = limites_planta(plant, t, setpoint) if limites_automaticos else LIMITES_PADRAO
+    
+    ganhos_iniciais = [g for (etapa, _, _), g in concluidas.items() if etapa == 'aquecimento']
+    if semeadura_heuristica:
+        heuristicos = ganhos_heuristicos(plant, t, setpoint, bounds)
+        if heuristicos is not None:
+            ganhos_iniciais += [tuple(g) for g in heuristicos]
+    ganhos_iniciais = ganhos_iniciais or None
+    
     print("\n" + "="*70)
     print("FASE 1: SINTONIA DE CONTROLADORES PID")
     print("="*70)
     print(f"Planta: K_Term={k_term} °C/W, τ={tau} s")
     print(f"Setpoint: {setpoint}°C, Tempo: {t_final}s, Pontos: {n_pontos}")
     print(f"Métodos: {', '.join(metodos_selecionados.keys())}")
-    print(f"Iterações: {iteracoes}")
+    if 'PORTFOLIO' in metodos_execucao:
+        print("Portfólio: " + " | ".join(([f"prazo {prazo}s"] if prazo is not None else []) +
+                                         ([f"{orcamento_avaliacoes} avaliações"] if orcamento_avaliacoes is not None else []) or
+                                         ["1000 avaliações por método"]))
+    print(f"Iterações: {iteracoes}" + (f" (F-Race a partir da {iteracoes_minimas}ª, α = {alpha_corrida})" if corrida else ""))
+    if objetivo_robusto is not None:
+        print(f"Objetivo robusto: {AGREGACOES[objetivo_robusto]} em {len(planta_evolutiva.plantas)} cenários")
+    print(f"Semente: {raiz.entropy}")
+    print(f"Campanha: {campanha_id}" + (f" (retomada, {len(concluidas)} etapas concluídas)" if concluidas else ""))
     print("="*70)
     
-    pid_params = {}
+    # Ganhos das etapas já concluídas (a última iteração de cada método prevalece)
+    pid_params = {metodo: ganhos for (etapa, metodo, _), ganhos in concluidas.items()
+                  if etapa == 'sintonia'}
+    
+    # F-Race: métodos ainda na corrida e MSE de cada (método, iteração)
+    ativos = list(metodos_execucao)
+    custos_corrida = {name: {} for name in metodos_execucao}
     
     # Executar cada método
     for iteration in range(1, iteracoes + 1):
-        for name, func in metodos_selecionados.items():
+        for name, func in metodos_execucao.items():
+            if name not in ativos:
+                continue
+            if ('sintonia', name, iteration) in concluidas:
+                if corrida:
+                    custos_corrida[name][iteration] = float(mse_batch(plant, concluidas[('sintonia', name, iteration)], t, setpoint)[0])
+                continue
+            
             print(f"\n{'='*70}")
             print(f"MÉTODO: {name} - Iteração {iteration}/{iteracoes}")
             print(f"{'='*70}")
             
+            semente = derivar_semente(raiz, name, iteration)
+            
             try:
                 # Executar sintonia
                 if name in ['ZN1', 'CC']:
                     kp, ki, kd = func(plant, t, setpoint)
                 else:
-                    kp, ki, kd = func(plant, t, setpoint, db_path=db_path)
+                    kp, ki, kd = func(planta_evolutiva, t, setpoint, db_path=db_path,
+                                      multi_fidelidade=multi_fidelidade,
+                                      vetorizado=vetorizado, seed=semente,
+                                      checkpoint=CheckpointGeracao(db_path, campanha_id, name, iteration),
+                                      ganhos_iniciais=ganhos_iniciais,
+                                      bounds=bounds, escala_log=escala_log)
+                    
+                    # Etapa memética: polimento local do melhor candidato
+                    if polimento:
+                        kp, ki, kd = polir_ganhos(planta_evolutiva, t, setpoint, (kp, ki, kd), bounds)['ganhos']
+                    
+                    if objetivo_robusto is not None:
+                        imprimir_custos_cenarios(planta_evolutiva, (kp, ki, kd), t, setpoint, name)
                 
                 pid_params[name] = (kp, ki, kd)
                 
                 # Simular resposta
                 tresp, yresp = simulate(plant, kp, ki, kd, t, setpoint)
                 
-                # Salvar resultado
-                salvar_resultado(name, kp, ki, kd, tresp, yresp, setpoint, 
-                               plant, db_name=db_path)
+                # Salvar resultado e registrar a etapa na mesma transação, para
+                # que uma interrupção não deixe resultado sem etapa (duplicado na retomada)
+                conn = sqlite3.connect(db_path)
+                try:
+                    salvar_resultado(name, kp, ki, kd, tresp, yresp, setpoint, 
+                                   plant, db_name=db_path,
+                                   semente=descrever_semente(semente),
+                                   k_term=k_term, tau=tau, conn=conn, campanha_id=campanha_id)
+                    registrar_etapa(campanha_id, 'sintonia', name, iteration, (kp, ki, kd), db_path, conn=conn)
+                    conn.commit()
+                finally:
+                    conn.close()
+                if corrida:
+                    custos_corrida[name][iteration] = float(mse_batch(plant, (kp, ki, kd), t, setpoint)[0])
                 
             except Exception as e:
                 print(f"ERRO ao executar {name}: {str(e)}")
+        
+        # F-Race: blocos são as iterações em que todos os métodos ativos concluíram
+        if corrida and iteration >= iteracoes_minimas and len(ativos) > 1:
+            blocos = [i for i in range(1, iteration + 1) if all(i in custos_corrida[m] for m in ativos)]
+            if len(blocos) >= 2:
+                resultado = etapa_f_race([[custos_corrida[m][i] for m in ativos] for i in blocos], alpha_corrida)
+                imprimir_etapa_f_race(iteration, ativos, resultado)
+                ativos = [m for m, s in zip(ativos, resultado['sobreviventes']) if s]
+            if len(ativos) == 1:
+                print(f"\n🏁 F-Race decidido na iteração {iteration}: {ativos[0]}")
+                break
+    
+    if corrida:
+        total = iteracoes * len(metodos_execucao)
+        executadas = sum(len(c) for c in custos_corrida.values())
+        print(f"\n🏁 F-Race: {executadas} de {total} execuções de método "
+              f"({100 * (1 - executadas / total):.0f}% poupadas) | Na corrida: {', '.join(ativos)}")
     
     # Mostrar comparação
     print("\n" + "="*70)
@@ -95,6 +292,15 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
     print("="*70)
     comparar_metodos(db_name=db_path)
     
+    # Distância ao ótimo global da busca em grade
+    if referencia_global:
+        otimo = otimo_global(k_term, tau, setpoint, t_final, n_pontos, bounds, db_path=db_path)
+        imprimir_gaps(k_term, tau, setpoint, otimo, db_path, campanha_id)
+        metodos_alvo = [m for m in ("GA", "PSO", "DE", "CMA-ES") if m in metodos_selecionados]
+        if metodos_alvo:
+            tempo_ate_otimo(plant, t, setpoint, otimo['mse'], metodos_alvo, repeticoes=3,
+                            bounds=bounds, seed=raiz.entropy)
+    
     # Análise de robustez (se solicitado)
     if executar_robustez and pid_params:
         print("\n" + "="*70)
@@ -102,8 +308,16 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
         print("="*70)
         
         for metodo, (kp, ki, kd) in pid_params.items():
+            if ('robustez', metodo, 0) in concluidas:
+                continue
             try:
-                testar_robustez(metodo, kp, ki, kd, t, k_term, tau, setpoint, db_path=db_path)
+                conn = sqlite3.connect(db_path)
+                try:
+                    testar_robustez(metodo, kp, ki, kd, t, k_term, tau, setpoint, db_path=db_path, conn=conn)
+                    registrar_etapa(campanha_id, 'robustez', metodo, 0, db_path=db_path, conn=conn)
+                    conn.commit()
+                finally:
+                    conn.close()
             except Exception as e:
                 print(f"ERRO ao testar robustez de {metodo}: {e}")
         
@@ -113,11 +327,12 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
         print("="*70)
 
         metricas = ["mse", "overshoot", "tempo_acomodacao"]
+        resultados_friedman = friedman_metricas(db_path, metricas) or {}
         for metrica in metricas:
             print(f"\n{'─'*70}")
             print(f"MÉTRICA: {metrica.upper()}")
             print(f"{'─'*70}")
-            resultado = teste_friedman(db_path, metrica)
+            resultado = resultados_friedman.get(metrica)
             if resultado:
                 imprimir_resultado_friedman(resultado)
 
@@ -130,6 +345,7 @@ def executar_sintonia(k_term, tau, setpoint, t_final, n_pontos,
     if resultado_friedman:
         imprimir_resultado_friedman(resultado_friedman)
     
+    finalizar_campanha(campanha_id, db_path)
     print("\n✓ Execução concluída!")
     return pid_params
 
@@ -157,7 +373,9 @@ def main_cli():
         "GA": tune_pid_ga,
         "PSO": tune_pid_pso,
         "DE": tune_pid_de,
-        "CMA-ES": tune_pid_cma
+        "CMA-ES": tune_pid_cma,
+        "GP-EI": tune_pid_surrogate,
+        "NSGA-II": tune_pid_nsga2
     }
     
     # Executar
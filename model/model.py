@@ -34,6 +34,40 @@ def model(gterm: float, t: float):
     return plant
 
 
+class PlantaCenarios(ctl.TransferFunction):
+    """
+    Conjunto de cenários de planta tratado como uma única planta.
+
+    Para tudo o que usa a função de transferência diretamente (simulate,
+    margens, identificação FOPDT) ela é a primeira planta da lista, a
+    nominal. mse_batch e simulate_batch, porém, avaliam cada controlador em
+    todos os cenários de uma só vez e mse_batch devolve o custo agregado:
+    o pior caso (agregacao="max") ou a média ponderada por `pesos`
+    (agregacao="media").
+
+    Todas as plantas devem ter a mesma ordem.
+    """
+
+    def __init__(self, plantas, nomes=None, agregacao="max", pesos=None):
+        if agregacao not in ("max", "media"):
+            raise ValueError(f"Agregação desconhecida: {agregacao}")
+        if pesos is not None and len(pesos) != len(plantas):
+            raise ValueError(f"{len(pesos)} pesos para {len(plantas)} cenários")
+        super().__init__(plantas[0].num, plantas[0].den)
+        self.plantas = list(plantas)
+        self.nomes = list(nomes) if nomes is not None else [f"P{i}" for i in range(len(plantas))]
+        self.agregacao = agregacao
+        self.pesos = None if pesos is None else np.asarray(pesos, dtype=float) / np.sum(pesos)
+
+    def agregar(self, custos):
+        """Custos (S, B) por cenário -> custo robusto (B,)."""
+        if self.agregacao == "max":
+            return np.max(custos, axis=0)
+        if self.pesos is None:
+            return np.mean(custos, axis=0)
+        return self.pesos @ custos
+
+
 def simulate(plant: ctl.TransferFunction, Kp: float, Ki: float, Kd: float, T: np.ndarray, setpoint: float = 1):
     """
     Função que simula a resposta do sistema a um degrau unitário.
@@ -60,3 +94,365 @@ def simulate(plant: ctl.TransferFunction, Kp: float, Ki: float, Kd: float, T: np
     t, y = ctl.forced_response(sys, T=T, U=u)  # Resposta do sistema
 
     return t, y
+
+
+def _malha_fechada_espaco_estados(plant: ctl.TransferFunction, ganhos: np.ndarray):
+    """
+    Monta, para um lote de controladores PID, o sistema em malha fechada
+    C(s)·P(s) / (1 + C(s)·P(s)) na forma canônica controlável.
+
+    Como C(s) = (Kd·s² + Kp·s + Ki) / s é linear nos ganhos, os polinômios
+    de malha fechada de todo o lote são obtidos por um único produto matricial.
+
+    Parâmetros:
+    plant (TransferFunction): Função de transferência SISO da planta.
+    ganhos (array): Matriz (B, 3) com [Kp, Ki, Kd] de cada controlador.
+
+    Retorna:
+    A (B, n, n), Bv (n,), C (B, n), D (B,): matrizes de estado do lote.
+    """
+
+    Np = np.atleast_1d(np.squeeze(plant.num[0][0])).astype(float)
+    Dp = np.atleast_1d(np.squeeze(plant.den[0][0])).astype(float)
+
+    # Numerador do PID por ganho: Kp -> s, Ki -> 1, Kd -> s²
+    base = np.array([
+        np.convolve(Np, [0.0, 1.0, 0.0]),
+        np.convolve(Np, [0.0, 0.0, 1.0]),
+        np.convolve(Np, [1.0, 0.0, 0.0]),
+    ])
+    num = ganhos @ base                                   # (B, L)
+    sDp = np.append(Dp, 0.0)                              # s·Dp(s)
+
+    L = max(num.shape[1], len(sDp))
+    num = np.pad(num, ((0, 0), (L - num.shape[1], 0)))
+    den = num + np.pad(sDp, (L - len(sDp), 0))
+
+    # Remove coeficientes líderes nulos comuns a todo o lote
+    while L > 1 and np.all(den[:, 0] == 0):
+        num, den, L = num[:, 1:], den[:, 1:], L - 1
+
+    b = num / den[:, :1]
+    a = den / den[:, :1]
+    n = L - 1
+
+    D = b[:, 0]
+    coef = b[:, 1:] - D[:, None] * a[:, 1:]               # c_1 .. c_n
+
+    A = np.zeros((len(ganhos), n, n))
+    A[:, np.arange(n - 1), np.arange(1, n)] = 1.0
+    A[:, -1, :] = -a[:, :0:-1]                            # [-a_n ... -a_1]
+    Bv = np.zeros(n)
+    Bv[-1] = 1.0
+    C = coef[:, ::-1]                                     # [c_n ... c_1]
+
+    return A, Bv, C, D
+
+
+def _espaco_estados_lote(plant, ganhos):
+    """
+    Como _malha_fechada_espaco_estados; para PlantaCenarios, os lotes de
+    todos os cenários são empilhados (linha s·B + b = cenário s, ganho b).
+    """
+    if not isinstance(plant, PlantaCenarios):
+        return _malha_fechada_espaco_estados(plant, ganhos)
+
+    sistemas = [_malha_fechada_espaco_estados(p, ganhos) for p in plant.plantas]
+    if len({s[0].shape[1] for s in sistemas}) != 1:
+        raise ValueError("Os cenários de PlantaCenarios devem ter a mesma ordem")
+    A, C, D = (np.concatenate([s[i] for s in sistemas]) for i in (0, 2, 3))
+    return A, sistemas[0][1], C, D
+
+
+def _grade_uniforme(T):
+    """
+    Retorna (t0, dt, n) de uma grade uniforme.
+
+    T pode ser um vetor de tempo uniformemente espaçado ou uma tupla
+    (t_inicial, t_final, n_pontos) equivalente a np.linspace.
+    """
+    if isinstance(T, tuple):
+        t0, tf, n = T
+        n = int(n)
+        return float(t0), (tf - t0) / (n - 1), n
+
+    T = np.asarray(T, dtype=float)
+    dt = (T[-1] - T[0]) / (len(T) - 1)
+    if not np.allclose(np.diff(T), dt, rtol=1e-6, atol=1e-12 * max(1.0, abs(T[-1]))):
+        raise ValueError("A simulação em blocos requer um vetor de tempo uniformemente espaçado")
+    return float(T[0]), dt, len(T)
+
+
+def _simular_em_blocos(plant, ganhos, t0, dt, n_pontos, setpoint=1, tamanho_bloco=None, dtype=np.float64):
+    """
+    Gera a resposta ao degrau de um lote de controladores, bloco a bloco.
+
+    A malha fechada é discretizada de forma exata para entrada constante
+    (x[k+1] = Φ·x[k] + Γ·u). As potências Φ^j de um bloco são calculadas
+    uma única vez, de modo que cada bloco é obtido por um produto matricial,
+    sem laço por amostra, e a memória depende apenas do tamanho do bloco.
+
+    A discretização é sempre feita em float64; apenas a propagação e as
+    respostas usam `dtype` (float32 reduz pela metade o tráfego de memória).
+
+    Rende:
+    (inicio, Y): índice da primeira amostra do bloco e respostas (B, m).
+    """
+    from scipy.linalg import expm
+
+    ganhos = np.atleast_2d(np.asarray(ganhos, dtype=float))
+    A, Bv, C, D = _espaco_estados_lote(plant, ganhos)
+    n_lote, n = len(A), A.shape[1]
+    if tamanho_bloco is None:
+        tamanho_bloco = min(4096, max(16, int(np.sqrt(n_pontos))))
+    m = max(1, min(int(tamanho_bloco), n_pontos))
+
+    # Discretização exata via exponencial da matriz aumentada [[A, B], [0, 0]]
+    M = np.zeros((n_lote, n + 1, n + 1))
+    M[:, :n, :n] = A * dt
+    M[:, :n, n] = Bv * dt
+    E = expm(M)
+    Phi, Gamma = E[:, :n, :n], E[:, :n, n]
+
+    # C·Φ^j e C·Σ_{i<j} Φ^i·Γ para j = 0..m-1, além de Φ^m e Σ_{i<m} Φ^i·Γ
+    CP = np.empty((n_lote, m, n))
+    CS = np.empty((n_lote, m))
+    linha = C.copy()                                      # C·Φ^j
+    coluna = Gamma.copy()                                 # Φ^j·Γ
+    Sj = np.zeros((n_lote, n))
+    for j in range(m):
+        CP[:, j] = linha
+        CS[:, j] = np.sum(C * Sj, axis=1)
+        Sj += coluna
+        linha = (linha[:, None, :] @ Phi)[:, 0]
+        coluna = (Phi @ coluna[:, :, None])[..., 0]
+    Pm, Sm = np.linalg.matrix_power(Phi, m), Sj
+
+    dtype = np.dtype(dtype)
+    CP, CS, Pm, Sm = CP.astype(dtype), CS.astype(dtype), Pm.astype(dtype), Sm.astype(dtype)
+    DU = (D * setpoint).astype(dtype)
+    setpoint = dtype.type(setpoint)
+
+    x = np.zeros((n_lote, n), dtype=dtype)
+    for inicio in range(0, n_pontos, m):
+        k = min(m, n_pontos - inicio)
+        Y = (CP[:, :k] @ x[:, :, None])[..., 0] + CS[:, :k] * setpoint + DU[:, None]
+        yield inicio, Y
+        x = (Pm @ x[:, :, None])[..., 0] + Sm * setpoint
+
+
+def simulate_chunked(plant: ctl.TransferFunction, Kp, Ki, Kd, T, setpoint: float = 1,
+                     tamanho_bloco: int = None, faixa: float = 0.02, arquivo_trajetoria: str = None,
+                     dtype=np.float64):
+    """
+    Simula a resposta ao degrau em blocos, acumulando as métricas de forma
+    incremental, com memória constante em relação ao horizonte.
+
+    As métricas seguem as definições de calcular_metricas (db_module). Kp, Ki
+    e Kd podem ser escalares ou vetores (lote de controladores).
+
+    Parâmetros:
+    plant (TransferFunction): Função de transferência da planta.
+    Kp, Ki, Kd (float | array): Ganhos do controlador PID.
+    T (array | tuple): Vetor de tempo uniforme ou (t_inicial, t_final, n_pontos).
+    setpoint (float): Valor do setpoint desejado (default é 1).
+    tamanho_bloco (int): Número de amostras avançadas por bloco (padrão ≈ √n_pontos).
+    faixa (float): Faixa relativa de acomodação (default 2%).
+    arquivo_trajetoria (str): Se informado, grava a resposta completa em um
+        arquivo .npy mapeado em memória (shape (n_pontos,) ou (B, n_pontos)).
+    dtype: Precisão da propagação e da trajetória gravada (np.float64 ou
+        np.float32). As somas das métricas são sempre acumuladas em float64.
+
+    Retorna:
+    dict com mse, overshoot, tempo_acomodacao (primeira entrada na faixa),
+    tempo_acomodacao_estrito (a partir do qual a resposta não sai mais da
+    faixa), pico e, se solicitado, trajetoria (np.memmap).
+    """
+
+    escalar = all(np.ndim(g) == 0 for g in (Kp, Ki, Kd))
+    ganhos = np.column_stack([np.ravel(g) for g in np.broadcast_arrays(Kp, Ki, Kd)]).astype(float)
+    t0, dt, n_pontos = _grade_uniforme(T)
+    n_lote = len(ganhos)
+
+    trajetoria = None
+    if arquivo_trajetoria is not None:
+        forma = (n_pontos,) if escalar else (n_lote, n_pontos)
+        trajetoria = np.lib.format.open_memmap(arquivo_trajetoria, mode='w+', dtype=dtype, shape=forma)
+
+    limite = faixa * setpoint
+    soma_erro2 = np.zeros(n_lote)
+    pico = np.full(n_lote, -np.inf)
+    primeira_entrada = np.full(n_lote, -1)
+    ultima_saida = np.full(n_lote, -1)
+
+    for inicio, Y in _simular_em_blocos(plant, ganhos, t0, dt, n_pontos, setpoint, tamanho_bloco, dtype):
+        erro = Y - Y.dtype.type(setpoint)
+        soma_erro2 += np.sum(erro ** 2, axis=1, dtype=np.float64)
+        pico = np.maximum(pico, np.max(Y, axis=1))
+
+        dentro = np.abs(erro) <= limite
+        tem_dentro = dentro.any(axis=1)
+        novos = (primeira_entrada < 0) & tem_dentro
+        primeira_entrada[novos] = inicio + np.argmax(dentro[novos], axis=1)
+
+        fora = ~dentro
+        tem_fora = fora.any(axis=1)
+        ultima_saida[tem_fora] = inicio + Y.shape[1] - 1 - np.argmax(fora[tem_fora, ::-1], axis=1)
+
+        if trajetoria is not None:
+            if escalar:
+                trajetoria[inicio:inicio + Y.shape[1]] = Y[0]
+            else:
+                trajetoria[:, inicio:inicio + Y.shape[1]] = Y
+
+    t_final = t0 + (n_pontos - 1) * dt
+    mse = soma_erro2 / n_pontos
+    overshoot = np.maximum(0, (pico - setpoint) / setpoint * 100)
+    tempo_acomodacao = np.where(primeira_entrada >= 0, t0 + primeira_entrada * dt, t_final)
+    tempo_estrito = np.where(ultima_saida < 0, t0,
+                             np.where(ultima_saida >= n_pontos - 1, t_final, t0 + (ultima_saida + 1) * dt))
+
+    metricas = {
+        'mse': mse,
+        'overshoot': overshoot,
+        'tempo_acomodacao': tempo_acomodacao,
+        'tempo_acomodacao_estrito': tempo_estrito,
+        'pico': pico
+    }
+    if escalar:
+        metricas = {k: float(v[0]) for k, v in metricas.items()}
+
+    if trajetoria is not None:
+        trajetoria.flush()
+        metricas['trajetoria'] = trajetoria
+
+    return metricas
+
+
+def simulate_batch(plant: ctl.TransferFunction, ganhos, T, setpoint: float = 1,
+                   dtype=np.float64, tamanho_bloco: int = None):
+    """
+    Simula a resposta ao degrau de um lote de controladores PID de uma vez.
+
+    Equivale a chamar simulate para cada linha de `ganhos`, mas sem montar
+    funções de transferência individuais: todo o lote é propagado em conjunto.
+
+    Parâmetros:
+    plant (TransferFunction): Função de transferência da planta.
+    ganhos (array): Matriz (B, 3) com [Kp, Ki, Kd] de cada controlador.
+    T (array): Vetor de tempo uniformemente espaçado.
+    setpoint (float): Valor do setpoint desejado (default é 1).
+    dtype: np.float64 (padrão) ou np.float32 para lotes grandes. Ver
+        verificar_precisao_float32 para o erro esperado.
+    tamanho_bloco (int): Número de amostras avançadas por bloco (padrão ≈ √n_pontos).
+
+    Retorna:
+    t (array): Vetor de tempo.
+    Y (array): Respostas (B, len(T)) no dtype solicitado; para PlantaCenarios
+        com S cenários, (S·B, len(T)), com a linha s·B + b no cenário s.
+    """
+
+    T = np.asarray(T)
+    t0, dt, n_pontos = _grade_uniforme(T)
+    ganhos = np.atleast_2d(np.asarray(ganhos, dtype=float))
+    n_linhas = len(ganhos) * (len(plant.plantas) if isinstance(plant, PlantaCenarios) else 1)
+
+    Y = np.empty((n_linhas, n_pontos), dtype=dtype)
+    for inicio, Y_bloco in _simular_em_blocos(plant, ganhos, t0, dt, n_pontos, setpoint, tamanho_bloco, dtype):
+        Y[:, inicio:inicio + Y_bloco.shape[1]] = Y_bloco
+
+    return T, Y
+
+
+def verificar_precisao_float32(plant: ctl.TransferFunction, ganhos, T, setpoint: float = 1):
+    """
+    Compara a simulação em float32 com a referência em float64.
+
+    Na planta padrão (K=59.81, τ=401.61, setpoint=80, 1000 pontos) e 500
+    ganhos sorteados na caixa usual (0..20, 0..2, 0..5), o erro absoluto
+    máximo da resposta ficou em ~4e-5 °C (~5e-7 do setpoint) e o erro
+    relativo do MSE em ~5e-7, desprezível para ranquear candidatos. O
+    overshoot, por ser a diferença de dois valores próximos, difere em até
+    ~2e-4 relativo; o tempo de acomodação só muda se a resposta tocar
+    exatamente o limite da faixa de 2%.
+
+    Retorna:
+    dict com erro_abs_max e erro_rel_max (relativo ao setpoint) da resposta
+    e, por métrica, a maior diferença relativa entre float32 e float64.
+    """
+
+    from db.db_module import calcular_metricas_lote
+
+    t, Y64 = simulate_batch(plant, ganhos, T, setpoint, dtype=np.float64)
+    _, Y32 = simulate_batch(plant, ganhos, T, setpoint, dtype=np.float32)
+
+    erro = np.abs(Y32.astype(np.float64) - Y64)
+    m64 = calcular_metricas_lote(t, Y64, setpoint)
+    m32 = calcular_metricas_lote(t, Y32, setpoint)
+
+    resultado = {
+        'erro_abs_max': float(np.max(erro)),
+        'erro_rel_max': float(np.max(erro) / abs(setpoint)),
+    }
+    for chave in m64:
+        ref = np.asarray(m64[chave], dtype=np.float64)
+        dif = np.abs(np.asarray(m32[chave], dtype=np.float64) - ref) / np.maximum(np.abs(ref), 1e-12)
+        resultado[f'{chave}_dif_rel_max'] = float(np.max(dif))
+
+    return resultado
+
+
+def mse_batch(plant: ctl.TransferFunction, ganhos, T, setpoint: float = 1, dtype=np.float64):
+    """
+    Erro quadrático médio da resposta de um lote de controladores PID.
+
+    Respostas que divergem (valores não finitos) recebem a mesma penalidade
+    de 1e6 usada pelos tuners para simulações instáveis. O erro é acumulado
+    bloco a bloco, sem guardar as respostas completas.
+
+    Com uma PlantaCenarios, o lote (cenário × ganho × tempo) é simulado de
+    uma vez e o MSE de cada controlador é o agregado dos cenários (pior
+    caso ou média); basta passá-la no lugar da planta aos tuners para uma
+    sintonia robusta.
+
+    Parâmetros:
+    plant (TransferFunction): Função de transferência da planta.
+    ganhos (array): Matriz (B, 3) com [Kp, Ki, Kd] de cada controlador.
+    T (array): Vetor de tempo uniformemente espaçado.
+    setpoint (float): Valor do setpoint desejado (default é 1).
+    dtype: Precisão da simulação (np.float64 ou np.float32).
+
+    Retorna:
+    mse (array): Vetor (B,) com o MSE de cada controlador.
+    """
+
+    mse = mse_por_cenario(plant, ganhos, T, setpoint, dtype)
+    if isinstance(plant, PlantaCenarios):
+        return plant.agregar(mse)
+    return mse
+
+
+def mse_por_cenario(plant: ctl.TransferFunction, ganhos, T, setpoint: float = 1, dtype=np.float64):
+    """
+    Como mse_batch, sem agregar os cenários.
+
+    Retorna:
+    mse (array): (S, B) para uma PlantaCenarios com S cenários; (B,) para
+        uma planta comum.
+    """
+
+    t0, dt, n_pontos = _grade_uniforme(T)
+    ganhos = np.atleast_2d(np.asarray(ganhos, dtype=float))
+
+    soma = None
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _, Y in _simular_em_blocos(plant, ganhos, t0, dt, n_pontos, setpoint, dtype=dtype):
+            erro = Y - Y.dtype.type(setpoint)
+            parcial = np.einsum('bn,bn->b', erro, erro, dtype=np.float64)
+            soma = parcial if soma is None else soma + parcial
+    mse = soma / n_pontos
+    mse = np.where(np.isfinite(mse), mse, 1e6)
+
+    if isinstance(plant, PlantaCenarios):
+        return mse.reshape(len(plant.plantas), len(ganhos))
+    return mse
@@ -0,0 +1,192 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Cache de sintonia em coordenadas adimensionais.
+
+Para a planta K/(τs+1) com o PID Kp + Ki/s + Kd·s, no tempo normalizado
+t/τ a malha aberta depende apenas de
+
+    kp' = K·Kp      ki' = K·Ki·τ      kd' = K·Kd/τ
+
+e a resposta escala linearmente com o setpoint. Com a grade
+t = linspace(0, t_final, n) a simulação discreta coincide com a da planta
+1/(s+1) na grade linspace(0, t_final/τ, n), e o MSE é setpoint² vezes o
+MSE normalizado. Os limites derivados da planta (limites_module) também
+são invariantes nessa escala.
+
+Assim basta sintonizar uma vez por configuração adimensional
+(método, t_final/τ, n_pontos, fator dos limites); o resultado fica na
+tabela `cache_adimensional` e é convertido para qualquer (K, τ, setpoint)
+sem nova otimização. Quando só há uma entrada com razão t_final/τ
+próxima, os ganhos convertidos podem passar por um refinamento local
+curto com CMA-ES.
+"""
+
+import numpy as np
+from db.db_module import salvar_cache_adimensional, buscar_cache_adimensional
+from model.model import model
+from modules.ga_module import OtimizadorGA
+from modules.pso_module import OtimizadorPSO
+from modules.de_module import OtimizadorDE
+from modules.cma_module import OtimizadorCMA
+from modules.optimizer_module import AvaliadorLote, executar_concorrentes
+from modules.limites_module import limites_planta
+from modules.seed_module import semente_raiz
+
+OTIMIZADORES = {
+    "GA": lambda bounds, seed: OtimizadorGA(bounds, 20, seed=seed),
+    "PSO": lambda bounds, seed: OtimizadorPSO(bounds, 20, seed=seed),
+    "DE": lambda bounds, seed: OtimizadorDE(bounds, 20, seed=seed),
+    "CMA-ES": lambda bounds, seed: OtimizadorCMA(bounds, seed=seed),
+}
+
+
+def para_adimensional(ganhos, k_term, tau):
+    """(Kp, Ki, Kd) -> (kp', ki', kd'); aceita arrays (..., 3)."""
+    return np.asarray(ganhos, dtype=float) * np.array([k_term, k_term * tau, k_term / tau])
+
+
+def para_dimensional(ganhos, k_term, tau):
+    """(kp', ki', kd') -> (Kp, Ki, Kd); aceita arrays (..., 3)."""
+    return np.asarray(ganhos, dtype=float) / np.array([k_term, k_term * tau, k_term / tau])
+
+
+def razao_tempo(t_final, tau):
+    """Chave t_final/τ, arredondada para não depender de erros de ponto flutuante."""
+    return round(float(t_final) / float(tau), 6)
+
+
+def sintonizar_adimensional(razao, n_pontos, metodo="CMA-ES", geracoes=100, repeticoes=3,
+                            fator=20.0, seed=None):
+    """
+    Sintoniza a planta normalizada 1/(s+1) na grade linspace(0, razao, n_pontos).
+
+    As `repeticoes` execuções independentes avançam juntas, com a
+    avaliação de todas em um único lote, e a melhor é mantida.
+
+    Returns:
+        (ganhos adimensionais, MSE normalizado, avaliações)
+    """
+    plant = model(1.0, 1.0)
+    t = np.linspace(0, razao, n_pontos)
+    bounds = limites_planta(plant, t, 1.0, fator)
+    sementes = semente_raiz(seed).spawn(repeticoes)
+    otimizadores = [OTIMIZADORES[metodo](bounds, s) for s in sementes]
+
+    with AvaliadorLote(plant, t, 1.0) as avaliador:
+        melhores = executar_concorrentes(otimizadores, avaliador, geracoes)
+        avaliacoes = avaliador.avaliacoes
+
+    ganhos, mse = min(melhores, key=lambda m: m[1])
+    return np.asarray(ganhos, dtype=float), float(mse), avaliacoes
+
+
+def refinar_local(plant, t, setpoint, ganhos, geracoes=10, bounds=None, sigma0=0.05, seed=None):
+    """
+    Refinamento local curto com CMA-ES a partir de `ganhos`.
+
+    Returns:
+        (ganhos, mse) — os de partida, se o refinamento não os melhorar
+    """
+    ganhos = np.asarray(ganhos, dtype=float)
+    if bounds is None:
+        bounds = limites_planta(plant, t, setpoint)
+    bounds = ((0.0, 0.0, 0.0), tuple(np.maximum(bounds[1], ganhos)))
+
+    with AvaliadorLote(plant, t, setpoint) as avaliador:
+        mse_inicial = float(avaliador.avaliar(ganhos)[0])
+        otimizador = OtimizadorCMA(bounds, sigma0=sigma0, seed=seed, media_inicial=ganhos)
+        refinado, mse = executar_concorrentes([otimizador], avaliador, geracoes)[0]
+
+    if mse < mse_inicial:
+        return np.asarray(refinado, dtype=float), float(mse)
+    return ganhos, mse_inicial
+
+
+def sintonia_em_cache(k_term, tau, setpoint, t_final, n_pontos, metodo="CMA-ES",
+                      refinar=0, tolerancia_razao=0.0, geracoes=100, repeticoes=3,
+                      fator=20.0, seed=None, db_path="db/pid_results.db"):
+    """
+    Ganhos PID para a planta (k_term, tau) a partir do cache adimensional.
+
+    Sem entrada para a configuração (razão t_final/τ dentro de
+    `tolerancia_razao` em escala log), a planta normalizada é sintonizada
+    e gravada no cache. Com refinar > 0, os ganhos convertidos passam por
+    `refinar` gerações de CMA-ES local na planta real.
+
+    Returns:
+        dict com 'ganhos' (Kp, Ki, Kd), 'mse', 'origem' ('cache',
+        'cache aproximado' ou 'sintonia') e 'refinado'
+    """
+    razao = razao_tempo(t_final, tau)
+    entrada = buscar_cache_adimensional(metodo, razao, n_pontos, fator, tolerancia_razao, db_path)
+
+    if entrada is None:
+        print(f"Cache adimensional: sintonizando {metodo} para t_final/τ={razao}, n={n_pontos}")
+        ganhos_adim, mse_norm, avaliacoes = sintonizar_adimensional(
+            razao, n_pontos, metodo, geracoes, repeticoes, fator, seed)
+        salvar_cache_adimensional(metodo, razao, n_pontos, fator, ganhos_adim, mse_norm,
+                                  avaliacoes, db_path)
+        origem = 'sintonia'
+    else:
+        ganhos_adim, mse_norm = np.array(entrada['ganhos']), entrada['mse']
+        origem = 'cache' if entrada['razao_tempo'] == razao else 'cache aproximado'
+
+    ganhos = para_dimensional(ganhos_adim, k_term, tau)
+    mse = mse_norm * setpoint ** 2
+    refinado = False
+
+    plant = model(k_term, tau)
+    t = np.linspace(0, t_final, n_pontos)
+    if origem == 'cache aproximado':
+        # MSE da entrada vale para outra grade; recalcula na planta real
+        with AvaliadorLote(plant, t, setpoint) as avaliador:
+            mse = float(avaliador.avaliar(ganhos)[0])
+    if refinar > 0:
+        ganhos_refinados, mse_refinado = refinar_local(plant, t, setpoint, ganhos, refinar, seed=seed)
+        refinado = mse_refinado < mse
+        ganhos, mse = ganhos_refinados, mse_refinado
+
+    return {'ganhos': tuple(float(g) for g in ganhos), 'mse': float(mse),
+            'origem': origem, 'refinado': refinado}
+
+
+def sintonizar_frota(plantas, setpoint, t_final, n_pontos, metodo="CMA-ES", refinar=0,
+                     tolerancia_razao=0.0, db_path="db/pid_results.db", **kwargs):
+    """
+    Sintonia de várias plantas [(k_term, tau), ...] pelo cache adimensional.
+
+    `t_final` pode ser um valor único ou um por planta. Demais argumentos
+    vão para sintonia_em_cache.
+
+    Returns:
+        Lista de dicts de sintonia_em_cache, com 'k_term' e 'tau'
+    """
+    if np.isscalar(t_final):
+        t_final = [t_final] * len(plantas)
+
+    resultados = []
+    for (k_term, tau), tf in zip(plantas, t_final):
+        resultado = sintonia_em_cache(k_term, tau, setpoint, tf, n_pontos, metodo, refinar,
+                                      tolerancia_razao, db_path=db_path, **kwargs)
+        resultado.update(k_term=k_term, tau=tau)
+        resultados.append(resultado)
+
+    imprimir_frota(resultados)
+    return resultados
+
+
+def imprimir_frota(resultados):
+    print("\n" + "="*70)
+    print("SINTONIA DA FROTA (CACHE ADIMENSIONAL)")
+    print("="*70)
+    print(f"{'K_Term':>8} {'τ':>8} {'Kp':>9} {'Ki':>9} {'Kd':>9} {'MSE':>10}  Origem")
+    print("-"*70)
+    for r in resultados:
+        Kp, Ki, Kd = r['ganhos']
+        origem = r['origem'] + (" + refino" if r['refinado'] else "")
+        print(f"{r['k_term']:>8.2f} {r['tau']:>8.2f} {Kp:>9.4f} {Ki:>9.4f} {Kd:>9.4f} {r['mse']:>10.6f}  {origem}")
+    print("="*70)
+    contagem = {o: sum(r['origem'] == o for r in resultados) for o in ('cache', 'cache aproximado', 'sintonia')}
+    print(f"Plantas: {len(resultados)} | Do cache: {contagem['cache']} | "
+          f"Aproximadas: {contagem['cache aproximado']} | Sintonizadas: {contagem['sintonia']}")
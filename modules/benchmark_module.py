@@ -0,0 +1,165 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Comparações de custo computacional entre configurações dos otimizadores.
+
+A medida principal é o número de avaliações até o alvo: quantas
+simulações cada execução consome até o melhor MSE ficar dentro de uma
+tolerância relativa do melhor valor encontrado por todas as execuções.
+"""
+
+import time
+import numpy as np
+from model.model import model, mse_batch
+from modules.ga_module import OtimizadorGA
+from modules.pso_module import OtimizadorPSO
+from modules.de_module import OtimizadorDE
+from modules.cma_module import OtimizadorCMA
+from modules.warmstart_module import ganhos_heuristicos
+
+
+def _criar_otimizador(metodo, seed, ganhos_iniciais, bounds):
+    """Otimizador ask/tell com a configuração padrão dos tuners."""
+    if metodo == "GA":
+        return OtimizadorGA(bounds, 20, seed=seed, ganhos_iniciais=ganhos_iniciais)
+    if metodo == "PSO":
+        return OtimizadorPSO(bounds, 20, seed=seed, ganhos_iniciais=ganhos_iniciais)
+    if metodo == "DE":
+        return OtimizadorDE(bounds, 20, seed=seed, ganhos_iniciais=ganhos_iniciais)
+    if metodo == "CMA-ES":
+        media = None if ganhos_iniciais is None else ganhos_iniciais[0]
+        return OtimizadorCMA(bounds, seed=seed, media_inicial=media)
+    raise ValueError(f"Método desconhecido: {metodo}")
+
+
+def _trajetoria(otimizador, plant, t, setpoint, geracoes):
+    """(avaliações acumuladas, melhor MSE, segundos acumulados) após cada tell."""
+    avaliacoes, melhores, tempos, total = [], [], [], 0
+    inicio = time.perf_counter()
+    while len(melhores) < geracoes and not otimizador.encerrado:
+        pop = otimizador.ask()
+        otimizador.tell(mse_batch(plant, pop, t, setpoint))
+        total += len(pop)
+        avaliacoes.append(total)
+        melhores.append(otimizador.melhor[1])
+        tempos.append(time.perf_counter() - inicio)
+    return np.array(avaliacoes), np.array(melhores), np.array(tempos)
+
+
+def avaliacoes_ate_alvo(avaliacoes, melhores, alvo):
+    """Avaliações consumidas até o melhor MSE atingir o alvo (None se não atingiu)."""
+    atingiu = np.nonzero(melhores <= alvo)[0]
+    return int(avaliacoes[atingiu[0]]) if len(atingiu) else None
+
+
+def comparar_inicializacao(plant=None, t=None, setpoint=80.0, metodos=("GA", "PSO", "DE", "CMA-ES"),
+                           repeticoes=10, geracoes=100, tolerancia=1e-3,
+                           bounds=((0, 0, 0), (20, 2, 5)), seed=0):
+    """
+    Compara a inicialização uniforme com a semeadura heurística (ZN1/CC)
+    em avaliações até o alvo.
+
+    Cada repetição usa a mesma semente nos dois modos. O alvo de cada
+    método é o melhor MSE obtido por todas as suas execuções, acrescido da
+    tolerância relativa.
+
+    Returns:
+        dict {método: {'uniforme': [...], 'heuristica': [...], 'alvo': float}}
+        com as avaliações até o alvo de cada repetição (None = não atingiu)
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 803.22, 1000)
+
+    heuristicos = ganhos_heuristicos(plant, t, setpoint, bounds)
+    sementes = np.random.SeedSequence(seed).spawn(repeticoes)
+
+    resultado = {}
+    for metodo in metodos:
+        trajetorias = {'uniforme': [], 'heuristica': []}
+        for semente in sementes:
+            trajetorias['uniforme'].append(
+                _trajetoria(_criar_otimizador(metodo, semente, None, bounds), plant, t, setpoint, geracoes))
+            trajetorias['heuristica'].append(
+                _trajetoria(_criar_otimizador(metodo, semente, heuristicos, bounds), plant, t, setpoint, geracoes))
+
+        alvo = min(m[-1] for modo in trajetorias.values() for _, m, _ in modo) * (1 + tolerancia)
+        resultado[metodo] = {modo: [avaliacoes_ate_alvo(a, m, alvo) for a, m, _ in trajs]
+                             for modo, trajs in trajetorias.items()}
+        resultado[metodo]['alvo'] = float(alvo)
+
+    imprimir_comparacao_inicializacao(resultado, repeticoes, tolerancia)
+    return resultado
+
+
+def _mediana(valores):
+    atingidos = [v for v in valores if v is not None]
+    return (np.median(atingidos) if atingidos else np.nan), len(atingidos)
+
+
+def imprimir_comparacao_inicializacao(resultado, repeticoes, tolerancia):
+    print("\n" + "="*70)
+    print("INICIALIZAÇÃO UNIFORME vs. SEMEADURA HEURÍSTICA (ZN1/CC)")
+    print("="*70)
+    print(f"Alvo: melhor MSE + {tolerancia * 100:.2f}% | Repetições: {repeticoes}")
+    print(f"{'Método':<10} {'Uniforme':>16} {'Heurística':>16} {'Redução':>10}")
+    print("-"*70)
+    for metodo, dados in resultado.items():
+        med_u, n_u = _mediana(dados['uniforme'])
+        med_h, n_h = _mediana(dados['heuristica'])
+        reducao = 1 - med_h / med_u if n_u and n_h else np.nan
+        print(f"{metodo:<10} {med_u:>9.0f} ({n_u:>2}/{repeticoes}) {med_h:>9.0f} ({n_h:>2}/{repeticoes}) "
+              f"{reducao * 100:>9.1f}%")
+    print("="*70)
+    print("Mediana das avaliações até o alvo (execuções que o atingiram)")
+
+
+def tempo_ate_otimo(plant, t, setpoint, mse_otimo, metodos=("GA", "PSO", "DE", "CMA-ES"),
+                    repeticoes=5, geracoes=100, tolerancias=(1e-2, 1e-3),
+                    bounds=((0, 0, 0), (20, 2, 5)), seed=0):
+    """
+    Avaliações e segundos até cada método chegar a `mse_otimo`·(1 + tol),
+    para cada tolerância, com `mse_otimo` o ótimo global da busca em grade
+    (grid_module.otimo_global).
+
+    Returns:
+        dict {método: {tol: [(avaliações, segundos) ou None, ...], 'final': [...]}}
+    """
+    sementes = np.random.SeedSequence(seed).spawn(repeticoes)
+
+    resultado = {}
+    for metodo in metodos:
+        trajs = [_trajetoria(_criar_otimizador(metodo, semente, None, bounds), plant, t, setpoint, geracoes)
+                 for semente in sementes]
+        resultado[metodo] = {'final': [float(m[-1]) for _, m, _ in trajs]}
+        for tol in tolerancias:
+            alvo = mse_otimo * (1 + tol)
+            ate_alvo = []
+            for a, m, s in trajs:
+                atingiu = np.nonzero(m <= alvo)[0]
+                ate_alvo.append((int(a[atingiu[0]]), float(s[atingiu[0]])) if len(atingiu) else None)
+            resultado[metodo][tol] = ate_alvo
+
+    imprimir_tempo_ate_otimo(resultado, mse_otimo, repeticoes, tolerancias)
+    return resultado
+
+
+def imprimir_tempo_ate_otimo(resultado, mse_otimo, repeticoes, tolerancias):
+    print("\n" + "="*70)
+    print("TEMPO ATÉ O ÓTIMO GLOBAL")
+    print("="*70)
+    print(f"Ótimo global: MSE = {mse_otimo:.6f} | Repetições: {repeticoes}")
+    for tol in tolerancias:
+        print(f"\nAlvo: ótimo + {tol * 100:g}%")
+        print(f"{'Método':<10} {'Avaliações':>12} {'Segundos':>10} {'Atingiram':>10} {'Gap final':>11}")
+        print("-"*70)
+        for metodo, dados in resultado.items():
+            atingidos = [v for v in dados[tol] if v is not None]
+            avaliacoes = np.median([v[0] for v in atingidos]) if atingidos else np.nan
+            segundos = np.median([v[1] for v in atingidos]) if atingidos else np.nan
+            gap = (np.median(dados['final']) / mse_otimo - 1) * 100
+            print(f"{metodo:<10} {avaliacoes:>12.0f} {segundos:>10.3f} {len(atingidos):>5}/{repeticoes:<4} "
+                  f"{gap:>10.4f}%")
+    print("="*70)
+    print("Medianas das execuções que atingiram o alvo; gap final = mediana do melhor MSE")
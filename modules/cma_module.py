@@ -1,8 +1,13 @@
 # pylint: disable="C0114, C0103, R0914, C0301, W0612"
 
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from db.db_module import salvar_historico_evolutivo
-from model.model import simulate, model
+from model.model import simulate, model, mse_batch
+from modules.fidelity_module import criar_avaliador
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import executar_otimizador, retomar_ou_criar
+from modules.limites_module import criar_na_escala
 
 
 def _mse_response(pid, t, setpoint, plant):
@@ -28,22 +33,342 @@ def _mse_response(pid, t, setpoint, plant):
     return mse
 
 
+class OtimizadorCMA:
+    """
+    Uma instância do CMA-ES no espaço normalizado [0, 1]^n, com interface
+    ask/tell (ask devolve ganhos em unidades físicas).
+
+    - A atualização rank-μ é um único produto matricial ponderado.
+    - A decomposição em autovalores de C só é recalculada quando o número de
+      avaliações desde a última atualização excede λ / (c1 + cμ) / n / 10.
+    - Amostras fora da caixa são avaliadas no ponto reparado (projetado nos
+      limites) somado a uma penalidade quadrática da violação, mas a
+      adaptação usa a amostra original, de modo que a distribuição não é
+      enviesada pelo corte.
+
+    `media_inicial` (ganhos em unidades físicas) substitui o centro da caixa
+    como média inicial, para warm start.
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), lam=None, sigma0=0.3, seed=None,
+                 tolx=1e-9, tolfun=1e-12, peso_penalidade=100.0, media_inicial=None):
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.escala = self.upper_bounds - self.lower_bounds
+        n = self.n = len(self.lower_bounds)
+        self.lam = lam if lam is not None else 4 + int(3 * np.log(n))
+        self.tolx, self.tolfun, self.peso_penalidade = tolx, tolfun, peso_penalidade
+        self.rng = criar_gerador(seed)
+
+        self.mu = self.lam // 2
+        self.weights = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights /= np.sum(self.weights)
+        self.mu_eff = 1 / np.sum(self.weights**2)
+        mu_eff = self.mu_eff
+
+        self.c_c = (4 + mu_eff / n) / (n + 4 + 2 * mu_eff / n)
+        self.c_sigma = (mu_eff + 2) / (n + mu_eff + 5)
+        self.c1 = 2 / ((n + 1.3)**2 + mu_eff)
+        self.c_mu = min(1 - self.c1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((n + 2)**2 + mu_eff))
+        self.d_sigma = 1 + 2 * max(0, np.sqrt((mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.chi_n = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n**2))
+
+        if media_inicial is None:
+            self.mean = np.full(n, 0.5)
+        else:
+            self.mean = np.clip((np.asarray(media_inicial, dtype=float) - self.lower_bounds) / self.escala, 0.0, 1.0)
+        self.sigma = sigma0
+        self.cov = np.eye(n)
+        self.B, self.D = np.eye(n), np.ones(n)
+        self.inv_sqrt_C = np.eye(n)
+        self.p_c, self.p_sigma = np.zeros(n), np.zeros(n)
+        self.avaliacoes, self.ultima_decomposicao = 0, 0
+
+        self.best_x, self.best_cost = self.mean.copy(), float("inf")
+        self.melhores_recentes = []
+        self.janela = 10 + int(np.ceil(30 * n / self.lam))
+        self.X = self.X_rep = None
+        self.geracao = 0
+        self.encerrado = False
+
+    def ask(self):
+        # Amostragem: y = B·diag(D)·z
+        z = self.rng.standard_normal((self.lam, self.n))
+        self.X = self.mean + self.sigma * ((z * self.D) @ self.B.T)
+        self.X_rep = np.clip(self.X, 0.0, 1.0)
+        return self.lower_bounds + self.escala * self.X_rep
+
+    def tell(self, custos):
+        n, lam, mu, weights = self.n, self.lam, self.mu, self.weights
+        c_c, c_sigma, c1, c_mu = self.c_c, self.c_sigma, self.c1, self.c_mu
+        custos_rep = np.asarray(custos, dtype=float)
+
+        # Penalidade proporcional à escala atual do custo
+        violacao = np.sum((self.X - self.X_rep)**2, axis=1)
+        self.avaliacoes += lam
+        custos = custos_rep + self.peso_penalidade * np.median(custos_rep) * violacao
+
+        ordem = np.argsort(custos)
+        X, X_rep, custos, custos_rep = self.X[ordem], self.X_rep[ordem], custos[ordem], custos_rep[ordem]
+
+        idx_rep = np.argmin(custos_rep)
+        if custos_rep[idx_rep] < self.best_cost:
+            self.best_cost = float(custos_rep[idx_rep])
+            self.best_x = X_rep[idx_rep].copy()
+        self.geracao += 1
+
+        # Média e caminhos de evolução
+        old_mean = self.mean
+        self.mean = weights @ X[:mu]
+        passo = (self.mean - old_mean) / self.sigma
+        self.p_sigma = (1 - c_sigma) * self.p_sigma + np.sqrt(c_sigma * (2 - c_sigma) * self.mu_eff) * (self.inv_sqrt_C @ passo)
+        norm_p_sigma = np.linalg.norm(self.p_sigma)
+        h_sigma = norm_p_sigma / np.sqrt(1 - (1 - c_sigma)**(2 * self.avaliacoes / lam)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.p_c = (1 - c_c) * self.p_c + h_sigma * np.sqrt(c_c * (2 - c_c) * self.mu_eff) * passo
+
+        # Covariância: rank-1 + rank-μ vetorizado
+        artmp = (X[:mu] - old_mean) / self.sigma
+        self.cov = ((1 - c1 - c_mu) * self.cov
+                    + c1 * (np.outer(self.p_c, self.p_c) + (1 - h_sigma) * c_c * (2 - c_c) * self.cov)
+                    + c_mu * (artmp.T * weights) @ artmp)
+
+        self.sigma *= np.exp((c_sigma / self.d_sigma) * (norm_p_sigma / self.chi_n - 1))
+
+        # Decomposição preguiçosa
+        if self.avaliacoes - self.ultima_decomposicao > lam / (c1 + c_mu) / n / 10:
+            self.ultima_decomposicao = self.avaliacoes
+            self.cov = np.triu(self.cov) + np.triu(self.cov, 1).T
+            D2, self.B = np.linalg.eigh(self.cov)
+            self.D = np.sqrt(np.maximum(D2, 1e-20))
+            self.inv_sqrt_C = (self.B / self.D) @ self.B.T
+
+        # Critérios de parada da instância
+        self.melhores_recentes.append(custos[0])
+        janela = self.janela
+        if (self.sigma * np.max(self.D) < self.tolx
+                or np.max(self.D) / np.min(self.D) > 1e7
+                or (len(self.melhores_recentes) >= janela
+                    and np.ptp(self.melhores_recentes[-janela:]) <= self.tolfun * max(abs(custos[0]), 1e-12))):
+            self.encerrado = True
+
+    def reavaliar(self, avaliar):
+        self.best_cost = float(avaliar((self.lower_bounds + self.escala * self.best_x)[None, :])[0])
+
+    @property
+    def melhor(self):
+        return self.lower_bounds + self.escala * self.best_x, self.best_cost
+
+
+def _executar_instancia_cma(plant, t, setpoint, lam, sigma0, generations, bounds, seed,
+                            avaliador=None, tolx=1e-9, tolfun=1e-12, peso_penalidade=100.0,
+                            media_inicial=None):
+    """
+    Executa uma instância do OtimizadorCMA até `generations` gerações ou
+    até um critério de parada interno.
+
+    Função de nível de módulo para poder rodar em processos separados.
+
+    Retorna:
+        dict com melhor solução (unidades físicas), custo, histórico por
+        geração (melhor, médio, pior), avaliações e gerações executadas.
+    """
+    otimizador = OtimizadorCMA(bounds, lam, sigma0, seed, tolx, tolfun, peso_penalidade, media_inicial)
+
+    def avaliar(ganhos):
+        if avaliador is not None:
+            return avaliador.avaliar(ganhos)
+        return mse_batch(plant, ganhos, t, setpoint)
+
+    historico = []
+    while otimizador.geracao < generations and not otimizador.encerrado:
+        custos_rep = avaliar(otimizador.ask())
+        otimizador.tell(custos_rep)
+        historico.append((otimizador.best_cost, float(np.mean(custos_rep)), float(np.max(custos_rep))))
+
+        if avaliador is not None and avaliador.atualizar(otimizador.geracao, generations, custos_rep):
+            otimizador.reavaliar(avaliador.avaliar)
+
+    best_x, best_cost = otimizador.melhor
+    return {
+        'best_x': best_x,
+        'best_cost': best_cost,
+        'historico': historico,
+        'avaliacoes': otimizador.avaliacoes,
+        'geracoes': len(historico),
+        'lam': otimizador.lam
+    }
+
+
+def _tune_pid_cma_instancia(plant, t, setpoint, generations, otimizador, db_path, avaliador,
+                            checkpoint=None):
+    """Executa um único OtimizadorCMA, salvando o histórico a cada geração."""
+
+    def avaliar(ganhos):
+        if avaliador is not None:
+            return avaliador.avaliar(ganhos)
+        return mse_batch(plant, ganhos, t, setpoint)
+
+    best_solution, best_cost = executar_otimizador(otimizador, avaliar, generations, "CMA-ES",
+                                                   db_path, avaliador, checkpoint=checkpoint)
+
+    if avaliador is not None:
+        best_solution, best_cost = avaliador.reavaliar_elite(best_solution[None, :], [best_cost])
+        avaliador.imprimir_resumo()
+
+    return best_solution, best_cost
+
+
+def _plano_reinicios(lam0, sigma0, reinicios, estrategia_reinicio, rng):
+    """
+    Define (λ, σ0) de cada instância antes da execução, o que torna as
+    instâncias independentes e permite rodá-las em paralelo.
+
+    - "ipop": λ dobra a cada reinício
+    - "bipop": alterna o regime de população grande (λ dobrando) com o de
+      população pequena, λ = ⌊λ0·(λ_grande / 2λ0)^(U²)⌋ e σ0·10^(-2U)
+    """
+    if estrategia_reinicio not in ("ipop", "bipop"):
+        raise ValueError(f"Estratégia de reinício desconhecida: {estrategia_reinicio}")
+    plano = [(lam0, sigma0)]
+    lam_grande = lam0
+    for k in range(1, reinicios + 1):
+        if estrategia_reinicio == "ipop" or k % 2 == 1:
+            lam_grande *= 2
+            plano.append((lam_grande, sigma0))
+        else:
+            u = rng.random()
+            lam_pequeno = max(lam0, int(lam0 * (lam_grande / (2 * lam0)) ** (u**2)))
+            plano.append((lam_pequeno, sigma0 * 10 ** (-2 * rng.random())))
+    return plano
+
+
+def _tune_pid_cma_reinicios(plant, t, setpoint, generations, lam0, sigma0, bounds, db_path,
+                            avaliador, reinicios, estrategia_reinicio, trabalhadores, rng,
+                            media_inicial=None):
+    """
+    Executa o plano de instâncias (sequencial ou em processos) e salva o
+    histórico. Só a primeira instância usa `media_inicial`; os reinícios
+    voltam ao centro da caixa para explorar.
+    """
+    plano = _plano_reinicios(lam0, sigma0, reinicios, estrategia_reinicio, rng)
+    sementes = rng.spawn(len(plano))
+    medias = [media_inicial] + [None] * (len(plano) - 1)
+
+    if trabalhadores > 1 and len(plano) > 1:
+        if avaliador is not None:
+            raise ValueError("Multi-fidelidade não é suportada com trabalhadores > 1")
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            futuros = [executor.submit(_executar_instancia_cma, plant, t, setpoint, lam, sig,
+                                       generations, bounds, semente, media_inicial=media)
+                       for (lam, sig), semente, media in zip(plano, sementes, medias)]
+            instancias = [f.result() for f in futuros]
+    else:
+        instancias = [_executar_instancia_cma(plant, t, setpoint, lam, sig, generations, bounds,
+                                              semente, avaliador, media_inicial=media)
+                      for (lam, sig), semente, media in zip(plano, sementes, medias)]
+
+    # Histórico contínuo: gerações numeradas em sequência ao longo das instâncias
+    best_cost, best_solution, geracao = float("inf"), None, 0
+    for k, inst in enumerate(instancias):
+        print(f"Instância {k+1}/{len(instancias)} (λ = {inst['lam']}) | "
+              f"{inst['geracoes']} gerações | Melhor: {inst['best_cost']:.6f}")
+        for melhor, medio, pior in inst['historico']:
+            geracao += 1
+            best_cost = min(best_cost, melhor)
+            salvar_historico_evolutivo("CMA-ES", geracao, best_cost, medio, pior, db_path)
+        if inst['best_cost'] <= best_cost:
+            best_solution = inst['best_x']
+
+    if avaliador is not None:
+        candidatos = np.array([inst['best_x'] for inst in instancias])
+        custos = np.array([inst['best_cost'] for inst in instancias])
+        best_solution, best_cost = avaliador.reavaliar_elite(candidatos, custos)
+        avaliador.imprimir_resumo()
+
+    return best_solution, best_cost
+
+
 def tune_pid_cma(plant=None, t=None, setpoint=1.0,
                  generations=50, population_size=None,
                  sigma0=0.3,
                  bounds=((0, 0, 0), (20, 2, 5)),
-                 db_path="db/pid_results.db"):
-    """Ajuste PID usando CMA-ES com histórico."""
+                 db_path="db/pid_results.db", multi_fidelidade=False,
+                 vetorizado=False, reinicios=0, estrategia_reinicio="ipop",
+                 trabalhadores=1, seed=None, checkpoint=None, ganhos_iniciais=None, escala_log=False):
+    """
+    Ajuste PID usando CMA-ES com histórico.
+
+    Com vetorizado=True usa o núcleo CMA-ES no espaço normalizado pelos
+    limites (sigma0 relativo à largura da caixa), com rank-μ vetorizado,
+    decomposição preguiçosa, tratamento de limites por penalidade e
+    reinícios IPOP/BIPOP (`reinicios` instâncias adicionais, executadas em
+    `trabalhadores` processos).
+
+    `seed` (inteiro, SeedSequence ou np.random.Generator) define o fluxo
+    aleatório da execução sem usar o estado global do np.random.
+
+    `checkpoint` (CheckpointGeracao) salva o estado do otimizador a cada
+    geração e retoma dele, se existir; vale para o motor em arrays sem
+    reinícios.
+
+    `ganhos_iniciais` (array (m, 3), ex.: de buscar_aquecimento ou
+    ganhos_heuristicos) faz o warm start: a média inicial parte do
+    primeiro (melhor) ganho.
+
+    `escala_log=True` faz o motor em arrays sem reinícios buscar em escala
+    logarítmica normalizada dos ganhos dentro de `bounds` (ver
+    limites_module).
+    """
 
     if plant is None:
         plant = model(59.81, 401.61)
     if t is None:
         t = np.linspace(0, 2000, 1000)
 
+    # Avaliador multi-fidelidade (None = grade completa sempre)
+    avaliador = criar_avaliador(multi_fidelidade, plant, t, setpoint)
+    rng = criar_gerador(seed)
+
+    media_inicial = None
+    if ganhos_iniciais is not None and len(ganhos_iniciais) > 0:
+        media_inicial = np.atleast_2d(ganhos_iniciais)[0]
+
+    if vetorizado:
+        n = len(bounds[0])
+        lam0 = population_size if population_size is not None else 4 + int(3 * np.log(n))
+        if reinicios == 0:
+            # Instância única: mesmo fluxo aleatório da primeira instância do plano de reinícios
+            otimizador, avaliador = retomar_ou_criar(
+                checkpoint,
+                lambda: criar_na_escala(
+                    lambda b, m: OtimizadorCMA(b, lam0, sigma0, seed=rng.spawn(1)[0], media_inicial=m),
+                    bounds, media_inicial, escala_log),
+                avaliador)
+            best_solution, best_cost = _tune_pid_cma_instancia(plant, t, setpoint, generations, otimizador,
+                                                               db_path, avaliador, checkpoint)
+        else:
+            best_solution, best_cost = _tune_pid_cma_reinicios(
+                plant, t, setpoint, generations, lam0, sigma0, bounds, db_path, avaliador,
+                reinicios, estrategia_reinicio, trabalhadores, rng, media_inicial)
+
+        Kp, Ki, Kd = best_solution
+        print("\nParâmetros PID via CMA-ES (vetorizado):")
+        print(f"Kp = {Kp:.4f}")
+        print(f"Ki = {Ki:.4f}")
+        print(f"Kd = {Kd:.4f}")
+        print(f"Custo (MSE) = {best_cost:.6f}")
+
+        return Kp, Ki, Kd
+
+    def custo(x):
+        if avaliador is not None:
+            return avaliador.mse(x)
+        return _mse_response(x, t, setpoint, plant)
+
     lower_bounds, upper_bounds = np.array(bounds[0]), np.array(bounds[1])
     n = 3
 
-    mean = (lower_bounds + upper_bounds) / 2
+    mean = (lower_bounds + upper_bounds) / 2 if media_inicial is None else np.clip(media_inicial, lower_bounds, upper_bounds)
 
     if population_size is None:
         lam = 4 + int(3 * np.log(n))
@@ -78,14 +403,14 @@ def tune_pid_cma(plant=None, t=None, setpoint=1.0,
     for gen in range(generations):
         # Amostragem da população
         A = np.linalg.cholesky(cov)
-        z = np.random.randn(lam, n)
+        z = rng.standard_normal((lam, n))
         X = mean + sigma * (z @ A.T)
 
         # Aplica limites
         X = np.clip(X, lower_bounds, upper_bounds)
 
         # Avalia população
-        costs = np.array([_mse_response(x, t, setpoint, plant) for x in X])
+        costs = np.array([custo(x) for x in X])
         idx_sorted = np.argsort(costs)
         X = X[idx_sorted]
         z = z[idx_sorted]
@@ -97,7 +422,8 @@ def tune_pid_cma(plant=None, t=None, setpoint=1.0,
             best_solution = X[0].copy()
 
         # Salva histórico da geração
-        salvar_historico_evolutivo("CMA-ES", gen + 1, best_cost, np.mean(costs), np.max(costs), db_path)
+        salvar_historico_evolutivo("CMA-ES", gen + 1, best_cost, np.mean(costs), np.max(costs), db_path,
+                                   ganhos=best_solution)
 
         # Atualização da média
         old_mean = mean.copy()
@@ -127,6 +453,16 @@ def tune_pid_cma(plant=None, t=None, setpoint=1.0,
 
         print(f"Geração {gen+1}/{generations} | Melhor: {best_cost:.6f} | Médio: {np.mean(costs):.6f}")
 
+        # Ao elevar a fidelidade, o melhor global é reavaliado na nova grade
+        if avaliador is not None and avaliador.atualizar(gen + 1, generations, costs):
+            best_cost = avaliador.mse(best_solution)
+
+    if avaliador is not None:
+        # Elite (melhor global + última população) reavaliada na grade completa
+        best_solution, best_cost = avaliador.reavaliar_elite(np.vstack([best_solution, X]),
+                                                             np.concatenate([[best_cost], costs]))
+        avaliador.imprimir_resumo()
+
     Kp, Ki, Kd = best_solution
     print("\nParâmetros PID via CMA-ES:")
     print(f"Kp = {Kp:.4f}")
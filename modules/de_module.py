@@ -2,7 +2,12 @@
 
 import numpy as np
 from db.db_module import salvar_historico_evolutivo
-from model.model import simulate, model
+from model.model import simulate, model, mse_batch
+from modules.fidelity_module import criar_avaliador
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import executar_otimizador, retomar_ou_criar
+from modules.warmstart_module import populacao_inicial, aquecer_populacao
+from modules.limites_module import criar_na_escala
 
 
 def _mse_response(pid, t, setpoint, plant):
@@ -33,12 +38,148 @@ def _mse_response(pid, t, setpoint, plant):
     return mse
 
 
+def _indices_doadores(pop_size, rng, n_doadores=3):
+    """
+    Sorteia, para todos os indivíduos de uma vez, `n_doadores` índices
+    distintos entre si e diferentes do próprio indivíduo.
+
+    Cada novo índice é sorteado em um intervalo reduzido e deslocado sobre
+    os índices já excluídos (em ordem crescente), o que custa O(pop_size)
+    por geração em vez de montar a lista de candidatos de cada indivíduo.
+
+    Retorna:
+        matriz (pop_size, n_doadores) de índices
+    """
+    excluidos = np.arange(pop_size)[:, None]
+    for k in range(n_doadores):
+        r = rng.integers(0, pop_size - 1 - k, size=pop_size)
+        for coluna in np.sort(excluidos, axis=1).T:
+            r += r >= coluna
+        excluidos = np.column_stack([excluidos, r])
+    return excluidos[:, 1:]
+
+
+class OtimizadorDE:
+    """
+    DE com interface ask/tell: doadores, mutantes e máscaras de crossover
+    de toda a geração são gerados de uma vez e os vetores de teste são
+    pedidos para avaliação em lote.
+
+    Estratégias: "rand/1", "best/1" e "current-to-best/1" (todas com
+    crossover binomial).
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), pop_size=20, F=0.8, CR=0.9,
+                 estrategia="rand/1", seed=None, ganhos_iniciais=None):
+        if pop_size < 4:
+            raise ValueError("O DE requer pop_size >= 4")
+        if estrategia not in ("rand/1", "best/1", "current-to-best/1"):
+            raise ValueError(f"Estratégia desconhecida: {estrategia}")
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.pop_size = pop_size
+        self.F, self.CR = F, CR
+        self.estrategia = estrategia
+        self.rng = criar_gerador(seed)
+
+        self.pop = populacao_inicial(self.rng, bounds, pop_size, ganhos_iniciais)
+        self.costs = None
+        self.trials = None
+        self.geracao = -1
+        self.encerrado = False
+
+    def ask(self):
+        if self.costs is None:
+            self.trials = self.pop
+            return self.trials
+
+        pop, F = self.pop, self.F
+        dim = pop.shape[1]
+
+        # Mutação
+        doadores = _indices_doadores(self.pop_size, self.rng)
+        a, b, c = pop[doadores[:, 0]], pop[doadores[:, 1]], pop[doadores[:, 2]]
+        best = pop[np.argmin(self.costs)]
+        if self.estrategia == "rand/1":
+            mutants = a + F * (b - c)
+        elif self.estrategia == "best/1":
+            mutants = best + F * (a - b)
+        else:
+            mutants = pop + F * (best - pop) + F * (a - b)
+        np.clip(mutants, self.lower_bounds, self.upper_bounds, out=mutants)
+
+        # Crossover binomial
+        cross = self.rng.random((self.pop_size, dim)) < self.CR
+        cross[np.arange(self.pop_size), self.rng.integers(dim, size=self.pop_size)] = True
+        self.trials = np.where(cross, mutants, pop)
+        return self.trials
+
+    def tell(self, custos):
+        custos = np.asarray(custos, dtype=float)
+        if self.costs is None:
+            self.costs = custos.copy()
+        else:
+            # Seleção
+            melhorou = custos < self.costs
+            self.pop[melhorou] = self.trials[melhorou]
+            self.costs[melhorou] = custos[melhorou]
+        self.geracao += 1
+
+    def reavaliar(self, avaliar):
+        self.costs = np.asarray(avaliar(self.pop), dtype=float)
+
+    @property
+    def melhor(self):
+        idx = int(np.argmin(self.costs))
+        return self.pop[idx].copy(), float(self.costs[idx])
+
+
+def _tune_pid_de_vetorizado(plant, t, setpoint, generations, otimizador, db_path, avaliador,
+                            checkpoint=None):
+    """Executa o OtimizadorDE com avaliação dos vetores de teste em lote."""
+
+    def avaliar(pop):
+        if avaliador is not None:
+            return avaliador.avaliar(pop)
+        return mse_batch(plant, pop, t, setpoint)
+
+    best, best_cost = executar_otimizador(otimizador, avaliar, generations, "DE", db_path, avaliador,
+                                          checkpoint=checkpoint)
+
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        best, best_cost = avaliador.reavaliar_elite(otimizador.pop, otimizador.costs)
+        avaliador.imprimir_resumo()
+
+    return best, best_cost
+
+
 def tune_pid_de(plant=None, t=None, setpoint=1.0,
                 pop_size=20, generations=50,
                 F=0.8, CR=0.9,
                 bounds=((0, 0, 0), (20, 2, 5)),
-                db_path="db/pid_results.db"):
-    """Ajuste PID usando Differential Evolution com histórico."""
+                db_path="db/pid_results.db", multi_fidelidade=False,
+                vetorizado=False, estrategia="rand/1", seed=None,
+                checkpoint=None, ganhos_iniciais=None, escala_log=False):
+    """
+    Ajuste PID usando Differential Evolution com histórico.
+
+    Com vetorizado=True a geração inteira é processada em arrays e avaliada
+    em lote, com estratégia "rand/1", "best/1" ou "current-to-best/1".
+
+    `seed` (inteiro, SeedSequence ou np.random.Generator) define o fluxo
+    aleatório da execução sem usar o estado global do np.random.
+
+    `checkpoint` (CheckpointGeracao) salva o estado do otimizador a cada
+    geração e retoma dele, se existir; vale apenas para o motor em arrays.
+
+    `ganhos_iniciais` (array (m, 3), ex.: de buscar_aquecimento ou
+    ganhos_heuristicos) faz o warm start: parte da população inicial é
+    sorteada ao redor desses ganhos.
+
+    `escala_log=True` faz o motor em arrays buscar em escala logarítmica
+    normalizada dos ganhos dentro de `bounds` (ver limites_module).
+    """
 
     if plant is None:
         plant = model(59.81, 401.61)
@@ -46,20 +187,49 @@ def tune_pid_de(plant=None, t=None, setpoint=1.0,
     if t is None:
         t = np.linspace(0, 2000, 1000)
 
+    # Avaliador multi-fidelidade (None = grade completa sempre)
+    avaliador = criar_avaliador(multi_fidelidade, plant, t, setpoint)
+    rng = criar_gerador(seed)
+
+    if vetorizado:
+        otimizador, avaliador = retomar_ou_criar(
+            checkpoint,
+            lambda: criar_na_escala(
+                lambda b, g: OtimizadorDE(b, pop_size, F, CR, estrategia, seed=rng, ganhos_iniciais=g),
+                bounds, ganhos_iniciais, escala_log),
+            avaliador)
+        best, best_cost = _tune_pid_de_vetorizado(plant, t, setpoint, generations, otimizador,
+                                                  db_path, avaliador, checkpoint)
+
+        Kp, Ki, Kd = best
+        print("\nParâmetros PID via DE (vetorizado):")
+        print(f"Kp = {Kp:.4f}")
+        print(f"Ki = {Ki:.4f}")
+        print(f"Kd = {Kd:.4f}")
+        print(f"Custo (MSE) = {best_cost:.6f}")
+
+        return Kp, Ki, Kd
+
+    def custo(ind):
+        if avaliador is not None:
+            return avaliador.mse(ind)
+        return _mse_response(ind, t, setpoint, plant)
+
     lower_bounds, upper_bounds = np.array(bounds[0]), np.array(bounds[1])
     dim = 3
 
     # Inicialização da população
-    pop = np.random.uniform(low=lower_bounds, high=upper_bounds, size=(pop_size, dim))
+    pop = rng.uniform(low=lower_bounds, high=upper_bounds, size=(pop_size, dim))
+    aquecer_populacao(pop, rng, bounds, ganhos_iniciais)
 
     # Avalia custo inicial
-    costs = np.array([_mse_response(ind, t, setpoint, plant) for ind in pop])
+    costs = np.array([custo(ind) for ind in pop])
     best_idx = np.argmin(costs)
     best = pop[best_idx].copy()
     best_cost = costs[best_idx]
 
     # Salva histórico inicial
-    salvar_historico_evolutivo("DE", 0, float(best_cost), np.mean(costs), np.max(costs), db_path)
+    salvar_historico_evolutivo("DE", 0, float(best_cost), np.mean(costs), np.max(costs), db_path, ganhos=best)
     
     print(f"Inicialização -> Melhor custo = {best_cost:.6f}")
 
@@ -68,20 +238,20 @@ def tune_pid_de(plant=None, t=None, setpoint=1.0,
         for i in range(pop_size):
             # Mutação
             idxs = [idx for idx in range(pop_size) if idx != i]
-            a, b, c = pop[np.random.choice(idxs, 3, replace=False)]
+            a, b, c = pop[rng.choice(idxs, 3, replace=False)]
             mutant = a + F * (b - c)
 
             # Restringe dentro dos limites
             mutant = np.clip(mutant, lower_bounds, upper_bounds)
 
             # Crossover
-            cross = np.random.rand(dim) < CR
-            jrand = np.random.randint(dim)
+            cross = rng.random(dim) < CR
+            jrand = rng.integers(dim)
             cross[jrand] = True
             trial = np.where(cross, mutant, pop[i])
 
             # Seleção
-            trial_cost = _mse_response(trial, t, setpoint, plant)
+            trial_cost = custo(trial)
             if trial_cost < costs[i]:
                 pop[i] = trial
                 costs[i] = trial_cost
@@ -91,10 +261,23 @@ def tune_pid_de(plant=None, t=None, setpoint=1.0,
                     best = trial.copy()
 
         # Salva histórico da geração
-        salvar_historico_evolutivo("DE", gen + 1, float(best_cost), np.mean(costs), np.max(costs), db_path)
+        salvar_historico_evolutivo("DE", gen + 1, float(best_cost), np.mean(costs), np.max(costs), db_path,
+                                   ganhos=best)
         
         print(f"Geração {gen+1}/{generations} | Melhor: {best_cost:.6f} | Médio: {np.mean(costs):.6f}")
 
+        # Ao elevar a fidelidade, a população é reavaliada na nova grade
+        if avaliador is not None and avaliador.atualizar(gen + 1, generations, costs):
+            costs = avaliador.avaliar(pop)
+            best_idx = np.argmin(costs)
+            best = pop[best_idx].copy()
+            best_cost = costs[best_idx]
+
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        best, best_cost = avaliador.reavaliar_elite(pop, costs)
+        avaliador.imprimir_resumo()
+
     Kp, Ki, Kd = best
     print("\nParâmetros PID via DE:")
     print(f"Kp = {Kp:.4f}")
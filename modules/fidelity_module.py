@@ -0,0 +1,245 @@
+# pylint: disable="C0114, C0103, R0902, R0913, R0914, R0917, C0301"
+
+"""
+Avaliação multi-fidelidade para os algoritmos evolutivos.
+
+Nas primeiras gerações os candidatos são avaliados em uma grade de tempo
+dizimada (t[::fator]) e a fidelidade é elevada à medida que a população
+converge. Ao final, os melhores candidatos (elite) são reavaliados na
+grade completa, de modo que o resultado retornado é sempre comparável ao
+de uma execução em fidelidade total.
+"""
+
+import time
+import numpy as np
+from model.model import simulate, model, mse_batch
+
+
+def _mse_response(pid, t, setpoint, plant):
+    """Calcula o MSE da resposta do sistema para um conjunto de parâmetros PID."""
+    Kp, Ki, Kd = pid
+    try:
+        _, Y_resp = simulate(plant, Kp, Ki, Kd, t, setpoint)
+        mse = np.mean((Y_resp - setpoint) ** 2)
+    except Exception:
+        mse = 1e6  # penaliza simulações instáveis
+    return mse
+
+
+class AvaliadorMultiFidelidade:
+    """
+    Avaliador de custo (MSE) com fidelidade crescente.
+
+    Args:
+        plant: Função de transferência da planta
+        t: Vetor de tempo completo (fidelidade total)
+        setpoint: Valor de referência
+        niveis: Fatores de dizimação, do mais grosso ao mais fino
+        tolerancia: Dispersão relativa (mediana - melhor) / melhor abaixo
+            da qual a população é considerada convergida no nível atual
+        fracao_final: Fração final das gerações sempre avaliada em
+            fidelidade total
+        pontos_minimos: Número mínimo de pontos de uma grade dizimada
+    """
+
+    def __init__(self, plant, t, setpoint=1.0, niveis=(8, 4, 2, 1),
+                 tolerancia=0.05, fracao_final=0.25, pontos_minimos=50):
+        self.plant = plant
+        self.t = np.asarray(t)
+        self.setpoint = setpoint
+        self.tolerancia = tolerancia
+        self.fracao_final = fracao_final
+
+        # Descarta níveis que deixariam a grade com poucos pontos
+        niveis = [int(f) for f in niveis if f > 1 and len(self.t[::int(f)]) >= pontos_minimos]
+        self.niveis = sorted(set(niveis), reverse=True) + [1]
+        self.nivel = 0
+
+        # Contadores de custo
+        self.avaliacoes = 0
+        self.pontos_simulados = 0
+        self.tempo_simulacao = 0.0
+
+    @property
+    def fator(self):
+        """Fator de dizimação do nível atual."""
+        return self.niveis[self.nivel]
+
+    @property
+    def fidelidade_total(self):
+        """True se o nível atual já é a grade completa."""
+        return self.fator == 1
+
+    def _avaliar_na_grade(self, pid, t):
+        inicio = time.perf_counter()
+        mse = _mse_response(pid, t, self.setpoint, self.plant)
+        self.tempo_simulacao += time.perf_counter() - inicio
+        self.avaliacoes += 1
+        self.pontos_simulados += len(t)
+        return mse
+
+    def mse(self, pid):
+        """MSE de um candidato na fidelidade atual."""
+        return self._avaliar_na_grade(pid, self.t[::self.fator])
+
+    def mse_completo(self, pid):
+        """MSE de um candidato na grade completa."""
+        return self._avaliar_na_grade(pid, self.t)
+
+    def _avaliar_lote_na_grade(self, pop, t):
+        pop = np.atleast_2d(pop)
+        inicio = time.perf_counter()
+        custos = mse_batch(self.plant, pop, t, self.setpoint)
+        self.tempo_simulacao += time.perf_counter() - inicio
+        self.avaliacoes += len(pop)
+        self.pontos_simulados += len(pop) * len(t)
+        return custos
+
+    def avaliar(self, pop):
+        """MSE de cada indivíduo da população na fidelidade atual (em lote)."""
+        return self._avaliar_lote_na_grade(pop, self.t[::self.fator])
+
+    def atualizar(self, geracao, geracoes, custos):
+        """
+        Eleva a fidelidade quando a população converge no nível atual ou
+        quando o cronograma mínimo de gerações é atingido.
+
+        Args:
+            geracao: Geração recém-concluída (1..geracoes)
+            geracoes: Total de gerações da execução
+            custos: Custos da população na fidelidade atual
+
+        Returns:
+            True se a fidelidade foi elevada (custos guardados pelo
+            algoritmo devem ser reavaliados).
+        """
+        if self.fidelidade_total:
+            return False
+
+        custos = np.asarray(custos, dtype=float)
+        melhor = np.min(custos)
+        dispersao = (np.median(custos) - melhor) / (abs(melhor) + 1e-12)
+
+        # Cronograma: níveis grossos distribuídos na parte inicial da execução
+        n_grossos = len(self.niveis) - 1
+        limite = geracoes * (1 - self.fracao_final)
+        nivel_minimo = min(n_grossos, int(n_grossos * geracao / max(limite, 1)))
+
+        novo_nivel = max(nivel_minimo, self.nivel + 1 if dispersao < self.tolerancia else self.nivel)
+        novo_nivel = min(novo_nivel, n_grossos)
+
+        if novo_nivel == self.nivel:
+            return False
+
+        self.nivel = novo_nivel
+        print(f"   ↑ Fidelidade elevada: grade t[::{self.fator}] ({len(self.t[::self.fator])} pontos)")
+        return True
+
+    def reavaliar_elite(self, candidatos, custos, n_elite=3):
+        """
+        Reavalia os melhores candidatos na grade completa.
+
+        Returns:
+            (melhor_candidato, mse_completo)
+        """
+        candidatos = np.asarray(candidatos)
+        ordem = np.argsort(custos)[:n_elite]
+        custos_completos = self._avaliar_lote_na_grade(candidatos[ordem], self.t)
+        idx = int(np.argmin(custos_completos))
+        return candidatos[ordem[idx]].copy(), float(custos_completos[idx])
+
+    def resumo(self):
+        """Contabiliza a economia em relação a avaliar tudo na grade completa."""
+        referencia = self.avaliacoes * len(self.t)
+        economia = 1 - self.pontos_simulados / referencia if referencia else 0.0
+        return {
+            'avaliacoes': self.avaliacoes,
+            'pontos_simulados': self.pontos_simulados,
+            'pontos_referencia': referencia,
+            'economia': economia,
+            'tempo_simulacao': self.tempo_simulacao
+        }
+
+    def imprimir_resumo(self):
+        r = self.resumo()
+        print(f"Multi-fidelidade: {r['avaliacoes']} avaliações, "
+              f"{r['pontos_simulados']}/{r['pontos_referencia']} pontos simulados "
+              f"(economia de {r['economia'] * 100:.1f}%)")
+
+
+def criar_avaliador(multi_fidelidade, plant, t, setpoint):
+    """
+    Normaliza o parâmetro `multi_fidelidade` dos tuners.
+
+    Aceita False/None (desativado), True (configuração padrão) ou uma
+    instância de AvaliadorMultiFidelidade já configurada.
+    """
+    if not multi_fidelidade:
+        return None
+    if isinstance(multi_fidelidade, AvaliadorMultiFidelidade):
+        return multi_fidelidade
+    return AvaliadorMultiFidelidade(plant, t, setpoint)
+
+
+def comparar_multi_fidelidade(tune_func, plant=None, t=None, setpoint=1.0,
+                              repeticoes=3, db_path="db/pid_results.db", **kwargs):
+    """
+    Compara execuções em fidelidade total e multi-fidelidade do mesmo tuner.
+
+    Cada repetição usa a mesma semente nos dois modos. O MSE final de ambos
+    é medido na grade completa.
+
+    Args:
+        tune_func: Função tune_pid_* (GA, PSO, DE ou CMA-ES)
+        repeticoes: Número de pares de execuções
+        **kwargs: Repassados ao tuner (ex.: generations=30)
+
+    Returns:
+        dict com economia média de pontos simulados, tempos e a
+        diferença relativa do MSE final (multi-fidelidade vs. total)
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 2000, 1000)
+
+    linhas = []
+    for rep in range(repeticoes):
+        inicio = time.perf_counter()
+        ganhos_total = tune_func(plant, t, setpoint, db_path=db_path, seed=rep, **kwargs)
+        tempo_total = time.perf_counter() - inicio
+
+        avaliador = AvaliadorMultiFidelidade(plant, t, setpoint)
+        inicio = time.perf_counter()
+        ganhos_mf = tune_func(plant, t, setpoint, db_path=db_path, seed=rep,
+                              multi_fidelidade=avaliador, **kwargs)
+        tempo_mf = time.perf_counter() - inicio
+
+        mse_total = _mse_response(ganhos_total, t, setpoint, plant)
+        mse_mf = _mse_response(ganhos_mf, t, setpoint, plant)
+        linhas.append((mse_total, mse_mf, tempo_total, tempo_mf, avaliador.resumo()['economia']))
+
+    dados = np.array(linhas)
+    diferenca = (dados[:, 1] - dados[:, 0]) / np.maximum(dados[:, 0], 1e-12)
+
+    resultado = {
+        'mse_total': dados[:, 0].tolist(),
+        'mse_multi_fidelidade': dados[:, 1].tolist(),
+        'diferenca_relativa_media': float(np.mean(diferenca)),
+        'diferenca_relativa_max': float(np.max(np.abs(diferenca))),
+        'economia_pontos_media': float(np.mean(dados[:, 4])),
+        'tempo_total_medio': float(np.mean(dados[:, 2])),
+        'tempo_multi_fidelidade_medio': float(np.mean(dados[:, 3]))
+    }
+
+    print("\n" + "="*70)
+    print("COMPARAÇÃO: FIDELIDADE TOTAL vs. MULTI-FIDELIDADE")
+    print("="*70)
+    print(f"Repetições: {repeticoes}")
+    print(f"Economia média de pontos simulados: {resultado['economia_pontos_media'] * 100:.1f}%")
+    print(f"Tempo médio: {resultado['tempo_total_medio']:.2f}s → {resultado['tempo_multi_fidelidade_medio']:.2f}s")
+    print(f"Diferença relativa do MSE final: média {resultado['diferenca_relativa_media'] * 100:+.3f}%, "
+          f"máx |{resultado['diferenca_relativa_max'] * 100:.3f}%|")
+    print("="*70)
+
+    return resultado
@@ -1,8 +1,15 @@
 # pylint: disable="C0114, C0103, R0914, C0301"
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from db.db_module import salvar_historico_evolutivo
-from model.model import simulate, model
+from model.model import simulate, model, mse_batch
+from modules.fidelity_module import criar_avaliador
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import executar_otimizador, retomar_ou_criar
+from modules.warmstart_module import populacao_inicial, aquecer_populacao
+from modules.limites_module import criar_na_escala
 
 def fitness_ga(solution, plant, t, setpoint):
     Kp, Ki, Kd = solution
@@ -14,42 +21,340 @@ def fitness_ga(solution, plant, t, setpoint):
     return -mse  # negativo porque queremos minimizar o erro
 
 
+def _selecionar(custos, n, selecao, tamanho_torneio, rng):
+    """
+    Seleciona n índices de pais de uma vez (menor custo = melhor).
+
+    - "torneio": cada pai é o melhor de `tamanho_torneio` sorteados
+    - "ranking": probabilidade linear no ranking, independente da escala do MSE
+    """
+    pop_size = len(custos)
+    if selecao == "torneio":
+        competidores = rng.integers(0, pop_size, size=(n, tamanho_torneio))
+        vencedor = np.argmin(custos[competidores], axis=1)
+        return competidores[np.arange(n), vencedor]
+    if selecao == "ranking":
+        ranks = np.empty(pop_size)
+        ranks[np.argsort(custos)] = np.arange(pop_size, 0, -1)
+        return rng.choice(pop_size, size=n, p=ranks / ranks.sum())
+    raise ValueError(f"Seleção desconhecida: {selecao}")
+
+
+def _proxima_geracao(pop, mse_vals, filhos, rng, lower_bounds, upper_bounds,
+                     selecao, tamanho_torneio, elitismo, alpha_blx, taxa_mutacao):
+    """
+    Gera a próxima população no buffer `filhos`: elitismo, seleção,
+    crossover BLX-α e mutação por máscara de genes, tudo em arrays.
+    """
+    population_size, dim = pop.shape
+    n_elite = min(elitismo, population_size)
+    n_filhos = population_size - n_elite
+
+    # Elitismo
+    filhos[:n_elite] = pop[np.argsort(mse_vals)[:n_elite]]
+
+    # Seleção dos pares de pais
+    pais = _selecionar(mse_vals, 2 * n_filhos, selecao, tamanho_torneio, rng)
+    p1, p2 = pop[pais[:n_filhos]], pop[pais[n_filhos:]]
+
+    # Crossover BLX-α (gene a gene)
+    u = rng.uniform(-alpha_blx, 1 + alpha_blx, size=(n_filhos, dim))
+    np.multiply(u, p2 - p1, out=filhos[n_elite:])
+    filhos[n_elite:] += p1
+
+    # Mutação: reinicialização uniforme dos genes sorteados pela máscara
+    mascara = rng.random((n_filhos, dim)) < taxa_mutacao
+    sorteio = rng.uniform(lower_bounds, upper_bounds, size=(n_filhos, dim))
+    np.copyto(filhos[n_elite:], sorteio, where=mascara)
+
+    np.clip(filhos, lower_bounds, upper_bounds, out=filhos)
+    return filhos
+
+
+class OtimizadorGA:
+    """
+    GA em arrays com interface ask/tell.
+
+    Seleção (torneio ou ranking), crossover BLX-α, mutação por máscara de
+    genes e elitismo são aplicados em operações de array. A população e a
+    geração de filhos usam dois buffers pré-alocados que se alternam.
+
+    ask() devolve a população inicial e, depois de cada tell, os filhos da
+    geração seguinte.
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), population_size=20,
+                 selecao="torneio", tamanho_torneio=3, elitismo=2,
+                 alpha_blx=0.5, taxa_mutacao=0.1, seed=None, ganhos_iniciais=None):
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.operadores = {'selecao': selecao, 'tamanho_torneio': tamanho_torneio, 'elitismo': elitismo,
+                           'alpha_blx': alpha_blx, 'taxa_mutacao': taxa_mutacao}
+        self.rng = criar_gerador(seed)
+
+        # Buffers da geração atual e da próxima
+        self.pop = populacao_inicial(self.rng, bounds, population_size, ganhos_iniciais)
+        self.filhos = np.empty_like(self.pop)
+        self.custos = None
+        self.geracao = 0
+        self.encerrado = False
+
+    def ask(self):
+        if self.custos is not None:
+            self.pop, self.filhos = _proxima_geracao(self.pop, self.custos, self.filhos, self.rng,
+                                                     self.lower_bounds, self.upper_bounds,
+                                                     **self.operadores), self.pop
+            self.custos = None
+        return self.pop
+
+    def tell(self, custos):
+        self.custos = np.array(custos, dtype=float)
+        self.geracao += 1
+
+    def reavaliar(self, avaliar):
+        self.custos = np.asarray(avaliar(self.pop), dtype=float)
+
+    @property
+    def melhor(self):
+        idx = int(np.argmin(self.custos))
+        return self.pop[idx].copy(), float(self.custos[idx])
+
+
+def _tune_pid_ga_vetorizado(plant, t, setpoint, generations, otimizador, db_path, avaliador,
+                            checkpoint=None):
+    """Executa o OtimizadorGA com avaliação da população em lote."""
+
+    def avaliar(pop):
+        if avaliador is not None:
+            return avaliador.avaliar(pop)
+        return mse_batch(plant, pop, t, setpoint)
+
+    best_solution, best_mse = executar_otimizador(otimizador, avaliar, generations, "GA",
+                                                  db_path, avaliador, checkpoint=checkpoint)
+
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        best_solution, best_mse = avaliador.reavaliar_elite(otimizador.pop, otimizador.custos)
+        avaliador.imprimir_resumo()
+
+    return best_solution, best_mse
+
+
+def _evoluir_ilha(plant, t, setpoint, otimizador, geracoes):
+    """
+    Evolui uma ilha por `geracoes` gerações (uma época entre migrações).
+
+    Função de nível de módulo para poder rodar em processos separados; o
+    otimizador (com seu gerador aleatório) é devolvido para a próxima época.
+
+    Retorna:
+        (otimizador, historico)
+    """
+    historico = []
+    for _ in range(geracoes):
+        custos = mse_batch(plant, otimizador.ask(), t, setpoint)
+        otimizador.tell(custos)
+        historico.append((float(np.min(custos)), float(np.mean(custos)), float(np.max(custos))))
+    return otimizador, historico
+
+
+def _migrar(pops, custos, n_migrantes, topologia):
+    """
+    Copia os melhores indivíduos de cada ilha sobre os piores das ilhas de
+    destino: "anel" (ilha i -> i+1) ou "completa" (todas para todas).
+    """
+    n_ilhas = len(pops)
+    elites = [np.argsort(c)[:n_migrantes] for c in custos]
+    migrantes = [(pops[i][elites[i]].copy(), custos[i][elites[i]].copy()) for i in range(n_ilhas)]
+
+    for destino in range(n_ilhas):
+        if topologia == "anel":
+            origens = [(destino - 1) % n_ilhas]
+        elif topologia == "completa":
+            origens = [i for i in range(n_ilhas) if i != destino]
+        else:
+            raise ValueError(f"Topologia de migração desconhecida: {topologia}")
+
+        chegada = np.vstack([migrantes[o][0] for o in origens])
+        custos_chegada = np.concatenate([migrantes[o][1] for o in origens])
+        piores = np.argsort(custos[destino])[::-1][:len(chegada)]
+        pops[destino][piores] = chegada[:len(piores)]
+        custos[destino][piores] = custos_chegada[:len(piores)]
+
+
+def _tune_pid_ga_ilhas(plant, t, setpoint, generations, population_size, bounds, db_path,
+                       ilhas, intervalo_migracao, topologia_migracao, n_migrantes,
+                       trabalhadores, operadores, rng, ganhos_iniciais=None):
+    """
+    GA em modelo de ilhas: cada ilha é um OtimizadorGA que evolui em um
+    processo por `intervalo_migracao` gerações e, ao fim de cada época, as
+    elites migram segundo a topologia. O histórico de cada ilha é salvo com
+    a coluna `ilha` e o histórico consolidado (melhor entre ilhas) sem ela.
+    """
+    if trabalhadores is None:
+        trabalhadores = min(ilhas, os.cpu_count() or 1)
+
+    # Um gerador independente por ilha, derivado do fluxo da execução
+    otimizadores = [OtimizadorGA(bounds, population_size, seed=r, ganhos_iniciais=ganhos_iniciais, **operadores)
+                    for r in rng.spawn(ilhas)]
+    for o in otimizadores:
+        o.tell(mse_batch(plant, o.ask(), t, setpoint))
+
+    executor = ProcessPoolExecutor(max_workers=trabalhadores) if trabalhadores > 1 else None
+    geracao = 0
+    try:
+        while geracao < generations:
+            n_ger = min(intervalo_migracao, generations - geracao)
+            args = [(plant, t, setpoint, o, n_ger) for o in otimizadores]
+            if executor is not None:
+                resultados = [f.result() for f in [executor.submit(_evoluir_ilha, *a) for a in args]]
+            else:
+                resultados = [_evoluir_ilha(*a) for a in args]
+
+            otimizadores = [r[0] for r in resultados]
+
+            for g in range(n_ger):
+                linhas = [r[1][g] for r in resultados]
+                for i, (melhor, medio, pior) in enumerate(linhas):
+                    salvar_historico_evolutivo("GA", geracao + g + 1, melhor, medio, pior, db_path, ilha=i + 1)
+                salvar_historico_evolutivo("GA", geracao + g + 1,
+                                           min(l[0] for l in linhas),
+                                           np.mean([l[1] for l in linhas]),
+                                           max(l[2] for l in linhas), db_path)
+            geracao += n_ger
+
+            melhores = [o.melhor[1] for o in otimizadores]
+            print(f"Geração {geracao}/{generations} | Melhor: {min(melhores):.6f} | "
+                  f"Por ilha: {', '.join(f'{m:.4f}' for m in melhores)}")
+
+            if geracao < generations:
+                _migrar([o.pop for o in otimizadores], [o.custos for o in otimizadores],
+                        n_migrantes, topologia_migracao)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return min((o.melhor for o in otimizadores), key=lambda m: m[1])
+
+
 def tune_pid_ga(plant=None, t=None, setpoint=1.0, 
                 generations=50, population_size=20,
-                db_path="db/pid_results.db"):
+                db_path="db/pid_results.db", multi_fidelidade=False,
+                vetorizado=False, bounds=((0, 0, 0), (20, 2, 5)),
+                selecao="torneio", tamanho_torneio=3, elitismo=2,
+                alpha_blx=0.5, taxa_mutacao=0.1,
+                ilhas=1, intervalo_migracao=5, topologia_migracao="anel",
+                n_migrantes=2, trabalhadores=None, seed=None,
+                checkpoint=None, ganhos_iniciais=None, escala_log=False):
+    """
+    Ajuste PID usando Algoritmo Genético com histórico.
+
+    Com vetorizado=True usa o motor em arrays (seleção por torneio ou
+    ranking, BLX-α, mutação por gene e elitismo) com avaliação da população
+    em lote; nesse modo taxa_mutacao é a probabilidade por gene.
+
+    Com ilhas > 1 usa o motor em arrays em modelo de ilhas: `ilhas`
+    subpopulações de `population_size` indivíduos evoluem em até
+    `trabalhadores` processos e trocam `n_migrantes` elites a cada
+    `intervalo_migracao` gerações (topologia "anel" ou "completa").
+
+    `seed` (inteiro, SeedSequence ou np.random.Generator) define o fluxo
+    aleatório da execução sem usar o estado global do np.random.
+
+    `checkpoint` (CheckpointGeracao) salva o estado do otimizador a cada
+    geração e retoma dele, se existir; vale apenas para o motor em arrays.
+
+    `ganhos_iniciais` (array (m, 3), ex.: de buscar_aquecimento ou
+    ganhos_heuristicos) faz o warm start: parte da população inicial é
+    sorteada ao redor desses ganhos.
+
+    `escala_log=True` faz o motor em arrays buscar em escala logarítmica
+    normalizada dos ganhos dentro de `bounds` (ver limites_module).
+    """
     if plant is None:
         plant = model(59.81, 401.61)
     if t is None:
         t = np.linspace(0, 2000, 1000)
 
+    # Avaliador multi-fidelidade (None = grade completa sempre)
+    avaliador = criar_avaliador(multi_fidelidade, plant, t, setpoint)
+    rng = criar_gerador(seed)
+
+    if ilhas > 1:
+        if avaliador is not None:
+            raise ValueError("Multi-fidelidade não é suportada no modelo de ilhas")
+        operadores = {'selecao': selecao, 'tamanho_torneio': tamanho_torneio, 'elitismo': elitismo,
+                      'alpha_blx': alpha_blx, 'taxa_mutacao': taxa_mutacao}
+        best_solution, best_mse = _tune_pid_ga_ilhas(
+            plant, t, setpoint, generations, population_size, bounds, db_path, ilhas,
+            intervalo_migracao, topologia_migracao, n_migrantes, trabalhadores, operadores, rng,
+            ganhos_iniciais)
+
+        Kp, Ki, Kd = best_solution
+        print(f"\nParâmetros PID via GA ({ilhas} ilhas):")
+        print(f"Kp = {Kp:.4f}")
+        print(f"Ki = {Ki:.4f}")
+        print(f"Kd = {Kd:.4f}")
+        print(f"Custo (MSE) = {best_mse:.6f}")
+
+        return Kp, Ki, Kd
+
+    if vetorizado:
+        otimizador, avaliador = retomar_ou_criar(
+            checkpoint,
+            lambda: criar_na_escala(
+                lambda b, g: OtimizadorGA(b, population_size, selecao, tamanho_torneio, elitismo,
+                                          alpha_blx, taxa_mutacao, seed=rng, ganhos_iniciais=g),
+                bounds, ganhos_iniciais, escala_log),
+            avaliador)
+        best_solution, best_mse = _tune_pid_ga_vetorizado(plant, t, setpoint, generations,
+                                                          otimizador, db_path, avaliador, checkpoint)
+
+        Kp, Ki, Kd = best_solution
+        print("\nParâmetros PID via GA (vetorizado):")
+        print(f"Kp = {Kp:.4f}")
+        print(f"Ki = {Ki:.4f}")
+        print(f"Kd = {Kd:.4f}")
+        print(f"Custo (MSE) = {best_mse:.6f}")
+
+        return Kp, Ki, Kd
+
     # Inicialização da população
     pop = np.column_stack([
-        np.random.uniform(0, 20, population_size),  # Kp
-        np.random.uniform(0, 2, population_size),   # Ki
-        np.random.uniform(0, 5, population_size)    # Kd
+        rng.uniform(bounds[0][0], bounds[1][0], population_size),  # Kp
+        rng.uniform(bounds[0][1], bounds[1][1], population_size),  # Ki
+        rng.uniform(bounds[0][2], bounds[1][2], population_size)   # Kd
     ])
+    aquecer_populacao(pop, rng, bounds, ganhos_iniciais)
 
     for gen in range(generations):
         # Avaliação da população
-        fitness_vals = np.array([fitness_ga(ind, plant, t, setpoint) for ind in pop])
+        if avaliador is not None:
+            fitness_vals = -avaliador.avaliar(pop)
+        else:
+            fitness_vals = np.array([fitness_ga(ind, plant, t, setpoint) for ind in pop])
         
         # Converte para MSE (valores positivos)
         mse_vals = -fitness_vals
         
         # Salva histórico da geração
-        salvar_historico_evolutivo("GA", gen + 1, np.min(mse_vals), np.mean(mse_vals), np.max(mse_vals), db_path)
+        salvar_historico_evolutivo("GA", gen + 1, np.min(mse_vals), np.mean(mse_vals), np.max(mse_vals), db_path,
+                                   ganhos=pop[np.argmin(mse_vals)])
+
+        if avaliador is not None:
+            avaliador.atualizar(gen + 1, generations, mse_vals)
 
         # Seleção (torneio ou roleta)
         probs = (fitness_vals - fitness_vals.min()) + 1e-6
         probs /= probs.sum()
-        parents_idx = np.random.choice(np.arange(population_size), size=population_size, p=probs)
+        parents_idx = rng.choice(np.arange(population_size), size=population_size, p=probs)
         parents = pop[parents_idx]
 
         # Crossover
         children = []
         for i in range(0, population_size, 2):
             p1, p2 = parents[i], parents[(i+1) % population_size]
-            alpha = np.random.rand()
+            alpha = rng.random()
             child1 = alpha * p1 + (1 - alpha) * p2
             child2 = (1 - alpha) * p1 + alpha * p2
             children.extend([child1, child2])
@@ -58,14 +363,9 @@ def tune_pid_ga(plant=None, t=None, setpoint=1.0,
         # Mutação
         mutation_rate = 0.1
         for child in children:
-            if np.random.rand() < mutation_rate:
-                gene = np.random.randint(0, 3)
-                if gene == 0:
-                    child[gene] = np.random.uniform(0, 20)
-                elif gene == 1:
-                    child[gene] = np.random.uniform(0, 2)
-                else:
-                    child[gene] = np.random.uniform(0, 5)
+            if rng.random() < mutation_rate:
+                gene = rng.integers(0, 3)
+                child[gene] = rng.uniform(bounds[0][gene], bounds[1][gene])
 
         # Atualização da população
         pop = children
@@ -75,15 +375,21 @@ def tune_pid_ga(plant=None, t=None, setpoint=1.0,
         print(f"Geração {gen+1}/{generations} | Melhor: {-fitness_vals[best_idx]:.6f} | Médio: {np.mean(mse_vals):.6f}")
 
     # Resultado final
-    fitness_vals = np.array([fitness_ga(ind, plant, t, setpoint) for ind in pop])
-    best_idx = np.argmax(fitness_vals)
-    best_solution = pop[best_idx]
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        best_solution, best_mse = avaliador.reavaliar_elite(pop, avaliador.avaliar(pop))
+        avaliador.imprimir_resumo()
+    else:
+        fitness_vals = np.array([fitness_ga(ind, plant, t, setpoint) for ind in pop])
+        best_idx = np.argmax(fitness_vals)
+        best_solution = pop[best_idx]
+        best_mse = -fitness_vals[best_idx]
 
     Kp, Ki, Kd = best_solution
     print("\nParâmetros PID via GA:")
     print(f"Kp = {Kp:.4f}")
     print(f"Ki = {Ki:.4f}")
     print(f"Kd = {Kd:.4f}")
-    print(f"Custo (MSE) = {-fitness_vals[best_idx]:.6f}")
+    print(f"Custo (MSE) = {best_mse:.6f}")
 
     return Kp, Ki, Kd
@@ -0,0 +1,215 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Busca exaustiva em grade: sintonia de referência (ótimo global).
+
+A grade (Kp, Ki, Kd) é percorrida em lotes de tamanho limitado pela
+memória: os pontos de cada lote são gerados a partir dos índices lineares
+da grade, sem materializá-la, e avaliados de uma vez pelo simulador em
+lote. Opcionalmente a busca é repetida em níveis de zoom, cada um com uma
+grade do mesmo tamanho ao redor do melhor ponto do nível anterior.
+
+O ótimo de cada planta (grade + zoom + polimento por gradiente) fica na
+tabela `otimo_global`, e serve de verdade de referência para medir a
+distância (gap) dos demais métodos ao ótimo.
+"""
+
+import time
+import numpy as np
+from db.db_module import (salvar_historico_evolutivo, salvar_otimo_global, buscar_otimo_global,
+                          resumo_mse_por_metodo)
+from model.model import model
+from modules.optimizer_module import AvaliadorLote
+from modules.limites_module import LIMITES_PADRAO, EscalaLog
+from modules.polish_module import polir_ganhos
+
+
+def tamanho_lote_memoria(n_pontos, memoria_mb=256):
+    """
+    Candidatos por lote para que as respostas simuladas (resposta e erro,
+    float64) caibam em `memoria_mb`.
+    """
+    return max(1, int(memoria_mb * 2 ** 20 / (16 * n_pontos)))
+
+
+def busca_em_grade(avaliar, bounds, pontos_por_eixo=31, tamanho_lote=4096):
+    """
+    Avalia a grade regular `pontos_por_eixo`^dim dentro de `bounds`.
+
+    Returns:
+        (melhor_ponto, melhor_custo, custo_medio, pior_custo, avaliacoes)
+    """
+    lower_bounds, upper_bounds = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    dim = len(lower_bounds)
+    forma = (pontos_por_eixo,) * dim
+    eixos = [np.linspace(lo, hi, pontos_por_eixo) for lo, hi in zip(lower_bounds, upper_bounds)]
+    total = pontos_por_eixo ** dim
+
+    melhor_ponto, melhor_custo = None, np.inf
+    soma, pior = 0.0, -np.inf
+    for inicio in range(0, total, tamanho_lote):
+        indices = np.unravel_index(np.arange(inicio, min(inicio + tamanho_lote, total)), forma)
+        pontos = np.column_stack([eixo[i] for eixo, i in zip(eixos, indices)])
+        custos = avaliar(pontos)
+
+        idx = int(np.argmin(custos))
+        if custos[idx] < melhor_custo:
+            melhor_ponto, melhor_custo = pontos[idx].copy(), float(custos[idx])
+        soma += float(np.sum(custos))
+        pior = max(pior, float(np.max(custos)))
+
+    return melhor_ponto, melhor_custo, soma / total, pior, total
+
+
+def busca_com_zoom(avaliar, bounds, pontos_por_eixo=31, niveis_zoom=3, tamanho_lote=4096,
+                   registrar=None):
+    """
+    Busca em grade seguida de `niveis_zoom` - 1 refinamentos.
+
+    Cada novo nível cobre ±2 passos da grade anterior ao redor do melhor
+    ponto (recortado pelos limites originais). `registrar(nivel, melhor,
+    medio, pior)` é chamado ao fim de cada nível.
+
+    Returns:
+        (melhor_ponto, melhor_custo, avaliacoes)
+    """
+    lower_bounds, upper_bounds = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    lo, hi = lower_bounds.copy(), upper_bounds.copy()
+    melhor_ponto, melhor_custo, avaliacoes = None, np.inf, 0
+
+    for nivel in range(1, niveis_zoom + 1):
+        ponto, custo, medio, pior, n = busca_em_grade(avaliar, (lo, hi), pontos_por_eixo, tamanho_lote)
+        avaliacoes += n
+        if custo < melhor_custo:
+            melhor_ponto, melhor_custo = ponto, custo
+
+        passo = (hi - lo) / (pontos_por_eixo - 1)
+        print(f"Nível {nivel}/{niveis_zoom} | {n} pontos | Melhor: {melhor_custo:.6f} | "
+              f"Passo: {np.array2string(passo, precision=4)}")
+        if registrar is not None:
+            registrar(nivel, melhor_custo, medio, pior)
+
+        lo = np.maximum(lower_bounds, melhor_ponto - 2 * passo)
+        hi = np.minimum(upper_bounds, melhor_ponto + 2 * passo)
+
+    return melhor_ponto, melhor_custo, avaliacoes
+
+
+def tune_pid_grid(plant=None, t=None, setpoint=1.0,
+                  pontos_por_eixo=31, niveis_zoom=3,
+                  bounds=((0, 0, 0), (20, 2, 5)),
+                  db_path="db/pid_results.db", multi_fidelidade=False,
+                  vetorizado=False, seed=None, checkpoint=None,
+                  ganhos_iniciais=None, escala_log=False,
+                  memoria_mb=256, trabalhadores=1):
+    """
+    Ajuste PID por busca exaustiva em grade com zoom, com histórico.
+
+    Cada nível de zoom é gravado no histórico evolutivo como uma geração.
+    Os lotes são limitados a `memoria_mb` de respostas simuladas e podem
+    ser repartidos entre `trabalhadores` processos. Com escala_log=True a
+    grade é regular no log dos ganhos.
+
+    A busca é determinística e sempre na grade completa: `seed`,
+    `checkpoint`, `ganhos_iniciais`, `multi_fidelidade` e `vetorizado` são
+    aceitos apenas pela assinatura comum dos tuners.
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 2000, 1000)
+
+    tamanho_lote = tamanho_lote_memoria(len(t), memoria_mb)
+    escala = EscalaLog(bounds) if escala_log else None
+
+    def registrar(nivel, melhor, medio, pior):
+        salvar_historico_evolutivo("GRID", nivel, melhor, medio, pior, db_path)
+
+    with AvaliadorLote(plant, t, setpoint, trabalhadores) as avaliador:
+        if escala is None:
+            best, best_mse, avaliacoes = busca_com_zoom(avaliador.avaliar, bounds, pontos_por_eixo,
+                                                        niveis_zoom, tamanho_lote, registrar)
+        else:
+            best, best_mse, avaliacoes = busca_com_zoom(lambda u: avaliador.avaliar(escala.para_ganhos(u)),
+                                                        escala.limites_unitarios, pontos_por_eixo,
+                                                        niveis_zoom, tamanho_lote, registrar)
+            best = escala.para_ganhos(best)
+
+    Kp, Ki, Kd = best
+    print(f"\nParâmetros PID via busca em grade ({avaliacoes} avaliações):")
+    print(f"Kp = {Kp:.4f}")
+    print(f"Ki = {Ki:.4f}")
+    print(f"Kd = {Kd:.4f}")
+    print(f"Custo (MSE) = {best_mse:.6f}")
+
+    return Kp, Ki, Kd
+
+
+def otimo_global(k_term, tau, setpoint, t_final, n_pontos, bounds=LIMITES_PADRAO,
+                 pontos_por_eixo=31, niveis_zoom=4, polir=True, recalcular=False,
+                 memoria_mb=256, trabalhadores=1, db_path="db/pid_results.db"):
+    """
+    Ótimo de referência da planta (k_term, tau) na grade de simulação
+    linspace(0, t_final, n_pontos), dentro de `bounds`.
+
+    Usa o valor gravado em `otimo_global`, se houver (e recalcular=False);
+    senão executa a busca em grade com zoom, polida por L-BFGS-B com
+    gradiente exato, e grava o resultado.
+
+    Returns:
+        dict com 'ganhos', 'mse', 'avaliacoes' e 'tempo' (segundos)
+    """
+    if not recalcular:
+        salvo = buscar_otimo_global(k_term, tau, setpoint, t_final, n_pontos, bounds, db_path)
+        if salvo is not None:
+            return salvo
+
+    plant = model(k_term, tau)
+    t = np.linspace(0, t_final, n_pontos)
+    inicio = time.perf_counter()
+
+    print(f"\nÓtimo global: busca em grade {pontos_por_eixo}³ com {niveis_zoom} níveis")
+    with AvaliadorLote(plant, t, setpoint, trabalhadores) as avaliador:
+        ganhos, mse, avaliacoes = busca_com_zoom(avaliador.avaliar, bounds, pontos_por_eixo, niveis_zoom,
+                                                 tamanho_lote_memoria(n_pontos, memoria_mb))
+    if polir:
+        polido = polir_ganhos(plant, t, setpoint, ganhos, bounds)
+        if polido['mse'] < mse:
+            ganhos, mse = np.array(polido['ganhos']), polido['mse']
+        avaliacoes += polido['simulacoes']
+
+    tempo = time.perf_counter() - inicio
+    salvar_otimo_global(k_term, tau, setpoint, t_final, n_pontos, bounds, ganhos, mse,
+                        avaliacoes, tempo, db_path)
+    print(f"Ótimo global: MSE = {mse:.6f} em {avaliacoes} avaliações ({tempo:.2f}s)")
+
+    return {'ganhos': tuple(float(g) for g in ganhos), 'mse': float(mse),
+            'avaliacoes': avaliacoes, 'tempo': tempo}
+
+
+def imprimir_gaps(k_term, tau, setpoint, otimo, db_path="db/pid_results.db", campanha_id=None):
+    """
+    Distância de cada método ao ótimo global nos resultados da planta.
+
+    O ótimo vale para uma grade de tempo e uma caixa de limites; passe a
+    `campanha_id` da execução para não misturar resultados de outras
+    configurações.
+    """
+    linhas = resumo_mse_por_metodo(k_term, tau, setpoint, db_path, campanha_id)
+
+    print("\n" + "="*70)
+    print("DISTÂNCIA AO ÓTIMO GLOBAL (BUSCA EM GRADE)")
+    print("="*70)
+    Kp, Ki, Kd = otimo['ganhos']
+    print(f"Ótimo: Kp={Kp:.4f}, Ki={Ki:.4f}, Kd={Kd:.4f} | MSE = {otimo['mse']:.6f}")
+    if not linhas:
+        print("⚠ Nenhum resultado desta planta no banco" if campanha_id is None else
+              f"⚠ Nenhum resultado da campanha {campanha_id} no banco")
+        return
+    print(f"{'Método':<10} {'Melhor MSE':>12} {'Gap melhor':>12} {'MSE médio':>12} {'Gap médio':>12} {'N':>4}")
+    print("-"*70)
+    for metodo, melhor, medio, n in linhas:
+        gap_melhor = (melhor / otimo['mse'] - 1) * 100
+        gap_medio = (medio / otimo['mse'] - 1) * 100
+        print(f"{metodo:<10} {melhor:>12.6f} {gap_melhor:>11.4f}% {medio:>12.6f} {gap_medio:>11.4f}% {n:>4}")
+    print("="*70)
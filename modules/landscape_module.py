@@ -0,0 +1,118 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Paisagem de custo: fatias do MSE no plano Kp × Ki com Kd fixo.
+
+Cada fatia é uma grade resolucao × resolucao avaliada em lotes pelo
+simulador vetorizado (uma fatia 200 × 200 leva poucos segundos, contra
+minutos com simulate ponto a ponto). As fatias ficam em cache no disco,
+um arquivo .npz por combinação de planta, grade de simulação, setpoint,
+Kd, limites e resolução, para que a interface as mostre de imediato.
+
+As trajetórias dos métodos evolutivos (melhor indivíduo por geração, no
+histórico evolutivo) podem ser sobrepostas ao mapa.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from db.db_module import buscar_trajetorias
+from model.model import model, mse_batch
+from modules.limites_module import LIMITES_PADRAO
+from modules.grid_module import tamanho_lote_memoria
+
+DIRETORIO_PADRAO = "db/paisagens"
+
+
+def _chave_paisagem(k_term, tau, setpoint, t_final, n_pontos, kd, limites, resolucao):
+    """Nome do arquivo de cache (hash dos parâmetros) e os parâmetros em JSON."""
+    parametros = json.dumps({
+        'k_term': float(k_term), 'tau': float(tau), 'setpoint': float(setpoint),
+        't_final': float(t_final), 'n_pontos': int(n_pontos), 'kd': float(kd),
+        'limites': [[float(v) for v in lim] for lim in limites], 'resolucao': int(resolucao),
+    }, sort_keys=True)
+    return f"paisagem_{hashlib.sha1(parametros.encode()).hexdigest()[:16]}.npz", parametros
+
+
+def calcular_fatia(plant, t, setpoint, kd, limites=LIMITES_PADRAO, resolucao=200, memoria_mb=256):
+    """
+    MSE na grade Kp × Ki (limites dos dois primeiros ganhos) com Kd fixo.
+
+    Returns:
+        (kp (resolucao,), ki (resolucao,), mse (resolucao, resolucao)),
+        com mse[i, j] o custo em (kp[j], ki[i])
+    """
+    kp = np.linspace(limites[0][0], limites[1][0], resolucao)
+    ki = np.linspace(limites[0][1], limites[1][1], resolucao)
+    KP, KI = np.meshgrid(kp, ki)
+    pontos = np.column_stack([KP.ravel(), KI.ravel(), np.full(KP.size, float(kd))])
+
+    lote = tamanho_lote_memoria(len(t), memoria_mb)
+    mse = np.concatenate([mse_batch(plant, pontos[i:i + lote], t, setpoint)
+                          for i in range(0, len(pontos), lote)])
+    return kp, ki, mse.reshape(KP.shape)
+
+
+def paisagem(k_term, tau, setpoint, t_final, n_pontos, kd, limites=LIMITES_PADRAO, resolucao=200,
+             diretorio=DIRETORIO_PADRAO, recalcular=False):
+    """
+    Fatia Kp × Ki da planta (k_term, tau), do cache em disco ou calculada
+    (e gravada no cache).
+
+    Returns:
+        dict com 'kp', 'ki', 'mse', 'kd', 'limites' e 'origem' ('cache' ou 'calculada')
+    """
+    arquivo, parametros = _chave_paisagem(k_term, tau, setpoint, t_final, n_pontos, kd, limites, resolucao)
+    caminho = os.path.join(diretorio, arquivo)
+
+    if not recalcular and os.path.exists(caminho):
+        with np.load(caminho) as dados:
+            if str(dados['parametros']) == parametros:
+                return {'kp': dados['kp'], 'ki': dados['ki'], 'mse': dados['mse'], 'kd': float(kd),
+                        'limites': limites, 'origem': 'cache'}
+
+    t = np.linspace(0, t_final, n_pontos)
+    kp, ki, mse = calcular_fatia(model(k_term, tau), t, setpoint, kd, limites, resolucao)
+
+    os.makedirs(diretorio, exist_ok=True)
+    np.savez_compressed(caminho, kp=kp, ki=ki, mse=mse, parametros=parametros)
+    return {'kp': kp, 'ki': ki, 'mse': mse, 'kd': float(kd), 'limites': limites, 'origem': 'calculada'}
+
+
+def precalcular_paisagens(k_term, tau, setpoint, t_final, n_pontos, kds=None, limites=LIMITES_PADRAO,
+                          resolucao=200, diretorio=DIRETORIO_PADRAO):
+    """
+    Preenche o cache com fatias em vários valores de Kd (por padrão, cinco
+    valores igualmente espaçados nos limites de Kd).
+    """
+    if kds is None:
+        kds = np.linspace(limites[0][2], limites[1][2], 5)
+
+    fatias = []
+    for kd in kds:
+        fatia = paisagem(k_term, tau, setpoint, t_final, n_pontos, kd, limites, resolucao, diretorio)
+        i, j = np.unravel_index(np.argmin(fatia['mse']), fatia['mse'].shape)
+        print(f"Kd = {kd:.4f} | {fatia['origem']:<9} | Mínimo: MSE {fatia['mse'][i, j]:.6f} "
+              f"em Kp={fatia['kp'][j]:.4f}, Ki={fatia['ki'][i]:.4f}")
+        fatias.append(fatia)
+    return fatias
+
+
+def trajetorias(metodo=None, db_path="db/pid_results.db"):
+    """
+    Trajetórias do melhor indivíduo por execução, a partir do histórico.
+
+    Uma nova execução começa quando a geração não avança em relação à
+    linha anterior do mesmo método.
+
+    Returns:
+        dict {método: [array (n_geracoes, 3) de ganhos por execução]}
+    """
+    execucoes, ultima_geracao = {}, {}
+    for nome, geracao, kp, ki, kd, _ in buscar_trajetorias(metodo, db_path):
+        if nome not in execucoes or geracao <= ultima_geracao[nome]:
+            execucoes.setdefault(nome, []).append([])
+        execucoes[nome][-1].append((kp, ki, kd))
+        ultima_geracao[nome] = geracao
+    return {nome: [np.array(e) for e in lista] for nome, lista in execucoes.items()}
@@ -0,0 +1,125 @@
+# pylint: disable="C0114, C0103, C0301"
+
+"""
+Limites de busca dos métodos evolutivos derivados da planta.
+
+Os limites fixos (20, 2, 5) para Kp, Ki e Kd só fazem sentido para a
+estufa padrão: em plantas de ganho maior quase toda a caixa fica longe do
+ótimo, e em plantas de ganho menor o ótimo pode ficar fora dela. Aqui a
+caixa é construída a partir do modelo de primeira ordem com tempo morto
+(K, L, T) que ZN1 e CC já identificam: cada limite superior é um múltiplo
+do ganho de Ziegler–Nichols, o que torna a busca invariante à escala da
+planta.
+
+Opcionalmente a busca é feita em escala logarítmica normalizada: os
+otimizadores trabalham no cubo [0, 1]^3 e cada coordenada cobre
+`decadas` décadas abaixo do limite superior do ganho.
+"""
+
+import numpy as np
+from modules.zn_module import identificar_fopdt, sintonize
+
+LIMITES_PADRAO = ((0, 0, 0), (20, 2, 5))
+
+
+def limites_planta(plant, t, setpoint=1.0, fator=20.0):
+    """
+    Limites ((0, 0, 0), (Kp_max, Ki_max, Kd_max)) para a planta.
+
+    Os limites superiores são `fator` (escalar ou um por ganho) vezes os
+    ganhos de ZN1 da planta identificada. Para a estufa padrão o fator 20
+    reproduz o limite de Kp fixo. Se a identificação falhar, volta aos
+    limites padrão.
+    """
+    K, L, T = identificar_fopdt(plant, t, setpoint)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ganhos_zn = np.array(sintonize(K, L, T), dtype=float)
+
+    if not np.all(np.isfinite(ganhos_zn)) or np.any(ganhos_zn <= 0):
+        print(f"⚠ Identificação FOPDT inválida (K={K:.4f}, L={L:.4f}, T={T:.4f}); usando limites padrão")
+        return LIMITES_PADRAO
+
+    superiores = np.asarray(fator, dtype=float) * ganhos_zn
+    print(f"Limites da planta (K={K:.4f}, L={L:.4f} s, T={T:.4f} s): "
+          f"Kp ≤ {superiores[0]:.4f}, Ki ≤ {superiores[1]:.4f}, Kd ≤ {superiores[2]:.4f}")
+    return (0.0, 0.0, 0.0), tuple(float(s) for s in superiores)
+
+
+class EscalaLog:
+    """
+    Mapeamento entre o cubo unitário e os ganhos em escala logarítmica.
+
+    A coordenada u ∈ [0, 1] de cada ganho corresponde a
+    exp(log(a) + u·(log(b) - log(a))), com b o limite superior e a o limite
+    inferior ou, se este for zero, b·10^-decadas.
+    """
+
+    def __init__(self, bounds, decadas=3):
+        superiores = np.array(bounds[1], dtype=float)
+        inferiores = np.maximum(np.array(bounds[0], dtype=float), superiores * 10.0 ** -decadas)
+        self.log_inferiores = np.log(inferiores)
+        self.log_amplitude = np.log(superiores) - self.log_inferiores
+        self.limites_unitarios = (tuple(np.zeros(len(superiores))), tuple(np.ones(len(superiores))))
+
+    def para_ganhos(self, u):
+        return np.exp(self.log_inferiores + np.asarray(u, dtype=float) * self.log_amplitude)
+
+    def para_unitario(self, ganhos):
+        if ganhos is None:
+            return None
+        log_ganhos = np.log(np.maximum(np.asarray(ganhos, dtype=float), np.exp(self.log_inferiores)))
+        return np.clip((log_ganhos - self.log_inferiores) / self.log_amplitude, 0.0, 1.0)
+
+
+class OtimizadorEscalaLog:
+    """
+    Adapta um otimizador ask/tell que trabalha no cubo unitário para
+    devolver e receber ganhos (ver optimizer_module). Os demais atributos
+    vêm do otimizador interno; os de posição (população, melhores pessoais)
+    são convertidos para ganhos.
+    """
+
+    POSICOES = ("pop", "pbest_positions")
+
+    def __init__(self, otimizador, escala):
+        self.otimizador = otimizador
+        self.escala = escala
+
+    def ask(self):
+        return self.escala.para_ganhos(self.otimizador.ask())
+
+    def tell(self, custos):
+        self.otimizador.tell(custos)
+
+    def reavaliar(self, avaliar):
+        self.otimizador.reavaliar(lambda u: avaliar(self.escala.para_ganhos(u)))
+
+    def __getattr__(self, nome):
+        if nome.startswith("__") or nome in ("otimizador", "escala"):
+            raise AttributeError(nome)
+        valor = getattr(self.otimizador, nome)
+        return self.escala.para_ganhos(valor) if nome in self.POSICOES else valor
+
+    @property
+    def melhor(self):
+        x, custo = self.otimizador.melhor
+        return self.escala.para_ganhos(x), custo
+
+    @property
+    def geracao(self):
+        return self.otimizador.geracao
+
+    @property
+    def encerrado(self):
+        return self.otimizador.encerrado
+
+
+def criar_na_escala(criar, bounds, ganhos_iniciais=None, escala_log=False, decadas=3):
+    """
+    Cria um otimizador com `criar(bounds, ganhos_iniciais)`, diretamente
+    nos limites ou, com escala_log, no cubo unitário logarítmico.
+    """
+    if not escala_log:
+        return criar(bounds, ganhos_iniciais)
+    escala = EscalaLog(bounds, decadas)
+    return OtimizadorEscalaLog(criar(escala.limites_unitarios, escala.para_unitario(ganhos_iniciais)), escala)
@@ -0,0 +1,320 @@
+# pylint: disable="C0114, C0103, R0902, R0913, R0914, R0917, C0301"
+
+"""
+NSGA-II: sintonia multiobjetivo do PID.
+
+Os três objetivos, todos minimizados, são o MSE, o overshoot (%) e o
+negativo da margem de fase (°). A população inteira é avaliada de uma vez:
+as respostas vêm de simulate_batch e a margem de fase de L(jω) = C(jω)·P(jω)
+calculada em uma grade logarítmica de frequências para todo o lote.
+
+A ordenação não dominada é vetorizada: a matriz de dominância (N × N) sai
+de uma única comparação em broadcast, e cada frente é retirada subtraindo
+as dominâncias da frente anterior, sem laços por par de indivíduos. A
+distância de aglomeração também é calculada por objetivo em arrays.
+
+Ao final, a frente de Pareto é gravada na tabela `frente_pareto`, onde a
+escolha do compromisso fica para a análise; o tuner devolve a solução de
+menor MSE da frente (comparável aos demais métodos) ou, opcionalmente, a
+mais próxima do ponto ideal na frente normalizada.
+"""
+
+import numpy as np
+from db.db_module import salvar_historico_evolutivo, salvar_frente_pareto, calcular_metricas_lote
+from model.model import model, simulate_batch, _grade_uniforme, PlantaCenarios
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import retomar_ou_criar
+from modules.warmstart_module import populacao_inicial
+from modules.limites_module import criar_na_escala
+
+OBJETIVOS = ("mse", "overshoot", "margem_fase")
+
+MARGEM_FASE_MAXIMA = 180.0
+
+
+def margem_fase_lote(plant, ganhos, T, n_frequencias=4000):
+    """
+    Margem de fase (°) de um lote de controladores PID.
+
+    A grade de frequências cobre de 0.01/t_final a 1000/dt, em escala log;
+    a margem é interpolada em cada cruzamento de |L| = 1 e, havendo mais de
+    um, vale a menor. Sem cruzamento (margem infinita) o valor é limitado a
+    MARGEM_FASE_MAXIMA.
+
+    Retorna:
+    margem (array): Vetor (B,) em graus.
+    """
+    ganhos = np.atleast_2d(np.asarray(ganhos, dtype=float))
+    _, dt, n_pontos = _grade_uniforme(T)
+    w = np.logspace(np.log10(0.01 / (dt * (n_pontos - 1))), np.log10(1000.0 / dt), n_frequencias)
+    s = 1j * w
+
+    Np = np.atleast_1d(np.squeeze(plant.num[0][0]))
+    Dp = np.atleast_1d(np.squeeze(plant.den[0][0]))
+    P = np.polyval(Np, s) / np.polyval(Dp, s)
+    Kp, Ki, Kd = (g[:, None] for g in ganhos.T)
+    L = (Kp + Ki / s + Kd * s) * P                       # (B, n_frequencias)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_modulo = np.log(np.abs(L))
+        fase = np.degrees(np.unwrap(np.angle(L), axis=1))
+        a, b = log_modulo[:, :-1], log_modulo[:, 1:]
+        cruza = (a > 0) != (b > 0)
+        fracao = a / (a - b)
+        fase_cruzamento = fase[:, :-1] + fracao * (fase[:, 1:] - fase[:, :-1])
+        margem = np.min(np.where(cruza, 180.0 + fase_cruzamento, np.inf), axis=1)
+
+    return np.minimum(margem, MARGEM_FASE_MAXIMA)
+
+
+def objetivos_lote(plant, ganhos, T, setpoint=1.0):
+    """
+    Objetivos (MSE, overshoot, -margem de fase) de um lote de ganhos.
+
+    Respostas divergentes recebem 1e6 em todos os objetivos. Com uma
+    PlantaCenarios, cada objetivo é calculado em todos os cenários (um
+    único lote de simulação) e agregado como o MSE: pior caso ou média.
+
+    Retorna:
+    F (array): Matriz (B, 3).
+    """
+    T = np.asarray(T)
+    plantas = plant.plantas if isinstance(plant, PlantaCenarios) else [plant]
+    t, Y = simulate_batch(plant, ganhos, T, setpoint)
+    with np.errstate(over='ignore', invalid='ignore'):
+        metricas = calcular_metricas_lote(t, Y, setpoint)
+    margens = np.concatenate([margem_fase_lote(p, ganhos, T) for p in plantas])
+    F = np.column_stack([metricas['mse'], metricas['overshoot'], -margens])
+    divergente = ~np.all(np.isfinite(F), axis=1) | (F[:, 0] >= 1e6)
+    F[divergente] = 1e6
+
+    if isinstance(plant, PlantaCenarios):
+        F = np.column_stack([plant.agregar(F[:, j].reshape(len(plantas), -1)) for j in range(F.shape[1])])
+    return F
+
+
+def ordenacao_nao_dominada(F):
+    """
+    Frente de cada indivíduo (0 = não dominado) para objetivos minimizados.
+
+    Retorna:
+    rank (array): Vetor (N,) de inteiros.
+    """
+    F = np.asarray(F, dtype=float)
+    menor_igual = np.all(F[:, None, :] <= F[None, :, :], axis=2)
+    menor = np.any(F[:, None, :] < F[None, :, :], axis=2)
+    domina = menor_igual & menor                          # domina[i, j]: i domina j
+
+    dominadores = domina.sum(axis=0)
+    rank = np.full(len(F), -1)
+    frente = 0
+    atual = np.nonzero(dominadores == 0)[0]
+    while len(atual):
+        rank[atual] = frente
+        dominadores = dominadores - domina[atual].sum(axis=0)
+        dominadores[rank >= 0] = -1
+        atual = np.nonzero(dominadores == 0)[0]
+        frente += 1
+    return rank
+
+
+def distancia_aglomeracao(F, rank):
+    """
+    Distância de aglomeração de cada indivíduo dentro da sua frente; os
+    extremos de cada objetivo recebem infinito.
+    """
+    F = np.asarray(F, dtype=float)
+    n, m = F.shape
+    distancia = np.zeros(n)
+    for frente in np.unique(rank):
+        idx = np.nonzero(rank == frente)[0]
+        if len(idx) <= 2:
+            distancia[idx] = np.inf
+            continue
+        Ff = F[idx]
+        ordem = np.argsort(Ff, axis=0)                    # (k, m)
+        ordenado = np.take_along_axis(Ff, ordem, axis=0)
+        amplitude = ordenado[-1] - ordenado[0]
+        amplitude[amplitude == 0] = 1.0
+
+        contribuicao = np.zeros_like(Ff)
+        internos = (ordenado[2:] - ordenado[:-2]) / amplitude
+        np.put_along_axis(contribuicao, ordem[1:-1], internos, axis=0)
+        np.put_along_axis(contribuicao, ordem[[0, -1]], np.inf, axis=0)
+        distancia[idx] = contribuicao.sum(axis=1)
+    return distancia
+
+
+def solucao_compromisso(F):
+    """Índice do ponto mais próximo do ideal, com cada objetivo normalizado em [0, 1]."""
+    F = np.asarray(F, dtype=float)
+    amplitude = np.ptp(F, axis=0)
+    amplitude[amplitude == 0] = 1.0
+    return int(np.argmin(np.linalg.norm((F - F.min(axis=0)) / amplitude, axis=1)))
+
+
+class OtimizadorNSGA2:
+    """
+    NSGA-II com interface ask/tell (ver optimizer_module), mas com `tell`
+    recebendo a matriz de objetivos (n, 3) em vez de um vetor de custos.
+
+    Seleção por torneio binário (frente, depois aglomeração), cruzamento
+    SBX e mutação polinomial. Como PSO e DE, começa em geracao = -1 e
+    registra a população inicial como geração 0.
+
+    `melhor` devolve o indivíduo da primeira frente com menor MSE, para
+    compatibilidade com os laços de um objetivo.
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), tamanho_populacao=40,
+                 prob_cruzamento=0.9, eta_cruzamento=15.0, eta_mutacao=20.0,
+                 seed=None, ganhos_iniciais=None):
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.dim = len(self.lower_bounds)
+        self.n = tamanho_populacao + tamanho_populacao % 2
+        self.prob_cruzamento = prob_cruzamento
+        self.eta_cruzamento = eta_cruzamento
+        self.eta_mutacao = eta_mutacao
+        self.rng = criar_gerador(seed)
+
+        self.pop = populacao_inicial(self.rng, bounds, self.n, ganhos_iniciais)
+        self.F = None
+        self.rank = None
+        self.aglomeracao = None
+        self.filhos = None
+        self.geracao = -1
+        self.encerrado = False
+
+    def _torneio(self):
+        a, b = self.rng.integers(0, self.n, (2, self.n))
+        melhor_a = (self.rank[a] < self.rank[b]) | ((self.rank[a] == self.rank[b]) &
+                                                    (self.aglomeracao[a] > self.aglomeracao[b]))
+        return np.where(melhor_a, a, b)
+
+    def _cruzamento(self, pais):
+        p1, p2 = pais[0::2], pais[1::2]
+        u = self.rng.random(p1.shape)
+        expoente = 1.0 / (self.eta_cruzamento + 1.0)
+        beta = np.where(u <= 0.5, (2.0 * u) ** expoente, (1.0 / (2.0 * (1.0 - u))) ** expoente)
+
+        # Cada variável troca com probabilidade 0.5, cada par com prob_cruzamento
+        cruza = (self.rng.random(p1.shape) < 0.5) & (self.rng.random((len(p1), 1)) < self.prob_cruzamento)
+        beta = np.where(cruza, beta, 1.0)
+        f1 = 0.5 * ((1 + beta) * p1 + (1 - beta) * p2)
+        f2 = 0.5 * ((1 - beta) * p1 + (1 + beta) * p2)
+        return np.vstack([f1, f2])
+
+    def _mutacao(self, filhos):
+        u = self.rng.random(filhos.shape)
+        expoente = 1.0 / (self.eta_mutacao + 1.0)
+        delta = np.where(u < 0.5, (2.0 * u) ** expoente - 1.0, 1.0 - (2.0 * (1.0 - u)) ** expoente)
+        muta = self.rng.random(filhos.shape) < 1.0 / self.dim
+        return filhos + muta * delta * (self.upper_bounds - self.lower_bounds)
+
+    def ask(self):
+        if self.F is None:
+            return self.pop
+        pais = self.pop[self._torneio()]
+        self.filhos = np.clip(self._mutacao(self._cruzamento(pais)), self.lower_bounds, self.upper_bounds)
+        return self.filhos
+
+    def tell(self, objetivos):
+        objetivos = np.asarray(objetivos, dtype=float)
+        if self.F is None:
+            pop, F = self.pop, objetivos
+        else:
+            pop, F = np.vstack([self.pop, self.filhos]), np.vstack([self.F, objetivos])
+
+        # Seleção elitista: frentes em ordem, a última truncada pela aglomeração
+        rank = ordenacao_nao_dominada(F)
+        aglomeracao = distancia_aglomeracao(F, rank)
+        sobreviventes = np.lexsort((-aglomeracao, rank))[:self.n]
+
+        self.pop, self.F = pop[sobreviventes], F[sobreviventes]
+        self.rank, self.aglomeracao = rank[sobreviventes], aglomeracao[sobreviventes]
+        self.filhos = None
+        self.geracao += 1
+
+    def reavaliar(self, avaliar):
+        self.F = np.asarray(avaliar(self.pop), dtype=float)
+        self.rank = ordenacao_nao_dominada(self.F)
+        self.aglomeracao = distancia_aglomeracao(self.F, self.rank)
+
+    @property
+    def melhor(self):
+        frente = np.nonzero(self.rank == 0)[0]
+        idx = frente[np.argmin(self.F[frente, 0])]
+        return self.pop[idx], float(self.F[idx, 0])
+
+
+def tune_pid_nsga2(plant=None, t=None, setpoint=1.0,
+                   geracoes=50, tamanho_populacao=40,
+                   bounds=((0, 0, 0), (20, 2, 5)),
+                   db_path="db/pid_results.db", multi_fidelidade=False,
+                   vetorizado=False, seed=None, checkpoint=None,
+                   ganhos_iniciais=None, escala_log=False, escolha="mse"):
+    """
+    Ajuste PID multiobjetivo (MSE, overshoot, margem de fase) por NSGA-II.
+
+    O histórico evolutivo registra, por geração, o menor, o médio e o pior
+    MSE da população. A frente final vai para a tabela `frente_pareto`.
+
+    Com escolha="mse" retorna a solução da frente de menor MSE; com
+    escolha="compromisso", a mais próxima do ponto ideal (objetivos
+    normalizados pela amplitude da frente). A execução é sempre em lote e na grade completa (`vetorizado` não
+    se aplica e a multi-fidelidade é ignorada, pois overshoot e margem não
+    se comparam entre grades). `seed`, `checkpoint`, `ganhos_iniciais`,
+    `bounds` e `escala_log` têm o mesmo papel que nos demais tuners.
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 2000, 1000)
+    if multi_fidelidade:
+        print("⚠ Multi-fidelidade ignorada no NSGA-II (grade completa)")
+
+    rng = criar_gerador(seed)
+    otimizador, _ = retomar_ou_criar(
+        checkpoint,
+        lambda: criar_na_escala(
+            lambda b, g: OtimizadorNSGA2(b, tamanho_populacao, seed=rng, ganhos_iniciais=g),
+            bounds, ganhos_iniciais, escala_log),
+        None)
+
+    while otimizador.geracao < geracoes:
+        F = objetivos_lote(plant, otimizador.ask(), t, setpoint)
+        otimizador.tell(F)
+
+        g = otimizador.geracao
+        melhor_ganho, melhor_mse = otimizador.melhor
+        salvar_historico_evolutivo("NSGA-II", g, melhor_mse, np.mean(otimizador.F[:, 0]),
+                                   np.max(otimizador.F[:, 0]), db_path, ganhos=melhor_ganho)
+        if g > 0:
+            print(f"Geração {g}/{geracoes} | Frente: {np.sum(otimizador.rank == 0)} pontos | "
+                  f"Menor MSE: {melhor_mse:.6f}")
+
+        if checkpoint is not None:
+            checkpoint.salvar(otimizador)
+
+    # Frente de Pareto final (sem duplicatas)
+    frente = np.nonzero(otimizador.rank == 0)[0]
+    X, F = otimizador.pop[frente], otimizador.F[frente]
+    X, unicos = np.unique(X, axis=0, return_index=True)
+    F = F[unicos]
+    objetivos = np.column_stack([F[:, 0], F[:, 1], -F[:, 2]])
+    salvar_frente_pareto("NSGA-II", X, objetivos, db_path)
+
+    idx = solucao_compromisso(F) if escolha == "compromisso" else int(np.argmin(F[:, 0]))
+    Kp, Ki, Kd = X[idx]
+    mse, overshoot, margem = objetivos[idx]
+    print(f"\nFrente de Pareto: {len(X)} soluções | MSE {objetivos[:, 0].min():.6f}–{objetivos[:, 0].max():.6f} | "
+          f"Overshoot {objetivos[:, 1].min():.2f}–{objetivos[:, 1].max():.2f}% | "
+          f"MF {objetivos[:, 2].min():.2f}–{objetivos[:, 2].max():.2f}°")
+    print(f"\nParâmetros PID via NSGA-II (solução de {'compromisso' if escolha == 'compromisso' else 'menor MSE'}):")
+    print(f"Kp = {Kp:.4f}")
+    print(f"Ki = {Ki:.4f}")
+    print(f"Kd = {Kd:.4f}")
+    print(f"MSE = {mse:.6f} | Overshoot = {overshoot:.2f}% | Margem de fase = {margem:.2f}°")
+
+    return Kp, Ki, Kd
@@ -0,0 +1,192 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Interface ask/tell dos otimizadores e avaliação compartilhada.
+
+Os otimizadores em arrays (OtimizadorGA, OtimizadorPSO, OtimizadorDE e
+OtimizadorCMA) não avaliam candidatos: `ask()` devolve um lote de ganhos
+(n, 3) e `tell(custos)` recebe o MSE de cada um. Assim o laço de avaliação
+fica do lado de fora, e um único avaliador pode atender várias otimizações
+simultâneas, concatenando os lotes de todas em uma só chamada.
+
+Todos os otimizadores expõem:
+    ask() -> np.ndarray (n, dim)
+    tell(custos)
+    reavaliar(avaliar)  recalcula custos guardados após mudança de fidelidade
+    melhor              (ganhos, custo) do melhor candidato já avaliado
+    geracao             número da última geração informada (GA e CMA-ES
+                        começam em 0 e contam a população inicial como
+                        geração 1; PSO e DE começam em -1 e a registram
+                        como geração 0, como nos históricos originais)
+    encerrado           True quando um critério de parada interno disparou
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from db.db_module import salvar_historico_evolutivo, salvar_checkpoint_geracao, carregar_checkpoint_geracao
+from model.model import mse_batch
+
+
+class AvaliadorLote:
+    """
+    Avalia lotes de ganhos PID, opcionalmente repartidos entre processos.
+
+    Args:
+        plant: Função de transferência da planta
+        t: Vetor de tempo da simulação
+        setpoint: Valor de referência
+        trabalhadores: Número de processos (1 = avaliação no próprio processo)
+        tamanho_minimo: Lotes menores que isso não são repartidos
+    """
+
+    def __init__(self, plant, t, setpoint=1.0, trabalhadores=1, tamanho_minimo=4096):
+        self.plant = plant
+        self.t = np.asarray(t)
+        self.setpoint = setpoint
+        self.trabalhadores = trabalhadores if trabalhadores is not None else (os.cpu_count() or 1)
+        self.tamanho_minimo = tamanho_minimo
+        self.avaliacoes = 0
+        self._executor = None
+
+    def avaliar(self, pop):
+        """MSE de cada linha de `pop` na grade completa."""
+        pop = np.atleast_2d(pop)
+        self.avaliacoes += len(pop)
+        if self.trabalhadores <= 1 or len(pop) < self.tamanho_minimo:
+            return mse_batch(self.plant, pop, self.t, self.setpoint)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.trabalhadores)
+        partes = np.array_split(pop, self.trabalhadores)
+        futuros = [self._executor.submit(mse_batch, self.plant, p, self.t, self.setpoint) for p in partes]
+        return np.concatenate([f.result() for f in futuros])
+
+    def fechar(self):
+        """Encerra o pool de processos, se criado."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class CheckpointGeracao:
+    """
+    Checkpoint de geração de uma otimização dentro de uma campanha.
+
+    Guarda no banco o otimizador (com seu gerador aleatório) e o avaliador
+    multi-fidelidade a cada `intervalo` gerações, de modo que uma execução
+    interrompida continue exatamente do mesmo estado.
+    """
+
+    def __init__(self, db_path, campanha_id, metodo, iteracao, intervalo=1):
+        self.db_path = db_path
+        self.campanha_id = campanha_id
+        self.metodo = metodo
+        self.iteracao = iteracao
+        self.intervalo = intervalo
+
+    def carregar(self):
+        """(otimizador, avaliador) salvos, ou None."""
+        salvo = carregar_checkpoint_geracao(self.campanha_id, self.metodo, self.iteracao, self.db_path)
+        if salvo is None:
+            return None
+        geracao, estado = salvo
+        print(f"   ↻ Retomando {self.metodo} (iteração {self.iteracao}) a partir da geração {geracao}")
+        return estado
+
+    def salvar(self, otimizador, avaliador=None):
+        if otimizador.geracao % self.intervalo == 0:
+            salvar_checkpoint_geracao(self.campanha_id, self.metodo, self.iteracao,
+                                      otimizador.geracao, (otimizador, avaliador), self.db_path)
+
+
+def retomar_ou_criar(checkpoint, criar, avaliador):
+    """
+    Restaura (otimizador, avaliador) do checkpoint, se houver; senão cria o
+    otimizador com `criar()` e mantém o avaliador recebido.
+    """
+    estado = checkpoint.carregar() if checkpoint is not None else None
+    if estado is not None:
+        return estado
+    return criar(), avaliador
+
+
+def executar_otimizador(otimizador, avaliar, geracoes, metodo, db_path,
+                        avaliador=None, rotulo="Geração", checkpoint=None):
+    """
+    Laço padrão ask/tell de um único otimizador, com histórico no banco.
+
+    Args:
+        otimizador: Objeto com a interface ask/tell
+        avaliar: Função de custo em lote (pop -> custos)
+        geracoes: Último valor de `otimizador.geracao` a executar
+        metodo: Nome gravado no histórico evolutivo
+        db_path: Caminho do banco de dados
+        avaliador: AvaliadorMultiFidelidade opcional; quando a fidelidade é
+            elevada, os custos guardados pelo otimizador são reavaliados
+        rotulo: Texto das mensagens de progresso ("Geração", "Iteração")
+        checkpoint: CheckpointGeracao opcional, salvo após cada geração
+
+    Returns:
+        (melhor_ganho, melhor_custo)
+    """
+    while not otimizador.encerrado and otimizador.geracao < geracoes:
+        custos = avaliar(otimizador.ask())
+        otimizador.tell(custos)
+
+        g = otimizador.geracao
+        melhor_ganho, melhor_custo = otimizador.melhor
+        salvar_historico_evolutivo(metodo, g, melhor_custo, np.mean(custos), np.max(custos), db_path,
+                                   ganhos=melhor_ganho)
+        if g > 0:
+            print(f"{rotulo} {g}/{geracoes} | Melhor: {melhor_custo:.6f} | Médio: {np.mean(custos):.6f}")
+
+        if avaliador is not None and g > 0 and avaliador.atualizar(g, geracoes, custos):
+            otimizador.reavaliar(avaliador.avaliar)
+
+        if checkpoint is not None:
+            checkpoint.salvar(otimizador, avaliador)
+
+    return otimizador.melhor
+
+
+def executar_concorrentes(otimizadores, avaliador, geracoes):
+    """
+    Conduz várias otimizações ao mesmo tempo com um único avaliador.
+
+    A cada rodada os lotes de todos os otimizadores ativos são concatenados
+    e avaliados de uma vez (largura total de lote), e os custos são
+    devolvidos a cada um. Os otimizadores podem ser de tipos diferentes.
+
+    Args:
+        otimizadores: Lista de objetos com a interface ask/tell
+        avaliador: Objeto com método avaliar(pop) (ex.: AvaliadorLote)
+        geracoes: Inteiro ou lista com o limite de `geracao` de cada um
+
+    Returns:
+        Lista de (melhor_ganho, melhor_custo), na ordem de `otimizadores`
+    """
+    if np.isscalar(geracoes):
+        geracoes = [geracoes] * len(otimizadores)
+
+    while True:
+        ativos = [k for k, o in enumerate(otimizadores)
+                  if not o.encerrado and o.geracao < geracoes[k]]
+        if not ativos:
+            break
+
+        lotes = [otimizadores[k].ask() for k in ativos]
+        custos = avaliador.avaliar(np.vstack(lotes))
+
+        inicio = 0
+        for k, lote in zip(ativos, lotes):
+            otimizadores[k].tell(custos[inicio:inicio + len(lote)])
+            inicio += len(lote)
+
+    return [o.melhor for o in otimizadores]
@@ -0,0 +1,168 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Polimento local dos ganhos com gradiente exato (etapa memética).
+
+Os métodos evolutivos param onde a última geração os deixa, em geral
+alguns por cento acima do ótimo. Aqui o melhor candidato é refinado por
+L-BFGS-B (quase-Newton com limites) usando o gradiente exato do MSE.
+
+O gradiente vem das equações de sensibilidade. Com C(s) = (Kd·s² + Kp·s
++ Ki)/s e P = Np/Dp, a derivada da resposta em relação a cada ganho é
+a resposta ao degrau de
+
+    ∂Y/∂θ = (∂C/∂θ) · P / (1 + C·P)² · R,   ∂C/∂θ = 1, 1/s, s
+
+Esses três sistemas e a própria malha fechada têm o denominador comum
+den², com den = s·Dp + (Kd·s² + Kp·s + Ki)·Np, e são simulados juntos,
+como um único sistema de quatro saídas, com a mesma discretização exata
+de mse_batch. Cada avaliação de (MSE, gradiente) custa uma simulação.
+"""
+
+import time
+import numpy as np
+from scipy.linalg import expm
+from scipy.optimize import minimize
+from model.model import _grade_uniforme, PlantaCenarios
+from modules.limites_module import LIMITES_PADRAO
+
+
+def _sistema_sensibilidades(plant, ganhos):
+    """
+    Forma canônica controlável do sistema com saídas [y, ∂y/∂Kp, ∂y/∂Ki,
+    ∂y/∂Kd] para entrada degrau.
+
+    Retorna:
+    A (n, n), Bv (n,), C (4, n), D (4,)
+    """
+    Np = np.atleast_1d(np.squeeze(plant.num[0][0])).astype(float)
+    Dp = np.atleast_1d(np.squeeze(plant.den[0][0])).astype(float)
+    Kp, Ki, Kd = (float(g) for g in ganhos)
+
+    NcNp = np.convolve([Kd, Kp, Ki], Np)
+    den = np.polyadd(np.convolve(Dp, [1.0, 0.0]), NcNp)
+    den2 = np.convolve(den, den)
+    NpDp = np.convolve(Np, Dp)
+
+    numeradores = [
+        np.convolve(NcNp, den),                     # y = C·P / (1 + C·P)
+        np.convolve(NpDp, [1.0, 0.0, 0.0]),         # ∂C/∂Kp = 1
+        np.convolve(NpDp, [1.0, 0.0]),              # ∂C/∂Ki = 1/s
+        np.convolve(NpDp, [1.0, 0.0, 0.0, 0.0]),    # ∂C/∂Kd = s
+    ]
+    L = max(len(den2), max(len(nu) for nu in numeradores))
+    num = np.array([np.pad(nu, (L - len(nu), 0)) for nu in numeradores])
+    den2 = np.pad(den2, (L - len(den2), 0))
+
+    # Remove coeficientes líderes nulos
+    while L > 1 and den2[0] == 0:
+        if np.any(num[:, 0] != 0):
+            raise ValueError("Sistema de sensibilidade impróprio")
+        num, den2, L = num[:, 1:], den2[1:], L - 1
+
+    b = num / den2[0]
+    a = den2 / den2[0]
+    n = L - 1
+
+    D = b[:, 0]
+    coef = b[:, 1:] - D[:, None] * a[1:]
+
+    A = np.zeros((n, n))
+    A[np.arange(n - 1), np.arange(1, n)] = 1.0
+    A[-1, :] = -a[:0:-1]
+    Bv = np.zeros(n)
+    Bv[-1] = 1.0
+    C = coef[:, ::-1]
+
+    return A, Bv, C, D
+
+
+def mse_e_gradiente(plant, ganhos, T, setpoint=1.0):
+    """
+    MSE da resposta ao degrau (mesmo valor de mse_batch) e seu gradiente
+    exato em relação a (Kp, Ki, Kd).
+
+    Com uma PlantaCenarios, o custo é o agregado dos cenários: no pior
+    caso, o gradiente é o do cenário pior (um subgradiente do máximo); na
+    média, a média ponderada dos gradientes.
+
+    Retorna:
+    (mse, gradiente (3,)); respostas divergentes recebem (1e6, zeros)
+    """
+    if isinstance(plant, PlantaCenarios):
+        pares = [mse_e_gradiente(p, ganhos, T, setpoint) for p in plant.plantas]
+        custos = np.array([c for c, _ in pares])
+        gradientes = np.array([g for _, g in pares])
+        if plant.agregacao == "max":
+            pior = int(np.argmax(custos))
+            return float(custos[pior]), gradientes[pior]
+        pesos = plant.pesos if plant.pesos is not None else np.full(len(custos), 1.0 / len(custos))
+        return float(pesos @ custos), pesos @ gradientes
+
+    t0, dt, n_pontos = _grade_uniforme(T)
+    A, Bv, C, D = _sistema_sensibilidades(plant, ganhos)
+    n = len(A)
+
+    M = np.zeros((n + 1, n + 1))
+    M[:n, :n] = A * dt
+    M[:n, n] = Bv * dt
+    E = expm(M)
+    Phi, Gamma = E[:n, :n], E[:n, n] * setpoint
+
+    # Estados de todas as amostras, x[k+1] = Φ·x[k] + Γ·r
+    X = np.empty((n_pontos, n))
+    x = np.zeros(n)
+    for k in range(n_pontos):
+        X[k] = x
+        x = Phi @ x + Gamma
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        Y = X @ C.T + D * setpoint                  # (n_pontos, 4)
+        erro = Y[:, 0] - setpoint
+        mse = float(np.mean(erro ** 2))
+        gradiente = 2.0 * (erro @ Y[:, 1:]) / n_pontos
+
+    if not np.isfinite(mse) or not np.all(np.isfinite(gradiente)):
+        return 1e6, np.zeros(3)
+    return mse, gradiente
+
+
+def polir_ganhos(plant, t, setpoint, ganhos, bounds=LIMITES_PADRAO, max_iter=50, tol=1e-12):
+    """
+    Refina `ganhos` com L-BFGS-B e gradiente por sensibilidade.
+
+    A otimização é feita nas coordenadas normalizadas pela largura da
+    caixa, para que os três ganhos tenham escalas comparáveis.
+
+    Returns:
+        dict com 'ganhos' (Kp, Ki, Kd), 'mse', 'mse_inicial',
+        'simulacoes' e 'tempo'
+    """
+    inicio = time.perf_counter()
+    lower_bounds, upper_bounds = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    escala = upper_bounds - lower_bounds
+    u0 = np.clip((np.asarray(ganhos, dtype=float) - lower_bounds) / escala, 0.0, 1.0)
+
+    simulacoes = 0
+
+    def custo(u):
+        nonlocal simulacoes
+        simulacoes += 1
+        mse, gradiente = mse_e_gradiente(plant, lower_bounds + escala * u, t, setpoint)
+        return mse, gradiente * escala
+
+    mse_inicial = custo(u0)[0]
+    resultado = minimize(custo, u0, jac=True, method="L-BFGS-B", bounds=[(0.0, 1.0)] * len(u0),
+                         options={'maxiter': max_iter, 'ftol': tol, 'gtol': 1e-12})
+
+    if resultado.fun < mse_inicial:
+        polidos, mse = lower_bounds + escala * resultado.x, float(resultado.fun)
+    else:
+        polidos, mse = lower_bounds + escala * u0, float(mse_inicial)
+
+    tempo = time.perf_counter() - inicio
+    print(f"Polimento L-BFGS-B: MSE {mse_inicial:.6f} → {mse:.6f} "
+          f"({simulacoes} simulações, {tempo:.3f}s)")
+
+    return {'ganhos': tuple(float(g) for g in polidos), 'mse': mse, 'mse_inicial': float(mse_inicial),
+            'simulacoes': simulacoes, 'tempo': tempo}
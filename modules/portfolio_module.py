@@ -0,0 +1,239 @@
+# pylint: disable="C0114, C0103, R0913, R0914, R0917, C0301"
+
+"""
+Portfólio de métodos com orçamento compartilhado e prazo.
+
+Em vez de rodar cada método por um número fixo de gerações, todos os
+métodos selecionados disputam um único orçamento (avaliações ou segundos
+de relógio). O escalonador é um bandido multibraço: cada "puxada" executa
+uma geração ask/tell de um método, e a recompensa é a queda do log do
+melhor MSE desse método por unidade de orçamento consumida, com média
+descontada para que um método estagnado perca prioridade. A escolha é
+por UCB, com o termo de exploração reduzido à medida que o prazo se
+aproxima. Métodos cujo critério de parada interno dispara saem do
+portfólio.
+
+O resultado é o melhor controlador encontrado por qualquer método dentro
+do orçamento.
+"""
+
+import time
+import numpy as np
+from db.db_module import salvar_historico_evolutivo
+from model.model import model, mse_batch
+from modules.seed_module import criar_gerador
+from modules.limites_module import criar_na_escala, LIMITES_PADRAO
+from modules.ga_module import OtimizadorGA
+from modules.pso_module import OtimizadorPSO
+from modules.de_module import OtimizadorDE
+from modules.cma_module import OtimizadorCMA
+from modules.surrogate_module import OtimizadorSurrogate
+from modules.nsga_module import OtimizadorNSGA2, objetivos_lote
+
+METODOS_PORTFOLIO = ("GA", "PSO", "DE", "CMA-ES", "GP-EI", "NSGA-II")
+
+# O ajuste do GP cresce com o cubo das avaliações: o braço do surrogate
+# encerra após este número de iterações (100 simulações com o projeto inicial)
+LIMITE_ITERACOES_SURROGATE = 90
+
+
+def _criar_braco(metodo, bounds, rng, ganhos_iniciais, escala_log):
+    """Otimizador ask/tell de `metodo` com a configuração padrão do tuner."""
+    fabricas = {
+        "GA": lambda b, g: OtimizadorGA(b, 20, seed=rng, ganhos_iniciais=g),
+        "PSO": lambda b, g: OtimizadorPSO(b, 20, seed=rng, ganhos_iniciais=g),
+        "DE": lambda b, g: OtimizadorDE(b, 20, seed=rng, ganhos_iniciais=g),
+        "CMA-ES": lambda b, g: OtimizadorCMA(b, seed=rng, media_inicial=None if g is None else g[0]),
+        "GP-EI": lambda b, g: OtimizadorSurrogate(b, 10, seed=rng, ganhos_iniciais=g),
+        "NSGA-II": lambda b, g: OtimizadorNSGA2(b, 40, seed=rng, ganhos_iniciais=g),
+    }
+    if metodo not in fabricas:
+        raise ValueError(f"Método sem interface ask/tell para o portfólio: {metodo}")
+    return criar_na_escala(fabricas[metodo], bounds, ganhos_iniciais, escala_log)
+
+
+class BracoPortfolio:
+    """
+    Estado de um método no portfólio: otimizador, orçamento consumido e
+    recompensa descontada (queda do log do melhor MSE por unidade de custo).
+    """
+
+    def __init__(self, metodo, otimizador, desconto=0.7, limite_geracoes=None):
+        self.metodo = metodo
+        self.otimizador = otimizador
+        self.desconto = desconto
+        self.limite_geracoes = limite_geracoes
+        self.puxadas = 0
+        self.avaliacoes = 0
+        self.segundos = 0.0
+        self.consumo = 0.0
+        self.recompensa = 0.0
+        self.melhor_custo = np.inf
+
+    def puxar(self, plant, t, setpoint):
+        """
+        Uma geração ask/tell.
+
+        Returns:
+            (avaliações, segundos, MSE dos candidatos)
+        """
+        inicio = time.perf_counter()
+        pop = self.otimizador.ask()
+        if self.metodo == "NSGA-II":
+            F = objetivos_lote(plant, pop, t, setpoint)
+            self.otimizador.tell(F)
+            custos = F[:, 0]
+        else:
+            custos = mse_batch(plant, pop, t, setpoint)
+            self.otimizador.tell(custos)
+        return len(pop), time.perf_counter() - inicio, custos
+
+    def atualizar(self, custo_puxada):
+        """Recompensa descontada da última puxada, com custo em unidades do orçamento."""
+        anterior = self.melhor_custo
+        self.melhor_custo = self.otimizador.melhor[1]
+        self.puxadas += 1
+        self.consumo += custo_puxada
+        if np.isfinite(anterior):
+            ganho = max(0.0, np.log(max(anterior, 1e-300)) - np.log(max(self.melhor_custo, 1e-300)))
+            self.recompensa = self.desconto * self.recompensa + (1 - self.desconto) * ganho / max(custo_puxada, 1e-12)
+
+    @property
+    def ativo(self):
+        if self.limite_geracoes is not None and self.otimizador.geracao >= self.limite_geracoes:
+            return False
+        return not self.otimizador.encerrado
+
+
+def escolher_braco(bracos, fracao_usada, exploracao=1.0, puxadas_iniciais=2):
+    """
+    Índice do próximo método: primeiro `puxadas_iniciais` de cada um; depois
+    UCB sobre a recompensa normalizada, com exploração proporcional à
+    fração restante do orçamento.
+
+    O termo de exploração conta puxadas equivalentes (a fração do orçamento
+    consumida pelo método vezes o total de puxadas), para que um método de
+    puxada cara (GP-EI) não seja explorado tanto quanto um barato.
+    """
+    ativos = [k for k, b in enumerate(bracos) if b.ativo]
+    novatos = [k for k in ativos if bracos[k].puxadas < puxadas_iniciais]
+    if novatos:
+        return min(novatos, key=lambda k: bracos[k].puxadas)
+
+    recompensas = np.array([bracos[k].recompensa for k in ativos])
+    escala = recompensas.max() if recompensas.max() > 0 else 1.0
+    consumo = np.array([bracos[k].consumo for k in ativos])
+    total = sum(b.puxadas for b in bracos)
+    equivalentes = np.maximum(total * consumo / max(consumo.sum(), 1e-12), 1e-12)
+    restante = max(0.0, 1.0 - fracao_usada)
+    ucb = recompensas / escala + exploracao * restante * np.sqrt(np.log(total) / equivalentes)
+    return ativos[int(np.argmax(ucb))]
+
+
+def executar_portfolio(plant, t, setpoint, metodos, orcamento_avaliacoes=None, prazo=None,
+                       bounds=LIMITES_PADRAO, seed=None, ganhos_iniciais=None, escala_log=False,
+                       exploracao=1.0, db_path="db/pid_results.db"):
+    """
+    Sintonia por portfólio de métodos sob um orçamento compartilhado.
+
+    O orçamento é `prazo` (segundos de relógio) e/ou `orcamento_avaliacoes`
+    (simulações), ambos positivos; o que se esgotar primeiro encerra o
+    portfólio, mas cada método faz ao menos uma puxada, mesmo que isso
+    exceda o orçamento. Com prazo, a recompensa é medida por segundo; sem
+    ele, por avaliação. A curva do melhor MSE global vai para o histórico
+    evolutivo como "PORTFOLIO", uma linha por puxada.
+
+    Returns:
+        dict com 'ganhos', 'mse', 'metodo' (o que encontrou o melhor),
+        'avaliacoes', 'tempo' e 'alocacao' ({método: (puxadas, avaliações, segundos, melhor MSE)})
+    """
+    if orcamento_avaliacoes is None and prazo is None:
+        raise ValueError("O portfólio requer prazo (s) e/ou orcamento_avaliacoes")
+    if prazo is not None and prazo <= 0:
+        raise ValueError(f"Prazo do portfólio deve ser positivo: {prazo}")
+    if orcamento_avaliacoes is not None and orcamento_avaliacoes <= 0:
+        raise ValueError(f"Orçamento de avaliações do portfólio deve ser positivo: {orcamento_avaliacoes}")
+    metodos = [m for m in metodos if m in METODOS_PORTFOLIO]
+    if not metodos:
+        raise ValueError(f"Nenhum método do portfólio entre os selecionados ({', '.join(METODOS_PORTFOLIO)})")
+
+    rng = criar_gerador(seed)
+    bracos = [BracoPortfolio(m, _criar_braco(m, bounds, rng, ganhos_iniciais, escala_log),
+                             limite_geracoes=LIMITE_ITERACOES_SURROGATE if m == "GP-EI" else None)
+              for m in metodos]
+
+    def fracao_usada():
+        fracoes = [0.0]
+        if prazo is not None:
+            fracoes.append((time.perf_counter() - inicio) / prazo)
+        if orcamento_avaliacoes is not None:
+            fracoes.append(avaliacoes / orcamento_avaliacoes)
+        return max(fracoes)
+
+    print(f"\nPortfólio: {', '.join(metodos)} | "
+          + " | ".join(([f"prazo {prazo:.1f}s"] if prazo is not None else []) +
+                       ([f"{orcamento_avaliacoes} avaliações"] if orcamento_avaliacoes is not None else [])))
+
+    inicio = time.perf_counter()
+    avaliacoes, puxada = 0, 0
+    melhor_ganho, melhor_custo, melhor_metodo = None, np.inf, None
+    while any(b.ativo and (b.puxadas == 0 or fracao_usada() < 1.0) for b in bracos):
+        k = escolher_braco(bracos, fracao_usada(), exploracao)
+        braco = bracos[k]
+        n, segundos, custos = braco.puxar(plant, t, setpoint)
+        avaliacoes += n
+        braco.avaliacoes += n
+        braco.segundos += segundos
+        braco.atualizar(segundos if prazo is not None else n)
+
+        ganho, custo = braco.otimizador.melhor
+        if custo < melhor_custo:
+            melhor_ganho, melhor_custo, melhor_metodo = np.array(ganho, dtype=float), custo, braco.metodo
+        salvar_historico_evolutivo("PORTFOLIO", puxada, melhor_custo, np.mean(custos), np.max(custos), db_path,
+                                   ganhos=melhor_ganho)
+        puxada += 1
+
+    tempo = time.perf_counter() - inicio
+    alocacao = {b.metodo: (b.puxadas, b.avaliacoes, b.segundos, b.melhor_custo) for b in bracos}
+
+    print(f"{'Método':<10} {'Puxadas':>8} {'Avaliações':>11} {'Tempo (s)':>10} {'Melhor MSE':>12}")
+    for metodo, (puxadas, n, segundos, custo) in alocacao.items():
+        marca = " *" if metodo == melhor_metodo else ""
+        print(f"{metodo:<10} {puxadas:>8} {n:>11} {segundos:>10.3f} {custo:>12.6f}{marca}")
+
+    Kp, Ki, Kd = melhor_ganho
+    print(f"\nParâmetros PID via portfólio ({melhor_metodo}, {avaliacoes} avaliações, {tempo:.2f}s):")
+    print(f"Kp = {Kp:.4f}")
+    print(f"Ki = {Ki:.4f}")
+    print(f"Kd = {Kd:.4f}")
+    print(f"Custo (MSE) = {melhor_custo:.6f}")
+
+    return {'ganhos': (float(Kp), float(Ki), float(Kd)), 'mse': float(melhor_custo), 'metodo': melhor_metodo,
+            'avaliacoes': avaliacoes, 'tempo': tempo, 'alocacao': alocacao}
+
+
+def tune_pid_portfolio(plant=None, t=None, setpoint=1.0,
+                       metodos=METODOS_PORTFOLIO, orcamento_avaliacoes=None, prazo=None,
+                       bounds=((0, 0, 0), (20, 2, 5)),
+                       db_path="db/pid_results.db", multi_fidelidade=False,
+                       vetorizado=False, seed=None, checkpoint=None,
+                       ganhos_iniciais=None, escala_log=False):
+    """
+    Ajuste PID pelo portfólio de `metodos`, com a assinatura comum dos tuners.
+
+    Sem prazo nem orçamento, usa 1000 avaliações por método. O portfólio é
+    sempre ask/tell e na grade completa; `checkpoint` não se aplica (uma
+    execução interrompida recomeça do início).
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 2000, 1000)
+    if multi_fidelidade:
+        print("⚠ Multi-fidelidade ignorada no portfólio (grade completa)")
+    if orcamento_avaliacoes is None and prazo is None:
+        orcamento_avaliacoes = 1000 * len(metodos)
+
+    resultado = executar_portfolio(plant, t, setpoint, metodos, orcamento_avaliacoes, prazo, bounds, seed,
+                                   ganhos_iniciais, escala_log, db_path=db_path)
+    return resultado['ganhos']
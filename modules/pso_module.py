@@ -2,7 +2,12 @@
 
 import numpy as np
 from db.db_module import salvar_historico_evolutivo
-from model.model import simulate, model
+from model.model import simulate, model, mse_batch
+from modules.fidelity_module import criar_avaliador
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import executar_otimizador, retomar_ou_criar
+from modules.warmstart_module import populacao_inicial, aquecer_populacao
+from modules.limites_module import criar_na_escala
 
 
 def _mse_response(pid, t, setpoint, plant):
@@ -16,12 +21,136 @@ def _mse_response(pid, t, setpoint, plant):
     return mse
 
 
+def _vizinhancas(n_particles, topologia):
+    """
+    Índices da vizinhança de cada partícula, matriz (n_particles, k).
+
+    - "global": None (todas as partículas seguem o gbest clássico)
+    - "anel": a própria partícula e as duas adjacentes
+    - "von_neumann": grade toroidal com vizinhos acima, abaixo e laterais
+    """
+    idx = np.arange(n_particles)
+    if topologia == "global":
+        return None
+    if topologia == "anel":
+        return np.column_stack([idx, (idx - 1) % n_particles, (idx + 1) % n_particles])
+    if topologia == "von_neumann":
+        colunas = max(1, int(np.ceil(np.sqrt(n_particles))))
+        return np.column_stack([idx, (idx - 1) % n_particles, (idx + 1) % n_particles,
+                                (idx - colunas) % n_particles, (idx + colunas) % n_particles])
+    raise ValueError(f"Topologia desconhecida: {topologia}")
+
+
+class OtimizadorPSO:
+    """
+    PSO síncrono com interface ask/tell: velocidades e posições de todo o
+    enxame são atualizadas como arrays e o enxame inteiro é pedido para
+    avaliação uma única vez por iteração.
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), n_particles=20,
+                 topologia="global", w=0.7, c1=1.5, c2=1.5, seed=None,
+                 ganhos_iniciais=None):
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.n_particles = n_particles
+        self.vizinhos = _vizinhancas(n_particles, topologia)
+        self.w, self.c1, self.c2 = w, c1, c2
+        self.rng = criar_gerador(seed)
+
+        self.particles = populacao_inicial(self.rng, bounds, n_particles, ganhos_iniciais)
+        self.velocities = np.zeros_like(self.particles)
+        self.pbest_positions = None
+        self.pbest_scores = None
+        self.geracao = -1
+        self.encerrado = False
+
+    def ask(self):
+        if self.pbest_scores is None:
+            return self.particles
+
+        # Melhor da vizinhança de cada partícula
+        if self.vizinhos is None:
+            lbest_positions = self.pbest_positions[np.argmin(self.pbest_scores)]
+        else:
+            lbest_idx = self.vizinhos[np.arange(self.n_particles),
+                                      np.argmin(self.pbest_scores[self.vizinhos], axis=1)]
+            lbest_positions = self.pbest_positions[lbest_idx]
+
+        r1 = self.rng.random(self.particles.shape)
+        r2 = self.rng.random(self.particles.shape)
+        self.velocities = (self.w * self.velocities +
+                           self.c1 * r1 * (self.pbest_positions - self.particles) +
+                           self.c2 * r2 * (lbest_positions - self.particles))
+        self.particles += self.velocities
+        np.clip(self.particles, self.lower_bounds, self.upper_bounds, out=self.particles)
+        return self.particles
+
+    def tell(self, custos):
+        custos = np.asarray(custos, dtype=float)
+        if self.pbest_scores is None:
+            self.pbest_positions = self.particles.copy()
+            self.pbest_scores = custos.copy()
+        else:
+            melhorou = custos < self.pbest_scores
+            self.pbest_positions[melhorou] = self.particles[melhorou]
+            self.pbest_scores[melhorou] = custos[melhorou]
+        self.geracao += 1
+
+    def reavaliar(self, avaliar):
+        self.pbest_scores = np.asarray(avaliar(self.pbest_positions), dtype=float)
+
+    @property
+    def melhor(self):
+        idx = int(np.argmin(self.pbest_scores))
+        return self.pbest_positions[idx].copy(), float(self.pbest_scores[idx])
+
+
+def _tune_pid_pso_sincrono(plant, t, setpoint, iters, otimizador, db_path, avaliador,
+                           checkpoint=None):
+    """Executa o OtimizadorPSO com avaliação do enxame em lote."""
+
+    def avaliar(pop):
+        if avaliador is not None:
+            return avaliador.avaliar(pop)
+        return mse_batch(plant, pop, t, setpoint)
+
+    gbest_position, gbest_score = executar_otimizador(otimizador, avaliar, iters, "PSO", db_path,
+                                                      avaliador, rotulo="Iteração", checkpoint=checkpoint)
+
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        gbest_position, gbest_score = avaliador.reavaliar_elite(otimizador.pbest_positions,
+                                                                otimizador.pbest_scores)
+        avaliador.imprimir_resumo()
+
+    return gbest_position, gbest_score
+
+
 def tune_pid_pso(plant=None, t=None, setpoint=1.0,
                  n_particles=20, iters=50,
                  bounds=((0,0,0), (20,2,5)),
-                 db_path="db/pid_results.db"):
+                 db_path="db/pid_results.db", multi_fidelidade=False,
+                 vetorizado=False, topologia="global", seed=None,
+                 checkpoint=None, ganhos_iniciais=None, escala_log=False):
     """
     Implementação manual do PSO para ajuste PID com salvamento de histórico.
+
+    Com vetorizado=True usa o PSO síncrono (enxame atualizado e avaliado em
+    lote a cada iteração), com topologia "global", "anel" ou "von_neumann".
+
+    `seed` (inteiro, SeedSequence ou np.random.Generator) define o fluxo
+    aleatório da execução sem usar o estado global do np.random.
+
+    `checkpoint` (CheckpointGeracao) salva o estado do otimizador a cada
+    geração e retoma dele, se existir; vale apenas para o motor em arrays.
+
+    `ganhos_iniciais` (array (m, 3), ex.: de buscar_aquecimento ou
+    ganhos_heuristicos) faz o warm start: parte da população inicial é
+    sorteada ao redor desses ganhos.
+
+    `escala_log=True` faz o motor em arrays buscar em escala logarítmica
+    normalizada dos ganhos dentro de `bounds` (ver limites_module).
     """
     if plant is None:
         plant = model(59.81, 401.61)
@@ -29,6 +158,35 @@ def tune_pid_pso(plant=None, t=None, setpoint=1.0,
     if t is None:
         t = np.linspace(0, 2000, 1000)
 
+    # Avaliador multi-fidelidade (None = grade completa sempre)
+    avaliador = criar_avaliador(multi_fidelidade, plant, t, setpoint)
+    rng = criar_gerador(seed)
+
+    if vetorizado:
+        otimizador, avaliador = retomar_ou_criar(
+            checkpoint,
+            lambda: criar_na_escala(
+                lambda b, g: OtimizadorPSO(b, n_particles, topologia, w=0.7, c1=1.5, c2=1.5, seed=rng,
+                                           ganhos_iniciais=g),
+                bounds, ganhos_iniciais, escala_log),
+            avaliador)
+        gbest_position, gbest_score = _tune_pid_pso_sincrono(plant, t, setpoint, iters, otimizador,
+                                                             db_path, avaliador, checkpoint)
+
+        Kp, Ki, Kd = gbest_position
+        print("\nParâmetros PID via PSO (síncrono):")
+        print(f"Kp = {Kp:.4f}")
+        print(f"Ki = {Ki:.4f}")
+        print(f"Kd = {Kd:.4f}")
+        print(f"Custo (MSE) = {gbest_score:.6f}")
+
+        return Kp, Ki, Kd
+
+    def custo(p):
+        if avaliador is not None:
+            return avaliador.mse(p)
+        return _mse_response(p, t, setpoint, plant)
+
     # Limites inferior e superior de cada parâmetro
     lower_bounds, upper_bounds = np.array(bounds[0]), np.array(bounds[1])
 
@@ -38,11 +196,12 @@ def tune_pid_pso(plant=None, t=None, setpoint=1.0,
     c2 = 1.5  # atração para o melhor global
 
     # Inicialização aleatória das partículas
-    particles = np.random.uniform(low=lower_bounds, high=upper_bounds, size=(n_particles, 3))
+    particles = rng.uniform(low=lower_bounds, high=upper_bounds, size=(n_particles, 3))
+    aquecer_populacao(particles, rng, bounds, ganhos_iniciais)
     velocities = np.zeros_like(particles)
 
     # Avalia fitness inicial
-    fitness = np.array([_mse_response(p, t, setpoint, plant) for p in particles])
+    fitness = np.array([custo(p) for p in particles])
 
     # Melhor pessoal de cada partícula
     pbest_positions = particles.copy()
@@ -54,12 +213,13 @@ def tune_pid_pso(plant=None, t=None, setpoint=1.0,
     gbest_score = fitness[gbest_idx]
 
     # Salva histórico inicial
-    salvar_historico_evolutivo("PSO", 0, float(gbest_score), float(np.mean(fitness)), float(np.max(fitness)), db_path)
+    salvar_historico_evolutivo("PSO", 0, float(gbest_score), float(np.mean(fitness)), float(np.max(fitness)), db_path,
+                               ganhos=gbest_position)
 
     # Loop principal do PSO
     for it in range(iters):
         for i in range(n_particles):
-            r1, r2 = np.random.rand(3), np.random.rand(3)  # fatores aleatórios
+            r1, r2 = rng.random(3), rng.random(3)  # fatores aleatórios
 
             # Atualiza velocidade
             velocities[i] = (w * velocities[i] +
@@ -73,7 +233,7 @@ def tune_pid_pso(plant=None, t=None, setpoint=1.0,
             particles[i] = np.clip(particles[i], lower_bounds, upper_bounds)
 
             # Avalia nova posição
-            score = _mse_response(particles[i], t, setpoint, plant)
+            score = custo(particles[i])
 
             # Atualiza melhor pessoal
             if score < pbest_scores[i]:
@@ -86,13 +246,26 @@ def tune_pid_pso(plant=None, t=None, setpoint=1.0,
                 gbest_position = particles[i].copy()
 
         # Atualiza fitness da população
-        fitness = np.array([_mse_response(p, t, setpoint, plant) for p in particles])
+        fitness = np.array([custo(p) for p in particles])
         
         # Salva histórico da geração
-        salvar_historico_evolutivo("PSO", it + 1, float(gbest_score), np.mean(fitness), np.max(fitness), db_path)
+        salvar_historico_evolutivo("PSO", it + 1, float(gbest_score), np.mean(fitness), np.max(fitness), db_path,
+                                   ganhos=gbest_position)
         
         print(f"Iteração {it+1}/{iters} | Melhor: {gbest_score:.6f} | Médio: {np.mean(fitness):.6f}")
 
+        # Ao elevar a fidelidade, os melhores pessoais são reavaliados na nova grade
+        if avaliador is not None and avaliador.atualizar(it + 1, iters, fitness):
+            pbest_scores = avaliador.avaliar(pbest_positions)
+            gbest_idx = np.argmin(pbest_scores)
+            gbest_position = pbest_positions[gbest_idx].copy()
+            gbest_score = pbest_scores[gbest_idx]
+
+    if avaliador is not None:
+        # Elite reavaliada na grade completa
+        gbest_position, gbest_score = avaliador.reavaliar_elite(pbest_positions, pbest_scores)
+        avaliador.imprimir_resumo()
+
     Kp, Ki, Kd = gbest_position
     print("\nParâmetros PID via PSO:")
     print(f"Kp = {Kp:.4f}")
@@ -0,0 +1,51 @@
+# pylint: disable="C0114, C0103, C0301"
+
+"""
+Objetivo robusto: sintonia no pior caso (ou na média) dos cenários C1–C8.
+
+testar_robustez só verifica a robustez depois da sintonia. Aqui os mesmos
+cenários (db_module.cenarios_robustez) viram uma PlantaCenarios, que os
+tuners recebem no lugar da planta nominal: mse_batch simula cada
+população em todos os cenários como um único lote (cenário × ganho ×
+tempo) e devolve o custo agregado, sem nenhuma mudança nos otimizadores.
+"""
+
+import numpy as np
+from db.db_module import cenarios_robustez
+from model.model import model, mse_por_cenario, PlantaCenarios
+
+AGREGACOES = {"max": "pior caso", "media": "média"}
+
+
+def planta_robusta(k_term, tau, agregacao="max", cenarios=None, pesos=None):
+    """
+    PlantaCenarios com a planta nominal e os cenários de robustez.
+
+    O cenário nominal é sempre incluído, em primeiro lugar, mesmo que não
+    conste de `cenarios`.
+
+    Args:
+        agregacao: "max" (pior caso) ou "media" (valor esperado)
+        cenarios: Nomes dos cenários a incluir (padrão: todos)
+        pesos: Pesos da média, um por cenário resultante, na ordem
+            ["Nominal"] + cenarios (com "Nominal" primeiro)
+    """
+    todos = cenarios_robustez(k_term, tau)
+    nomes = list(todos) if cenarios is None else ["Nominal"] + [c for c in cenarios if c != "Nominal"]
+    desconhecidos = [c for c in nomes if c not in todos]
+    if desconhecidos:
+        raise ValueError(f"Cenários desconhecidos: {', '.join(desconhecidos)}")
+    if pesos is not None and len(pesos) != len(nomes):
+        raise ValueError(f"{len(pesos)} pesos para {len(nomes)} cenários ({', '.join(nomes)}); "
+                         "o cenário nominal é sempre incluído e também precisa de peso")
+    plantas = [model(todos[c]["K_term"], todos[c]["tau"]) for c in nomes]
+    return PlantaCenarios(plantas, nomes, agregacao, pesos)
+
+
+def imprimir_custos_cenarios(plant, ganhos, t, setpoint=1.0, rotulo=""):
+    """Tabela do MSE por cenário de um controlador, com o cenário pior destacado."""
+    custos = mse_por_cenario(plant, ganhos, t, setpoint)[:, 0]
+    pior = int(np.argmax(custos))
+    print(f"\nObjetivo robusto ({AGREGACOES[plant.agregacao]}){' - ' + rotulo if rotulo else ''}: "
+          f"{float(plant.agregar(custos[:, None])[0]):.6f}")
+    print("  " + " | ".join(f"{'*' if i == pior else ''}{n}: {c:.4f}" for i, (n, c) in enumerate(zip(plant.nomes, custos))))
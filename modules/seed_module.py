@@ -0,0 +1,63 @@
+# pylint: disable="C0114, C0103, C0301"
+
+"""
+Sementes e fluxos aleatórios independentes para os métodos de sintonia.
+
+Cada tuner recebe `seed` e cria o próprio np.random.Generator, sem tocar
+no estado global do np.random. O executar_sintonia deriva um fluxo filho
+por (método, iteração) a partir de uma SeedSequence raiz; a entropia raiz
+e a chave do filho são gravadas em cada resultado, o que basta para
+repetir a execução bit a bit, inclusive em processos paralelos.
+"""
+
+import zlib
+import numpy as np
+
+
+def criar_gerador(seed=None):
+    """
+    Normaliza o parâmetro `seed` dos tuners.
+
+    Aceita None (entropia do sistema operacional), um inteiro, uma
+    SeedSequence ou um Generator já criado (usado como está).
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def semente_raiz(seed=None):
+    """SeedSequence raiz de uma execução (entropia nova quando seed é None)."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def chave_metodo(metodo, iteracao):
+    """
+    Chave de derivação (spawn_key) de um método em uma iteração.
+
+    Usa o CRC32 do nome, e não a posição na lista de métodos, para que o
+    fluxo de um método não mude quando outros métodos são (des)marcados.
+    """
+    return (zlib.crc32(metodo.encode("utf-8")), int(iteracao))
+
+
+def derivar_semente(raiz, metodo, iteracao):
+    """SeedSequence filha e independente para (método, iteração)."""
+    return np.random.SeedSequence(raiz.entropy, spawn_key=tuple(raiz.spawn_key) + chave_metodo(metodo, iteracao))
+
+
+def descrever_semente(seq):
+    """
+    Representação textual (entropia, chave) para o banco de dados.
+
+    A entropia pode passar de 64 bits, por isso é gravada como texto.
+    """
+    return str(seq.entropy), ",".join(str(k) for k in seq.spawn_key)
+
+
+def reconstruir_semente(entropia, chave):
+    """Reconstrói a SeedSequence gravada por descrever_semente."""
+    spawn_key = tuple(int(k) for k in chave.split(",")) if chave else ()
+    return np.random.SeedSequence(int(entropia), spawn_key=spawn_key)
@@ -9,115 +9,166 @@ import sqlite3
 import numpy as np
 import itertools
 from scipy import stats
+from db.db_module import em_cache_versionado
 
-def teste_friedman(db_path="db/pid_results.db", metrica="mse"):
+METRICAS_FRIEDMAN = ("mse", "overshoot", "tempo_acomodacao")
+
+
+def carregar_matriz_resultados(db_path="db/pid_results.db", metricas=METRICAS_FRIEDMAN):
     """
-    Executa o teste de Friedman para comparar múltiplos métodos.
+    Carrega todos os métodos e métricas com uma única consulta e monta a
+    matriz pivotada usada pelo teste de Friedman.
     
-    O teste de Friedman é um teste não-paramétrico usado para detectar
-    diferenças em tratamentos através de múltiplas tentativas de teste.
+    Cada método contribui com suas N execuções mais recentes, sendo N o
+    menor número de execuções entre os métodos (os demais são truncados).
     
     Args:
         db_path: Caminho do banco de dados
-        metrica: Métrica a ser analisada ('mse', 'overshoot', 'tempo_acomodacao')
+        metricas: Colunas de `resultados` a carregar
     
     Returns:
-        dict com resultados do teste:
-            - statistic: Estatística χ² de Friedman
-            - pvalue: p-valor do teste
-            - rankings: Ranking médio de cada método
-            - n_metodos: Número de métodos comparados
-            - n_iteracoes: Número de iterações por método
-            - significativo: Boolean indicando se p < 0.05
+        (metodos, M): lista ordenada de métodos e matriz
+        (n_metricas, n_iteracoes, n_metodos); valores nulos viram NaN
     """
     
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT metodo, {', '.join(metricas)} FROM resultados ORDER BY metodo, data_hora DESC")
+    linhas = cursor.fetchall()
+    conn.close()
+    
+    if not linhas:
+        return [], np.empty((len(metricas), 0, 0))
+    
+    nomes = np.array([linha[0] for linha in linhas])
+    valores = np.array([linha[1:] for linha in linhas], dtype=float)
+    
+    # Linhas já agrupadas por método: início e tamanho de cada grupo
+    metodos, inicio, contagem = np.unique(nomes, return_index=True, return_counts=True)
+    indices = inicio[None, :] + np.arange(contagem.min())[:, None]       # (n_iteracoes, n_metodos)
+    return [str(m) for m in metodos], valores[indices].transpose(2, 0, 1)
+
+
+def friedman_matriz(M):
+    """
+    Teste de Friedman de várias métricas de uma vez.
+    
+    Os rankings de todas as iterações de todas as métricas são calculados
+    por um único rankdata ao longo do eixo dos métodos; a estatística tem
+    a correção para empates (mesmo valor de scipy.stats.friedmanchisquare).
+    
+    Args:
+        M: Matriz (n_metricas, n_iteracoes, n_metodos)
+    
+    Returns:
+        (statistic (n_metricas,), pvalue (n_metricas,), ranking_medio (n_metricas, n_metodos))
+    """
+    
+    _, n, k = M.shape
+    ranks = stats.rankdata(M, axis=2)                # Menor valor = menor rank
+    R = ranks.sum(axis=1)
+    A1 = np.sum(ranks ** 2, axis=(1, 2))
+    C1 = n * k * (k + 1) ** 2 / 4
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistic = (k - 1) * np.sum((R - n * (k + 1) / 2) ** 2, axis=1) / (A1 - C1)
+    return statistic, stats.chi2.sf(statistic, k - 1), R / n
+
+
+def friedman_metricas(db_path="db/pid_results.db", metricas=METRICAS_FRIEDMAN):
+    """
+    Executa o teste de Friedman para várias métricas em uma só passada:
+    uma consulta ao banco e um único cálculo vetorizado de rankings.
+    
+    As métricas padrão (METRICAS_FRIEDMAN) são sempre calculadas juntas e
+    ficam em cache até que novos resultados sejam gravados no banco, de
+    modo que chamadas repetidas (uma por métrica, GUI e CLI) não relêem
+    os dados.
+    
+    Args:
+        db_path: Caminho do banco de dados
+        metricas: Métricas a analisar
+    
+    Returns:
+        dict {metrica: resultado} no formato de teste_friedman(), ou None
+        se não houver dados suficientes
+    """
+    
+    if not set(metricas) <= set(METRICAS_FRIEDMAN):
+        return _calcular_friedman(db_path, metricas)
+    
+    todos = em_cache_versionado("friedman", lambda: _calcular_friedman(db_path, METRICAS_FRIEDMAN),
+                                ("resultados",), db_path)
+    return None if todos is None else {m: todos[m] for m in metricas}
+
+
+def _calcular_friedman(db_path, metricas):
+    """Teste de Friedman das `metricas` direto do banco (sem cache)."""
+    
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Buscar métodos disponíveis
-        cursor.execute("SELECT DISTINCT metodo FROM resultados ORDER BY metodo")
-        metodos = [row[0] for row in cursor.fetchall()]
+        metodos, M = carregar_matriz_resultados(db_path, metricas)
         
         if len(metodos) < 3:
             print(f"AVISO: Apenas {len(metodos)} métodos encontrados.")
             print("   O teste de Friedman requer pelo menos 3 métodos para comparação.")
-            conn.close()
             return None
         
-        # Buscar dados de cada método
-        dados_metodos = []
-        min_iteracoes = float('inf')
-        
-        for metodo in metodos:
-            query = f"""
-                SELECT {metrica}
-                FROM resultados
-                WHERE metodo = ?
-                ORDER BY data_hora DESC
-            """
-            cursor.execute(query, (metodo,))
-            valores = [row[0] for row in cursor.fetchall()]
-            
-            if len(valores) < min_iteracoes:
-                min_iteracoes = len(valores)
-            
-            dados_metodos.append(valores)
-        
-        conn.close()
+        n_iteracoes = M.shape[1]
         
         # Verificar se há iterações suficientes
-        if min_iteracoes < 3:
-            print(f"AVISO: Apenas {min_iteracoes} iterações encontradas.")
+        if n_iteracoes < 3:
+            print(f"AVISO: Apenas {n_iteracoes} iterações encontradas.")
             print("   Recomenda-se pelo menos 5 iterações para análise estatística confiável.")
             print("   O teste será executado, mas os resultados podem ter baixa confiabilidade.")
         
-        # Truncar todos os arrays para o tamanho mínimo
-        dados_truncados = [arr[:min_iteracoes] for arr in dados_metodos]
-        
-        # Executar teste de Friedman
-        # Cada linha = uma iteração, cada coluna = um método
-        dados_array = np.array(dados_truncados).T
-        
-        statistic, pvalue = stats.friedmanchisquare(*dados_truncados)
-        
-        # Calcular rankings médios
-        # Para cada iteração, ranquear os métodos (1 = melhor)
-        rankings = []
-        for i in range(min_iteracoes):
-            valores_iteracao = dados_array[i, :]
-            ranks = stats.rankdata(valores_iteracao)  # Menor valor = menor rank
-            rankings.append(ranks)
-        
-        rankings_array = np.array(rankings)
-        ranking_medio = np.mean(rankings_array, axis=0)
-        
-        # Criar dicionário de rankings por método
-        rankings_dict = {}
-        for idx, metodo in enumerate(metodos):
-            rankings_dict[metodo] = ranking_medio[idx]
+        statistic, pvalue, ranking_medio = friedman_matriz(M)
         
-        # Ordenar por ranking
-        rankings_ordenados = sorted(rankings_dict.items(), key=lambda x: x[1])
+        resultados = {}
+        for idx, metrica in enumerate(metricas):
+            rankings_dict = dict(zip(metodos, ranking_medio[idx]))
+            resultados[metrica] = {
+                'statistic': statistic[idx],
+                'pvalue': pvalue[idx],
+                'rankings': sorted(rankings_dict.items(), key=lambda x: x[1]),
+                'rankings_dict': rankings_dict,
+                'n_metodos': len(metodos),
+                'n_iteracoes': n_iteracoes,
+                'significativo': pvalue[idx] < 0.05,
+                'metrica': metrica.upper()
+            }
         
-        resultado = {
-            'statistic': statistic,
-            'pvalue': pvalue,
-            'rankings': rankings_ordenados,
-            'rankings_dict': rankings_dict,
-            'n_metodos': len(metodos),
-            'n_iteracoes': min_iteracoes,
-            'significativo': pvalue < 0.05,
-            'metrica': metrica.upper()
-        }
-        
-        return resultado
+        return resultados
         
     except Exception as e:
         print(f"Erro ao executar teste de Friedman: {e}")
         return None
 
 
+def teste_friedman(db_path="db/pid_results.db", metrica="mse"):
+    """
+    Executa o teste de Friedman para comparar múltiplos métodos.
+    
+    O teste de Friedman é um teste não-paramétrico usado para detectar
+    diferenças em tratamentos através de múltiplas tentativas de teste.
+    Para várias métricas, prefira friedman_metricas() (uma única passada).
+    
+    Args:
+        db_path: Caminho do banco de dados
+        metrica: Métrica a ser analisada ('mse', 'overshoot', 'tempo_acomodacao')
+    
+    Returns:
+        dict com resultados do teste:
+            - statistic: Estatística χ² de Friedman
+            - pvalue: p-valor do teste
+            - rankings: Ranking médio de cada método
+            - n_metodos: Número de métodos comparados
+            - n_iteracoes: Número de iterações por método
+            - significativo: Boolean indicando se p < 0.05
+    """
+    
+    resultados = friedman_metricas(db_path, (metrica,))
+    return None if resultados is None else resultados[metrica]
+
+
 def imprimir_resultado_friedman(resultado):
     """
     Imprime os resultados do teste de Friedman de forma formatada.
@@ -190,6 +241,7 @@ def analise_completa(db_path="db/pid_results.db"):
     print("="*70)
     
     metricas = ['mse', 'overshoot', 'tempo_acomodacao']
+    todos = friedman_metricas(db_path, metricas) or {}
     resultados = {}
     
     for metrica in metricas:
@@ -197,7 +249,7 @@ def analise_completa(db_path="db/pid_results.db"):
         print(f"MÉTRICA: {metrica.upper()}")
         print(f"{'='*70}")
         
-        resultado = teste_friedman(db_path, metrica)
+        resultado = todos.get(metrica)
         
         if resultado:
             imprimir_resultado_friedman(resultado)
@@ -208,18 +260,21 @@ def analise_completa(db_path="db/pid_results.db"):
     return resultados
 
 
-def gerar_resumo_estatistico(db_path="db/pid_results.db"):
+def gerar_resumo_estatistico(db_path="db/pid_results.db", resultado=None):
     """
     Gera um resumo consolidado da análise estatística.
     
     Args:
         db_path: Caminho do banco de dados
+        resultado: Resultado do teste de Friedman do MSE já calculado
+            (evita refazer o teste)
     
     Returns:
         str com resumo formatado
     """
     
-    resultado = teste_friedman(db_path, "mse")
+    if resultado is None:
+        resultado = teste_friedman(db_path, "mse")
     
     if resultado is None:
         return "Dados insuficientes para análise estatística."
@@ -256,19 +311,21 @@ def gerar_resumo_estatistico(db_path="db/pid_results.db"):
 
 
 # Função auxiliar para integração com GUI
-def obter_dados_para_grafico(db_path="db/pid_results.db", metrica="mse"):
+def obter_dados_para_grafico(db_path="db/pid_results.db", metrica="mse", resultado=None):
     """
     Obtém dados formatados para plotagem de gráficos.
     
     Args:
         db_path: Caminho do banco de dados
         metrica: Métrica a ser analisada
+        resultado: Resultado do teste de Friedman já calculado (opcional)
     
     Returns:
         dict com dados prontos para visualização
     """
     
-    resultado = teste_friedman(db_path, metrica)
+    if resultado is None:
+        resultado = teste_friedman(db_path, metrica)
     
     if resultado is None:
         return None
@@ -351,13 +408,195 @@ def imprimir_posthoc_nemenyi(resultados):
     total_sig = sum(1 for r in resultados if r[4])
     print(f"\nTotal de pares com diferença significativa: {total_sig}")
 
+def analise_frente_pareto(db_path="db/pid_results.db", execucao=None):
+    """
+    Analisa uma frente de Pareto gravada (a mais recente, se execucao=None).
+    
+    Args:
+        db_path: Caminho do banco de dados
+        execucao: Número da execução na tabela frente_pareto
+    
+    Returns:
+        dict com ganhos (n, 3), objetivos (n, 3) = (mse, overshoot,
+        margem_fase), índices dos extremos de cada objetivo e da solução de
+        compromisso, ou None se não houver frente
+    """
+    from db.db_module import buscar_frente_pareto
+    from modules.nsga_module import solucao_compromisso
+    
+    frente = buscar_frente_pareto(execucao, db_path)
+    if frente is None:
+        return None
+    
+    execucao, metodo, pontos = frente
+    pontos = np.array(pontos, dtype=float)
+    ganhos, objetivos = pontos[:, :3], pontos[:, 3:]
+    
+    # Objetivos como minimização: a margem de fase é maximizada
+    minimizar = objetivos * np.array([1.0, 1.0, -1.0])
+    
+    return {
+        'execucao': execucao,
+        'metodo': metodo,
+        'n_pontos': len(pontos),
+        'ganhos': ganhos,
+        'objetivos': objetivos,
+        'extremos': {
+            'mse': int(np.argmin(objetivos[:, 0])),
+            'overshoot': int(np.argmin(objetivos[:, 1])),
+            'margem_fase': int(np.argmax(objetivos[:, 2])),
+        },
+        'compromisso': solucao_compromisso(minimizar),
+    }
+
+
+def resumo_frente_pareto(db_path="db/pid_results.db", execucao=None):
+    """
+    Gera um resumo textual da frente de Pareto.
+    
+    Returns:
+        str com resumo formatado
+    """
+    analise = analise_frente_pareto(db_path, execucao)
+    
+    if analise is None:
+        return "Nenhuma frente de Pareto gravada (execute o NSGA-II)."
+    
+    objetivos, ganhos = analise['objetivos'], analise['ganhos']
+    
+    resumo = []
+    resumo.append("╔═══════════════════════════════════════════════════╗")
+    resumo.append("║     FRENTE DE PARETO (MSE × OVERSHOOT × MF)       ║")
+    resumo.append("╚═══════════════════════════════════════════════════╝")
+    resumo.append("")
+    resumo.append(f"Método: {analise['metodo']} | Execução: {analise['execucao']}")
+    resumo.append(f"Soluções não dominadas: {analise['n_pontos']}")
+    resumo.append("")
+    resumo.append(f"  MSE:        {objetivos[:, 0].min():.6f} – {objetivos[:, 0].max():.6f}")
+    resumo.append(f"  Overshoot:  {objetivos[:, 1].min():.2f} – {objetivos[:, 1].max():.2f} %")
+    resumo.append(f"  Margem MF:  {objetivos[:, 2].min():.2f} – {objetivos[:, 2].max():.2f} °")
+    resumo.append("")
+    
+    rotulos = [("Menor MSE", analise['extremos']['mse']),
+               ("Menor overshoot", analise['extremos']['overshoot']),
+               ("Maior margem de fase", analise['extremos']['margem_fase']),
+               ("Compromisso (ideal)", analise['compromisso'])]
+    for rotulo, idx in rotulos:
+        Kp, Ki, Kd = ganhos[idx]
+        mse, overshoot, margem = objetivos[idx]
+        resumo.append(f"🎯 {rotulo}:")
+        resumo.append(f"   Kp={Kp:.4f}, Ki={Ki:.4f}, Kd={Kd:.4f}")
+        resumo.append(f"   MSE={mse:.6f} | OS={overshoot:.2f}% | MF={margem:.2f}°")
+    
+    resumo.append("─" * 51)
+    
+    return "\n".join(resumo)
+
+
+def ranks_com_tolerancia(custos, rtol=1e-9):
+    """
+    Rankings por linha em que custos com diferença relativa menor que
+    `rtol` contam como empate (rank médio).
+    
+    Métodos que convergem ao mesmo ótimo diferem só por ruído de ponto
+    flutuante; ranquear os valores brutos os separaria por esse ruído.
+    """
+    
+    custos = np.asarray(custos, dtype=float)
+    ordem = np.argsort(custos, axis=1, kind="stable")
+    ordenados = np.take_along_axis(custos, ordem, axis=1)
+    escala = np.maximum(np.abs(ordenados[:, 1:]), np.abs(ordenados[:, :-1]))
+    with np.errstate(invalid="ignore"):
+        proximos = np.isfinite(escala) & (np.abs(np.diff(ordenados, axis=1)) <= rtol * escala)
+    novo = ~(proximos | (ordenados[:, 1:] == ordenados[:, :-1]))
+    grupos = np.zeros_like(custos)
+    np.put_along_axis(grupos, ordem, np.concatenate([np.zeros((len(custos), 1)), np.cumsum(novo, axis=1)], axis=1), axis=1)
+    return stats.rankdata(grupos, axis=1)
+
+
+def etapa_f_race(custos, alpha=0.05, rtol=1e-9):
+    """
+    Uma etapa de eliminação do F-Race (Birattari et al., 2002).
+    
+    Com três ou mais métodos, aplica o teste de Friedman (com correção para
+    empates) e, se significativo, elimina os métodos cuja soma de rankings
+    difere da do melhor por mais que a diferença crítica do pós-teste de
+    Conover. Com dois métodos, usa o teste de Wilcoxon pareado.
+    
+    Args:
+        custos: Matriz (n_iteracoes, n_metodos); cada linha é um bloco
+        alpha: Nível de significância
+        rtol: Diferença relativa abaixo da qual dois custos empatam
+    
+    Returns:
+        dict com 'statistic', 'pvalue', 'ranking_medio' (n_metodos,) e
+        'sobreviventes' (máscara booleana n_metodos)
+    """
+    
+    custos = np.asarray(custos, dtype=float)
+    b, k = custos.shape
+    ranks = ranks_com_tolerancia(custos, rtol)
+    R = ranks.sum(axis=0)
+    sobreviventes = np.ones(k, dtype=bool)
+    
+    if k == 2:
+        diferencas = custos[:, 0] - custos[:, 1]
+        diferencas[ranks[:, 0] == ranks[:, 1]] = 0.0
+        if np.all(diferencas == 0):
+            statistic, pvalue = 0.0, 1.0
+        else:
+            statistic, pvalue = stats.wilcoxon(diferencas)
+        if pvalue < alpha:
+            sobreviventes[np.argmax(R)] = False
+        return {'statistic': float(statistic), 'pvalue': float(pvalue),
+                'ranking_medio': R / b, 'sobreviventes': sobreviventes}
+    
+    # Friedman com correção para empates (forma de Conover)
+    A1 = np.sum(ranks ** 2)
+    C1 = b * k * (k + 1) ** 2 / 4
+    if A1 - C1 <= 0:
+        return {'statistic': 0.0, 'pvalue': 1.0, 'ranking_medio': R / b, 'sobreviventes': sobreviventes}
+    T = (k - 1) * np.sum((R - b * (k + 1) / 2) ** 2) / (A1 - C1)
+    pvalue = stats.chi2.sf(T, k - 1)
+    
+    if pvalue < alpha and b > 1:
+        variancia = 2 * (b * A1 - np.sum(R ** 2)) / ((b - 1) * (k - 1))
+        critica = stats.t.ppf(1 - alpha / 2, (b - 1) * (k - 1)) * np.sqrt(max(variancia, 0.0))
+        melhor = np.argmin(R)
+        sobreviventes = (R - R[melhor]) <= critica
+    
+    return {'statistic': float(T), 'pvalue': float(pvalue), 'ranking_medio': R / b,
+            'sobreviventes': sobreviventes}
+
+
+def imprimir_etapa_f_race(iteracao, metodos, resultado):
+    """Imprime uma etapa do F-Race: p-valor, ranking médio e eliminados."""
+    
+    eliminados = [m for m, s in zip(metodos, resultado['sobreviventes']) if not s]
+    print(f"\n🏁 F-Race após {iteracao} iterações | {len(metodos)} métodos | "
+          f"estatística = {resultado['statistic']:.4f} | p = {resultado['pvalue']:.6f}")
+    ordem = np.argsort(resultado['ranking_medio'])
+    print("   " + " | ".join(f"{metodos[i]}: {resultado['ranking_medio'][i]:.2f}" for i in ordem))
+    if eliminados:
+        print(f"   ✗ Eliminados: {', '.join(eliminados)}")
+
+
 if __name__ == "__main__":
     # Teste do módulo
     print("\nTESTE DO MÓDULO DE ESTATÍSTICA")
     print("="*70)
     
-    for metrica in ["mse", "overshoot", "tempo_acomodacao"]:
-        resultado = teste_friedman("db/pid_results.db", metrica)
+    # F-Race: métodos no mesmo ótimo (diferença ~1e-11) não se eliminam
+    custos_race = np.array([[2.2466529680394847 * (1 + 1e-12 * i), 2.246652968019639, 3.0 + i, 5.0 + i]
+                            for i in range(6)])
+    race = etapa_f_race(custos_race)
+    assert race['sobreviventes'][0] == race['sobreviventes'][1], "empate numérico separado pelo F-Race"
+    assert race['ranking_medio'][0] == race['ranking_medio'][1] == 1.5
+    print("F-Race: custos quase iguais empatam ✓")
+    
+    resultados = friedman_metricas("db/pid_results.db") or {}
+    for metrica in METRICAS_FRIEDMAN:
+        resultado = resultados.get(metrica)
         
         if resultado:
             imprimir_resultado_friedman(resultado)
@@ -368,4 +607,3 @@ if __name__ == "__main__":
         else:
             print("\nNão foi possível executar o teste.")
             print("   Certifique-se de que há dados suficientes no banco.")
-
@@ -0,0 +1,253 @@
+# pylint: disable="C0114, C0103, R0902, R0913, R0914, R0917, C0301"
+
+"""
+Otimização assistida por surrogate (otimização bayesiana) para o PID.
+
+Voltado a plantas cuja simulação é cara (tempo morto, saturação, ordem
+elevada), em que 1000+ avaliações por sintonia são inviáveis. Um processo
+gaussiano (kernel Matérn 5/2 com um comprimento por ganho) é ajustado ao
+log do MSE das simulações já feitas, e o próximo candidato é o que
+maximiza a melhoria esperada (EI). Depois de um projeto inicial em
+hipercubo latino, cada iteração custa uma única simulação.
+
+O tempo de ajuste do surrogate (verossimilhança marginal e aquisição) é
+contabilizado à parte do tempo de simulação.
+"""
+
+import time
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+from scipy.stats import norm
+from model.model import model, mse_batch
+from modules.seed_module import criar_gerador
+from modules.optimizer_module import executar_otimizador, retomar_ou_criar
+from modules.limites_module import criar_na_escala
+
+
+def _matern52(A, B, comprimentos):
+    """Kernel Matérn 5/2 ARD com variância unitária entre as linhas de A e B."""
+    d = (A[:, None, :] - B[None, :, :]) / comprimentos
+    r = np.sqrt(5.0 * np.sum(d ** 2, axis=-1))
+    return (1.0 + r + r ** 2 / 3.0) * np.exp(-r)
+
+
+class ProcessoGaussiano:
+    """
+    Regressão por processo gaussiano no cubo unitário.
+
+    Os alvos são padronizados; os hiperparâmetros (log dos comprimentos e
+    do ruído) maximizam a verossimilhança marginal por L-BFGS-B.
+    """
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.theta = np.append(np.full(dim, np.log(0.3)), np.log(1e-4))
+        self.limites_theta = [(np.log(0.01), np.log(10.0))] * dim + [(np.log(1e-8), np.log(1e-1))]
+
+    def _nll(self, theta, X, y):
+        comprimentos, ruido = np.exp(theta[:-1]), np.exp(theta[-1])
+        K = _matern52(X, X, comprimentos) + (ruido + 1e-10) * np.eye(len(X))
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alfa = cho_solve((L, True), y)
+        return 0.5 * y @ alfa + np.sum(np.log(np.diag(L))) + 0.5 * len(X) * np.log(2 * np.pi)
+
+    def ajustar(self, X, y, rng, reinicios=2):
+        self.X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.media_y = np.mean(y)
+        self.desvio_y = np.std(y) if np.std(y) > 0 else 1.0
+        self.y = (y - self.media_y) / self.desvio_y
+
+        # Parte dos hiperparâmetros anteriores e de pontos aleatórios
+        inicios = [self.theta] + [np.array([rng.uniform(a, b) for a, b in self.limites_theta])
+                                  for _ in range(reinicios)]
+        melhor = None
+        for theta0 in inicios:
+            res = minimize(self._nll, theta0, args=(self.X, self.y), method="L-BFGS-B",
+                           bounds=self.limites_theta)
+            if melhor is None or res.fun < melhor.fun:
+                melhor = res
+        self.theta = melhor.x
+
+        comprimentos, ruido = np.exp(self.theta[:-1]), np.exp(self.theta[-1])
+        K = _matern52(self.X, self.X, comprimentos) + (ruido + 1e-10) * np.eye(len(self.X))
+        self.fator = cho_factor(K, lower=True)
+        self.alfa = cho_solve(self.fator, self.y)
+
+    def prever(self, Xn):
+        """Média e desvio-padrão previstos, na escala original dos alvos."""
+        Ks = _matern52(np.atleast_2d(Xn), self.X, np.exp(self.theta[:-1]))
+        media = Ks @ self.alfa
+        v = solve_triangular(self.fator[0], Ks.T, lower=True)
+        variancia = np.maximum(1.0 - np.sum(v ** 2, axis=0), 1e-12)
+        return self.media_y + self.desvio_y * media, self.desvio_y * np.sqrt(variancia)
+
+
+def melhoria_esperada(media, desvio, melhor, xi=0.01):
+    """EI para minimização."""
+    melhoria = melhor - media - xi
+    z = melhoria / desvio
+    return melhoria * norm.cdf(z) + desvio * norm.pdf(z)
+
+
+def hipercubo_latino(rng, n, dim):
+    """n pontos em [0, 1]^dim, um por estrato em cada dimensão."""
+    return np.column_stack([(rng.permutation(n) + rng.random(n)) / n for _ in range(dim)])
+
+
+class OtimizadorSurrogate:
+    """
+    Otimização bayesiana com interface ask/tell (ver optimizer_module).
+
+    O primeiro ask() devolve o projeto inicial (hipercubo latino, com os
+    `ganhos_iniciais` no lugar das primeiras linhas); os seguintes devolvem
+    um único candidato, o de maior EI sobre o log do MSE. Como PSO e DE,
+    começa em geracao = -1 e registra o projeto inicial como geração 0.
+
+    Atributos de instrumentação: tempo_ajuste (verossimilhança marginal),
+    tempo_aquisicao (maximização da EI) e ajustes.
+    """
+
+    def __init__(self, bounds=((0, 0, 0), (20, 2, 5)), n_iniciais=10, n_candidatos=2048,
+                 xi=0.01, seed=None, ganhos_iniciais=None):
+        self.lower_bounds = np.array(bounds[0], dtype=float)
+        self.upper_bounds = np.array(bounds[1], dtype=float)
+        self.escala = self.upper_bounds - self.lower_bounds
+        self.dim = len(self.lower_bounds)
+        self.n_candidatos = n_candidatos
+        self.xi = xi
+        self.rng = criar_gerador(seed)
+
+        U = hipercubo_latino(self.rng, n_iniciais, self.dim)
+        if ganhos_iniciais is not None and len(ganhos_iniciais) > 0:
+            ganhos = np.atleast_2d(np.asarray(ganhos_iniciais, dtype=float))[:n_iniciais]
+            U[:len(ganhos)] = np.clip((ganhos - self.lower_bounds) / self.escala, 0.0, 1.0)
+
+        self.gp = ProcessoGaussiano(self.dim)
+        self.U = np.empty((0, self.dim))
+        self.custos = np.empty(0)
+        self.pendentes = U
+        self.geracao = -1
+        self.encerrado = False
+
+        self.tempo_ajuste = 0.0
+        self.tempo_aquisicao = 0.0
+        self.ajustes = 0
+
+    def _propor(self):
+        inicio = time.perf_counter()
+        self.gp.ajustar(self.U, np.log(np.maximum(self.custos, 1e-300)), self.rng)
+        self.tempo_ajuste += time.perf_counter() - inicio
+        self.ajustes += 1
+
+        inicio = time.perf_counter()
+        y_melhor = np.log(max(np.min(self.custos), 1e-300))
+        u_melhor = self.U[np.argmin(self.custos)]
+
+        # Candidatos uniformes e ao redor do melhor (projetados na caixa, o que cobre as faces)
+        candidatos = np.vstack([
+            self.rng.random((self.n_candidatos, self.dim)),
+            np.clip(u_melhor + self.rng.normal(0.0, 0.05, (self.n_candidatos // 4, self.dim)), 0.0, 1.0),
+        ])
+        ei = melhoria_esperada(*self.gp.prever(candidatos), y_melhor, self.xi)
+
+        # Refinamento local dos melhores candidatos
+        def menos_ei(u):
+            return -melhoria_esperada(*self.gp.prever(u[None, :]), y_melhor, self.xi)[0]
+
+        melhor_u, melhor_ei = candidatos[np.argmax(ei)], np.max(ei)
+        for u0 in candidatos[np.argsort(ei)[-3:]]:
+            res = minimize(menos_ei, u0, method="L-BFGS-B", bounds=[(0.0, 1.0)] * self.dim)
+            if -res.fun > melhor_ei:
+                melhor_u, melhor_ei = res.x, -res.fun
+
+        # Evita repetir um ponto já simulado
+        if np.min(np.linalg.norm(self.U - melhor_u, axis=1)) < 1e-6:
+            melhor_u = self.rng.random(self.dim)
+
+        self.tempo_aquisicao += time.perf_counter() - inicio
+        return melhor_u[None, :]
+
+    def ask(self):
+        if len(self.pendentes) == 0:
+            self.pendentes = self._propor()
+        return self.lower_bounds + self.escala * self.pendentes
+
+    def tell(self, custos):
+        self.U = np.vstack([self.U, self.pendentes])
+        self.custos = np.append(self.custos, np.asarray(custos, dtype=float))
+        self.pendentes = np.empty((0, self.dim))
+        self.geracao += 1
+
+    def reavaliar(self, avaliar):
+        self.custos = np.asarray(avaliar(self.lower_bounds + self.escala * self.U), dtype=float)
+
+    @property
+    def melhor(self):
+        idx = int(np.argmin(self.custos))
+        return self.lower_bounds + self.escala * self.U[idx], float(self.custos[idx])
+
+
+def tune_pid_surrogate(plant=None, t=None, setpoint=1.0,
+                       avaliacoes=40, n_iniciais=10,
+                       bounds=((0, 0, 0), (20, 2, 5)),
+                       db_path="db/pid_results.db", multi_fidelidade=False,
+                       vetorizado=False, seed=None, checkpoint=None,
+                       ganhos_iniciais=None, escala_log=False):
+    """
+    Ajuste PID por otimização bayesiana (GP + melhoria esperada) com histórico.
+
+    Usa no total `avaliacoes` simulações: `n_iniciais` no projeto inicial e
+    uma por iteração. Cada iteração é gravada no histórico evolutivo como
+    uma geração. Ao final são impressos, separadamente, o tempo gasto nas
+    simulações e no ajuste do surrogate.
+
+    A execução é sempre ask/tell (`vetorizado` não se aplica) e sempre na
+    grade completa: com poucas avaliações, a multi-fidelidade apenas
+    misturaria níveis de erro no mesmo modelo.
+
+    `seed`, `checkpoint`, `ganhos_iniciais`, `bounds` e `escala_log` têm o
+    mesmo papel que nos demais tuners.
+    """
+    if plant is None:
+        plant = model(59.81, 401.61)
+    if t is None:
+        t = np.linspace(0, 2000, 1000)
+    if multi_fidelidade:
+        print("⚠ Multi-fidelidade ignorada no tuner por surrogate (grade completa)")
+
+    rng = criar_gerador(seed)
+    otimizador, _ = retomar_ou_criar(
+        checkpoint,
+        lambda: criar_na_escala(
+            lambda b, g: OtimizadorSurrogate(b, n_iniciais, seed=rng, ganhos_iniciais=g),
+            bounds, ganhos_iniciais, escala_log),
+        None)
+
+    tempo_simulacao = 0.0
+
+    def avaliar(pop):
+        nonlocal tempo_simulacao
+        inicio = time.perf_counter()
+        custos = mse_batch(plant, pop, t, setpoint)
+        tempo_simulacao += time.perf_counter() - inicio
+        return custos
+
+    best_solution, best_cost = executar_otimizador(otimizador, avaliar, avaliacoes - n_iniciais, "GP-EI",
+                                                   db_path, rotulo="Avaliação", checkpoint=checkpoint)
+
+    Kp, Ki, Kd = best_solution
+    print("\nParâmetros PID via otimização bayesiana (GP-EI):")
+    print(f"Kp = {Kp:.4f}")
+    print(f"Ki = {Ki:.4f}")
+    print(f"Kd = {Kd:.4f}")
+    print(f"Custo (MSE) = {best_cost:.6f}")
+    print(f"Simulações: {len(otimizador.custos)} ({tempo_simulacao:.3f}s) | "
+          f"Ajuste do surrogate: {otimizador.ajustes} ajustes ({otimizador.tempo_ajuste:.3f}s) | "
+          f"Aquisição: {otimizador.tempo_aquisicao:.3f}s")
+
+    return Kp, Ki, Kd
@@ -0,0 +1,90 @@
+# pylint: disable="C0114, C0103, C0301"
+
+"""
+Warm start dos métodos evolutivos a partir de ganhos conhecidos.
+
+Os pontos de partida vêm de resultados anteriores (para uma planta (K, τ)
+já sintonizada antes, ou próxima de uma, os melhores ganhos gravados em
+`resultados`) ou dos métodos heurísticos ZN1 e CC. Parte da população
+inicial é sorteada ao redor deles (o restante continua uniforme na caixa,
+para preservar a diversidade) e o CMA-ES parte com a média sobre o melhor.
+"""
+
+import io
+import contextlib
+import numpy as np
+from db.db_module import buscar_ganhos_anteriores
+from model.model import mse_batch
+from modules.zn_module import ziegler_nichols_1
+from modules.cc_module import cohen_coon
+
+
+def aquecer_populacao(pop, rng, bounds, ganhos_iniciais, fracao=0.25, dispersao=0.05):
+    """
+    Substitui, in-place, as primeiras ⌈fracao·n⌉ linhas de `pop` pelos
+    ganhos anteriores seguidos de perturbações gaussianas ao redor deles
+    (desvio de `dispersao` vezes a largura da caixa).
+    """
+    if ganhos_iniciais is None or len(ganhos_iniciais) == 0:
+        return pop
+
+    lower_bounds, upper_bounds = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    ganhos = np.clip(np.atleast_2d(np.asarray(ganhos_iniciais, dtype=float)), lower_bounds, upper_bounds)
+    n = len(pop)
+    k = min(n, max(len(ganhos), int(np.ceil(fracao * n))))
+    centros = ganhos[np.arange(k) % len(ganhos)]
+    ruido = rng.normal(0.0, dispersao, size=centros.shape) * (upper_bounds - lower_bounds)
+    ruido[:min(k, len(ganhos))] = 0.0  # os ganhos anteriores entram sem perturbação
+    pop[:k] = np.clip(centros + ruido, lower_bounds, upper_bounds)
+    return pop
+
+
+def populacao_inicial(rng, bounds, n, ganhos_iniciais=None, fracao=0.25, dispersao=0.05):
+    """
+    População inicial (n, dim) uniforme nos limites, com warm start opcional.
+
+    Sem `ganhos_iniciais` o sorteio é idêntico ao uniforme puro.
+    """
+    lower_bounds, upper_bounds = np.array(bounds[0], dtype=float), np.array(bounds[1], dtype=float)
+    pop = rng.uniform(lower_bounds, upper_bounds, size=(n, len(lower_bounds)))
+    return aquecer_populacao(pop, rng, bounds, ganhos_iniciais, fracao, dispersao)
+
+
+def buscar_aquecimento(k_term, tau, db_path="db/pid_results.db", n=5):
+    """
+    Ganhos anteriores para o warm start da planta (k_term, tau), ou None.
+    """
+    anteriores = buscar_ganhos_anteriores(k_term, tau, db_path, n=n)
+    if anteriores is None:
+        print("Warm start: nenhum resultado anterior para esta planta ou plantas próximas")
+        return None
+
+    origem = "mesma planta" if anteriores['distancia'] < 1e-9 else (
+        f"planta próxima K={anteriores['k_term']}, τ={anteriores['tau']}")
+    print(f"Warm start: {len(anteriores['ganhos'])} ganhos anteriores ({origem})")
+    return anteriores['ganhos']
+
+
+def ganhos_heuristicos(plant, t, setpoint=1.0, bounds=((0, 0, 0), (20, 2, 5))):
+    """
+    Ganhos de ZN1 e CC para semear a população inicial, do menor para o
+    maior MSE (o primeiro é a média inicial do CMA-ES).
+
+    Os ganhos são projetados nos limites e as mensagens dos métodos são
+    suprimidas. Métodos que falham na identificação são ignorados.
+    """
+    ganhos = []
+    for metodo in (ziegler_nichols_1, cohen_coon):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                ganhos.append(metodo(plant, t, setpoint))
+        except Exception as e:
+            print(f"Semeadura heurística: {metodo.__name__} falhou ({e})")
+
+    ganhos = np.array([g for g in ganhos if np.all(np.isfinite(g))], dtype=float).reshape(-1, 3)
+    if len(ganhos) == 0:
+        return None
+    ganhos = np.clip(ganhos, bounds[0], bounds[1])
+    ganhos = ganhos[np.argsort(mse_batch(plant, ganhos, t, setpoint))]
+    print(f"Semeadura heurística: {len(ganhos)} ganhos (ZN1/CC)")
+    return ganhos
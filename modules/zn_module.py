@@ -29,20 +29,19 @@ def sintonize(K: float, L: float, T: float):
 
     return Kp, Ki, Kd
 
-def ziegler_nichols_1(plant: ctl.TransferFunction, T: np.ndarray, setpoint: float = 1, threshold: float = 0.02):
+def identificar_fopdt(plant: ctl.TransferFunction, T: np.ndarray, setpoint: float = 1, threshold: float = 0.02):
     """
-    Função que aplica o método de Ziegler–Nichols 1 para ajuste de parâmetros PID.
-    O método consiste em determinar os parâmetros K, L e T da planta e calcular os parâmetros PID (Kp, Ki, Kd)
-    usando as fórmulas padrão de Ziegler–Nichols.
+    Identifica os parâmetros K, L e T (modelo de primeira ordem com tempo
+    morto) a partir da resposta ao degrau da planta em malha aberta.
 
     Parâmetros:
     plant (TransferFunction): Função de transferência da planta.
-    setpoint (float): Valor do setpoint desejado.
     T (array): Vetor de tempo para simulação.
+    setpoint (float): Amplitude do degrau.
     threshold (float): Limiar para detectar o início da resposta.
 
     Retorna:
-    Kp (float), Ki (float), Kd (float)
+    K (float), L (float), T (float)
     """
 
     # Entrada em degrau
@@ -67,6 +66,27 @@ def ziegler_nichols_1(plant: ctl.TransferFunction, T: np.ndarray, setpoint: floa
     idx_T = np.argmin(np.abs(y_out - alvo))
     T_const = t_out[idx_T] - L  # T contado a partir de L
 
+    return K, L, T_const
+
+
+def ziegler_nichols_1(plant: ctl.TransferFunction, T: np.ndarray, setpoint: float = 1, threshold: float = 0.02):
+    """
+    Função que aplica o método de Ziegler–Nichols 1 para ajuste de parâmetros PID.
+    O método consiste em determinar os parâmetros K, L e T da planta e calcular os parâmetros PID (Kp, Ki, Kd)
+    usando as fórmulas padrão de Ziegler–Nichols.
+
+    Parâmetros:
+    plant (TransferFunction): Função de transferência da planta.
+    setpoint (float): Valor do setpoint desejado.
+    T (array): Vetor de tempo para simulação.
+    threshold (float): Limiar para detectar o início da resposta.
+
+    Retorna:
+    Kp (float), Ki (float), Kd (float)
+    """
+
+    K, L, T_const = identificar_fopdt(plant, T, setpoint, threshold)
+
     print("\nParâmetros identificados:")
     print(f"K = {K:.4f}")
     print(f"L = {L:.4f} s")